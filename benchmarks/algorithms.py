@@ -0,0 +1,131 @@
+"""
+Compare key generation, signing and verification cost per issuer key type.
+
+Usage: uv run benchmarks/algorithms.py [--iterations N] [--json PATH]
+
+For each key type supported by `SdJwtHandler` this measures key generation,
+a raw JWS sign and verify with the key's algorithm, and SD-JWT issuance and
+presentation verification with that issuer key. Key pool latency is measured
+against inline key generation.
+"""
+
+import argparse
+import json
+import time
+
+from harness import measure, print_result, write_report
+
+from credential_handler import KEY_TYPES, KeyPool, SdJwtHandler, generate_key
+from credential_handler.sd_jwt_handler import signing_alg_for_key
+from jwcrypto.jwk import JWK
+from jwcrypto.jws import JWS
+from sd_jwt.common import SDObj
+
+ISSUER_DID = "did:webvh:issuer.example.com"
+HOLDER_DID = "did:webvh:holder.example.com"
+VERIFIER_DID = "did:webvh:verifier.example.com"
+OPTIONS = {"nonce": "bench_nonce", "aud": VERIFIER_DID}
+
+
+def build_claims():
+    now = int(time.time())
+    return {
+        "iss": ISSUER_DID,
+        "sub": HOLDER_DID,
+        "iat": now,
+        "exp": now + 3600,
+        "cnf": {"kid": HOLDER_DID},
+        **{SDObj(f"claim_{i}"): f"value_{i}" for i in range(8)},
+    }
+
+
+def run_key_type(key_type, iterations):
+    handler = SdJwtHandler()
+    holder_key = generate_key("P-256")
+    issuer_key = generate_key(key_type)
+    issuer_public_key = JWK(**issuer_key.export_public(as_dict=True))
+    alg = signing_alg_for_key(issuer_key)
+    params = {"key": key_type, "alg": alg}
+
+    payload = json.dumps({"iss": ISSUER_DID, "sub": HOLDER_DID})
+    jws = JWS(payload)
+    jws.add_signature(issuer_key, alg=alg, protected=json.dumps({"alg": alg}))
+    token = jws.serialize(compact=True)
+
+    def sign():
+        signed = JWS(payload)
+        signed.add_signature(issuer_key, alg=alg, protected=json.dumps({"alg": alg}))
+        return signed.serialize(compact=True)
+
+    def verify():
+        received = JWS()
+        received.deserialize(token)
+        received.verify(issuer_public_key, alg=alg)
+
+    claims = build_claims()
+    credential = handler.issue_credential(claims, issuer_key, holder_key)
+    presentation = handler.create_presentation(
+        credential, {"claim_0": True}, holder_key, OPTIONS
+    )
+
+    results = []
+    for name, fn in (
+        ("generate_key", lambda: generate_key(key_type)),
+        ("jws_sign", sign),
+        ("jws_verify", verify),
+        (
+            "issue_credential",
+            lambda: handler.issue_credential(claims, issuer_key, holder_key),
+        ),
+        (
+            "verify_presentation",
+            lambda: handler.verify_presentation(
+                presentation, lambda issuer, header: issuer_public_key, OPTIONS
+            ),
+        ),
+    ):
+        result = measure(name, fn, iterations=iterations, params=params)
+        print_result(result)
+        results.append(result)
+    return results
+
+
+def run_key_pool(iterations):
+    """Measures taking a key from a warm pool against generating one inline."""
+    results = []
+    for key_type in KEY_TYPES:
+        pool = KeyPool(key_type, depth=iterations + 100).start()
+        while len(pool) < pool.depth:
+            time.sleep(0.01)
+        result = measure(
+            "key_pool.get",
+            pool.get,
+            iterations=iterations,
+            params={"key": key_type, "misses": 0},
+        )
+        result["params"]["misses"] = pool.misses
+        pool.close()
+        print_result(result)
+        results.append(result)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--json", help="Write machine-readable results to this file")
+    args = parser.parse_args()
+
+    results = []
+    print("* Signing and verification per issuer key type")
+    for key_type in KEY_TYPES:
+        results += run_key_type(key_type, args.iterations)
+    print("\n* Key pool")
+    results += run_key_pool(args.iterations)
+
+    if args.json:
+        write_report(args.json, "algorithms", results)
+
+
+if __name__ == "__main__":
+    main()
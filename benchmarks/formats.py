@@ -0,0 +1,130 @@
+"""
+Compare the payload size and verification throughput of credential formats.
+
+Usage: uv run benchmarks/formats.py [--iterations N] [--json PATH]
+
+Issues the same claims as an `sd-jwt` and a `cbor-sd` credential for each
+handler scenario of the pipeline benchmark, presents the same claims and
+prints the credential and presentation sizes (as sent to `submit_credential`,
+and as raw CBOR for cbor-sd). It then times `verify_presentation` with the
+reference and fast SD-JWT verifiers and the CBOR handler. In `cbor-sd`,
+nested claims are disclosed with their top-level claim.
+"""
+
+import argparse
+import base64
+
+from harness import measure, print_result, write_report
+from pipeline import (
+    HANDLER_SCENARIOS,
+    NONCE,
+    VERIFIER_DID,
+    build_claims,
+    build_disclosure,
+)
+
+from credential_handler import CborSdHandler, SdJwtHandler, generate_key
+from jwcrypto.jwk import JWK
+
+
+def run(iterations):
+    handlers = [
+        SdJwtHandler(verifier="reference"),
+        SdJwtHandler(verifier="fast"),
+        CborSdHandler(),
+    ]
+    holder_key = generate_key("P-256")
+    options = {"nonce": NONCE, "aud": VERIFIER_DID}
+    results = []
+
+    for claim_count, disclosed_count, depth, key_type in HANDLER_SCENARIOS:
+        issuer_key = generate_key(key_type)
+        issuer_public_key = JWK.from_json(issuer_key.export_public())
+
+        def get_issuer_key(issuer, header_parameters):
+            return issuer_public_key
+
+        claims = build_claims(claim_count, depth)
+        disclosure = build_disclosure(disclosed_count, depth)
+        presentations = {}
+        for handler in (handlers[0], handlers[2]):
+            credential = handler.issue_credential(claims, issuer_key, holder_key)
+            presentation = handler.create_presentation(
+                credential, disclosure, holder_key, options
+            )
+            presentations[handler.format_name] = presentation
+            size = {
+                "credential_bytes": len(credential),
+                "presentation_bytes": len(presentation),
+            }
+            if handler.format_name == "cbor-sd":
+                size["raw_presentation_bytes"] = len(
+                    base64.urlsafe_b64decode(
+                        presentation + "=" * (-len(presentation) % 4)
+                    )
+                )
+            print(
+                f"  {handler.format_name:<8} credential {size['credential_bytes']:>7} B"
+                f"  presentation {size['presentation_bytes']:>7} B"
+                + (
+                    f" ({size['raw_presentation_bytes']} B raw CBOR)"
+                    if "raw_presentation_bytes" in size
+                    else ""
+                )
+            )
+            presentations[handler.format_name, "size"] = size
+
+        scenario = []
+        for handler in handlers:
+            presentation = presentations[handler.format_name]
+            label = handler.format_name
+            if handler.format_name == "sd-jwt":
+                label += f"/{handler.verifier}"
+            result = measure(
+                "verify_presentation",
+                lambda: handler.verify_presentation(
+                    presentation, get_issuer_key, options
+                ),
+                iterations=iterations,
+                params={
+                    "format": label,
+                    "claims": claim_count,
+                    "disclosed": disclosed_count,
+                    "depth": depth,
+                    "key": key_type,
+                    **presentations[handler.format_name, "size"],
+                },
+            )
+            print_result(result)
+            scenario.append(result)
+        for result in scenario[1:]:
+            speedup = result["ops_per_sec"] / scenario[0]["ops_per_sec"]
+            result["params"]["speedup"] = round(speedup, 2)
+        print(
+            f"{'':<28} vs sd-jwt/reference: "
+            + ", ".join(
+                f"{result['params']['format']} {result['params']['speedup']:.2f}x"
+                for result in scenario[1:]
+            )
+            + "\n"
+        )
+        results += scenario
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--json", help="Write machine-readable results to this file")
+    args = parser.parse_args()
+
+    print("* payload size and verify_presentation, sd-jwt vs cbor-sd")
+    results = run(args.iterations)
+
+    if args.json:
+        write_report(args.json, "formats", results)
+
+
+if __name__ == "__main__":
+    main()
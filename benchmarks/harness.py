@@ -0,0 +1,96 @@
+"""
+Shared measurement helpers for the benchmark runners.
+"""
+
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+
+def measure(name, fn, iterations=200, warmup=10, params=None):
+    """
+    Times `fn()` over `iterations` calls and returns a result dict with
+    ops/sec, p50/p99 latency (ms) and peak traced memory (bytes).
+    """
+    for _ in range(warmup):
+        fn()
+
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+
+    # Memory is traced in a separate pass so tracing does not skew the timings
+    tracemalloc.start()
+    for _ in range(min(iterations, 20)):
+        fn()
+    _, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return _result(name, samples, peak_memory, params)
+
+
+async def measure_async(name, fn, iterations=200, warmup=10, params=None):
+    """Like `measure`, for a coroutine function."""
+    for _ in range(warmup):
+        await fn()
+
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        await fn()
+        samples.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    for _ in range(min(iterations, 20)):
+        await fn()
+    _, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return _result(name, samples, peak_memory, params)
+
+
+def _result(name, samples, peak_memory, params):
+    samples.sort()
+    return {
+        "name": name,
+        "params": params or {},
+        "iterations": len(samples),
+        "ops_per_sec": len(samples) / sum(samples),
+        "p50_ms": statistics.median(samples) * 1000,
+        "p99_ms": samples[min(len(samples) - 1, int(len(samples) * 0.99))] * 1000,
+        "peak_memory_bytes": peak_memory,
+    }
+
+
+def print_result(result):
+    params = ", ".join(f"{k}={v}" for k, v in result["params"].items())
+    print(
+        f"{result['name']:<28} {params:<48} "
+        f"{result['ops_per_sec']:>10.1f} ops/s  "
+        f"p50 {result['p50_ms']:>8.3f} ms  "
+        f"p99 {result['p99_ms']:>8.3f} ms  "
+        f"peak {result['peak_memory_bytes'] / 1024:>8.1f} KiB"
+    )
+
+
+def write_report(path, suite, results):
+    """Writes benchmark results as JSON for tracking regressions between releases."""
+    report = {
+        "suite": suite,
+        "timestamp": time.time(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nSaved results to {path}")
@@ -0,0 +1,486 @@
+"""
+Load and soak test the credential checking server with simulated agents.
+
+Usage: uv run benchmarks/load.py [--transport in-process|loopback|direct]
+           [--concurrency 1,4,16,64] [--duration SECONDS] [--json PATH]
+
+Mints a corpus of holder credentials like examples/generate_test_credential.py,
+then, for each concurrency level, runs that many agents that repeatedly call
+`list_required_credentials` and `submit_credential` with a presentation for the
+returned nonce. Each level reports flows per second, latency percentiles, the
+mix of error codes and the server's RSS; sampled RSS is kept in the --json
+report, so a long run at one level (e.g. --concurrency 32 --duration 3600)
+doubles as a soak test for memory leaks.
+
+Transports, none of which needs a TMCP or DID network:
+- in-process: MCP client sessions over memory streams to the server in this
+  process (the server's RSS then includes the agents)
+- loopback: the server runs in a child process and each agent holds its own MCP
+  session over a TCP connection to 127.0.0.1
+- direct: agents call the server's methods, without MCP message handling
+
+The server is configured from the usual TMCP_* environment variables, e.g.
+TMCP_VERIFY_EXECUTOR=process or TMCP_SDJWT_VERIFIER=fast.
+"""
+
+import argparse
+import asyncio
+import collections
+import contextlib
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from harness import write_report
+
+from credential_handler import SdJwtHandler, SdJwtPresentationBuilder, generate_key
+from sd_jwt.common import SDObj
+
+# The server is imported as `src.credential_checking_server`
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT))
+
+ISSUER_DID = "did:webvh:issuer.example.com"
+DISCLOSED_CLAIMS = {"given_name": True, "family_name": True}
+
+
+def mint_corpus(workdir, holders):
+    """
+    Issues one identity credential per holder and writes the issuer's trust
+    registry. Returns the registry path and a presentation builder per holder.
+    """
+    handler = SdJwtHandler()
+    issuer_key = generate_key("P-256")
+    registry_path = os.path.join(workdir, "issuer_public_key.json")
+    with open(registry_path, "w") as f:
+        json.dump(
+            {
+                "issuer_did": ISSUER_DID,
+                "public_key": json.loads(issuer_key.export_public()),
+            },
+            f,
+        )
+
+    builders = []
+    now = int(time.time())
+    for i in range(holders):
+        holder_did = f"did:webvh:holder-{i}.example.com"
+        holder_key = generate_key("P-256")
+        claims = {
+            "iss": ISSUER_DID,
+            "sub": holder_did,
+            "iat": now,
+            "exp": now + 24 * 3600,
+            "cnf": {"kid": holder_did},
+            "vct": "IdentityCredential",
+            SDObj("given_name"): "Jon",
+            SDObj("family_name"): f"Doe {i}",
+            SDObj("email"): f"holder{i}@mail.com",
+        }
+        credential = handler.issue_credential(claims, issuer_key, holder_key)
+        builder = SdJwtPresentationBuilder(
+            credential, holder_key, common_disclosures=[DISCLOSED_CLAIMS]
+        )
+        builders.append(builder)
+    return registry_path, builders
+
+
+def rss_bytes(pid):
+    """Resident set size of a process, or None where /proc is not available."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    if pid == os.getpid():
+        import resource
+
+        # Peak rather than current RSS; kilobytes on Linux, bytes on macOS
+        scale = 1 if sys.platform == "darwin" else 1024
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+    return None
+
+
+class _DirectSession:
+    """Stands in for the MCP session a verified credential is remembered for."""
+
+
+class _DirectClient:
+    def __init__(self, app):
+        self._app = app
+        self._session = _DirectSession()
+
+    async def list_required_credentials(self):
+        return self._app.list_required_credentials()
+
+    async def submit_credential(self, presentation, nonce):
+        return await self._app.submit_credential(
+            "sd-jwt", presentation, nonce, session=self._session
+        )
+
+
+class _McpClient:
+    def __init__(self, session):
+        self._session = session
+
+    async def _call(self, name, arguments):
+        result = await self._session.call_tool(name, arguments)
+        if getattr(result, "structuredContent", None):
+            return result.structuredContent.get("result", result.structuredContent)
+        return json.loads(result.content[0].text)
+
+    async def list_required_credentials(self):
+        return await self._call("list_required_credentials", {})
+
+    async def submit_credential(self, presentation, nonce):
+        return await self._call(
+            "submit_credential",
+            {"format": "sd-jwt", "presentation": presentation, "nonce": nonce},
+        )
+
+
+@contextlib.asynccontextmanager
+async def _line_streams(stream):
+    """
+    Adapts a byte stream carrying one JSON-RPC message per line (as the MCP
+    stdio transport does) to the read and write streams of an MCP session.
+    """
+    import anyio
+    import mcp.types as types
+    from anyio.streams.buffered import BufferedByteReceiveStream
+    from mcp.shared.message import SessionMessage
+
+    read_writer, read_stream = anyio.create_memory_object_stream(0)
+    write_stream, write_reader = anyio.create_memory_object_stream(0)
+    buffered = BufferedByteReceiveStream(stream)
+
+    async def receive():
+        async with read_writer:
+            while True:
+                try:
+                    line = await buffered.receive_until(b"\n", 16 * 1024 * 1024)
+                except (
+                    anyio.EndOfStream,
+                    anyio.IncompleteRead,
+                    anyio.BrokenResourceError,
+                    anyio.ClosedResourceError,
+                ):
+                    return
+                try:
+                    message = types.JSONRPCMessage.model_validate_json(line)
+                except Exception as e:
+                    await read_writer.send(e)
+                    continue
+                await read_writer.send(SessionMessage(message))
+
+    async def send():
+        async with write_reader:
+            async for session_message in write_reader:
+                line = session_message.message.model_dump_json(
+                    by_alias=True, exclude_none=True
+                )
+                await stream.send(line.encode() + b"\n")
+
+    async with anyio.create_task_group() as task_group:
+        task_group.start_soon(receive)
+        task_group.start_soon(send)
+        try:
+            yield read_stream, write_stream
+        finally:
+            task_group.cancel_scope.cancel()
+
+
+def serve_loopback():
+    """Child process of the loopback transport: serves MCP sessions on 127.0.0.1."""
+    import anyio
+    from anyio.abc import SocketAttribute
+
+    from src.credential_checking_server.server import ServerConfig, create_app
+
+    app = create_app(ServerConfig.from_env())
+    app.start()
+    server = app.mcp._mcp_server
+
+    async def handle(stream):
+        async with stream, _line_streams(stream) as (read_stream, write_stream):
+            await server.run(
+                read_stream, write_stream, server.create_initialization_options()
+            )
+
+    async def main():
+        listener = await anyio.create_tcp_listener(local_host="127.0.0.1")
+        port = listener.extra(SocketAttribute.local_port)
+        print(f"PORT {port}", flush=True)
+        await listener.serve(handle)
+
+    try:
+        anyio.run(main)
+    finally:
+        app.close()
+
+
+class _Server:
+    """The server under test, its process id and how agents connect to it."""
+
+    def __init__(self, transport, registry_path):
+        self.transport = transport
+        self._app = None
+        self._process = None
+        env = {**os.environ, "TMCP_TRUST_REGISTRY": registry_path}
+        if transport == "loopback":
+            self._process = subprocess.Popen(
+                [sys.executable, __file__, "--serve"],
+                cwd=ROOT,
+                env=env,
+                stdout=subprocess.PIPE,
+                text=True,
+            )
+            # The server may log to stdout before it reports its port
+            for line in self._process.stdout:
+                if line.startswith("PORT "):
+                    self._port = int(line.split()[1])
+                    break
+            else:
+                raise RuntimeError("Loopback server exited before listening")
+            self.pid = self._process.pid
+        else:
+            from src.credential_checking_server.server import ServerConfig, create_app
+
+            os.environ["TMCP_TRUST_REGISTRY"] = registry_path
+            self._app = create_app(ServerConfig.from_env())
+            self._app.start()
+            self.pid = os.getpid()
+
+    @contextlib.asynccontextmanager
+    async def connect(self):
+        if self.transport == "direct":
+            yield _DirectClient(self._app)
+        elif self.transport == "in-process":
+            from mcp.shared.memory import create_connected_server_and_client_session
+
+            async with create_connected_server_and_client_session(
+                self._app.mcp._mcp_server
+            ) as session:
+                yield _McpClient(session)
+        else:
+            import anyio
+            from mcp.client.session import ClientSession
+
+            stream = await anyio.connect_tcp("127.0.0.1", self._port)
+            async with (
+                stream,
+                _line_streams(stream) as (read_stream, write_stream),
+                ClientSession(read_stream, write_stream) as session,
+            ):
+                await session.initialize()
+                yield _McpClient(session)
+
+    def close(self):
+        if self._app is not None:
+            self._app.close()
+        if self._process is not None:
+            self._process.terminate()
+            self._process.wait()
+
+
+def _percentile(samples, fraction):
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))] * 1000
+
+
+async def _agent(server, builder, deadline, invalid_ratio, rng, level):
+    async with server.connect() as client:
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            try:
+                requirements = await client.list_required_credentials()
+                listed = time.perf_counter()
+                nonce = requirements["presentation_definition"]["nonce"]
+                aud = requirements["verifier"]["did"]
+                if rng.random() < invalid_ratio:
+                    # Rejected after the nonce is used: exercises failure handling
+                    aud = "did:webvh:another-verifier.example.com"
+                presentation = builder.present(DISCLOSED_CLAIMS, nonce, aud)
+                submit_start = time.perf_counter()
+                response = await client.submit_credential(presentation, nonce)
+                end = time.perf_counter()
+            except Exception as e:
+                level["codes"][f"CLIENT_{type(e).__name__}"] += 1
+                continue
+            level["list"].append(listed - start)
+            level["submit"].append(end - submit_start)
+            level["flow"].append(end - start)
+            if response.get("status") == "success":
+                level["codes"]["OK"] += 1
+            else:
+                level["codes"][response.get("error", {}).get("code", "UNKNOWN")] += 1
+
+
+async def _sample_rss(pid, started, interval, samples):
+    while True:
+        rss = rss_bytes(pid)
+        if rss is not None:
+            samples.append((round(time.monotonic() - started, 3), rss))
+        await asyncio.sleep(interval)
+
+
+async def run_level(server, builders, concurrency, duration, invalid_ratio, seed):
+    level = {
+        "list": [],
+        "submit": [],
+        "flow": [],
+        "codes": collections.Counter(),
+        "rss": [],
+    }
+    started = time.monotonic()
+    sampler = asyncio.create_task(
+        _sample_rss(server.pid, started, max(0.1, duration / 100), level["rss"])
+    )
+    deadline = started + duration
+    await asyncio.gather(
+        *(
+            _agent(
+                server,
+                builders[i % len(builders)],
+                deadline,
+                invalid_ratio,
+                random.Random(seed + i),
+                level,
+            )
+            for i in range(concurrency)
+        )
+    )
+    elapsed = time.monotonic() - started
+    sampler.cancel()
+    rss = rss_bytes(server.pid)
+    if rss is not None:
+        level["rss"].append((round(elapsed, 3), rss))
+
+    result = {
+        "name": "list_and_submit",
+        "params": {"transport": server.transport, "concurrency": concurrency},
+        "duration_seconds": elapsed,
+        "flows": len(level["flow"]),
+        "ops_per_sec": len(level["flow"]) / elapsed,
+        "errors": dict(level["codes"]),
+        "rss_samples": level["rss"],
+    }
+    for stage in ("flow", "list", "submit"):
+        samples = sorted(level[stage])
+        if samples:
+            result[f"{stage}_p50_ms"] = statistics.median(samples) * 1000
+            result[f"{stage}_p90_ms"] = _percentile(samples, 0.90)
+            result[f"{stage}_p99_ms"] = _percentile(samples, 0.99)
+    if len(level["rss"]) >= 2:
+        times, values = zip(*level["rss"])
+        result["rss_start_bytes"] = values[0]
+        result["rss_end_bytes"] = values[-1]
+        result["rss_peak_bytes"] = max(values)
+        # Least-squares slope; steady growth over a long run points to a leak
+        result["rss_growth_bytes_per_min"] = (
+            statistics.linear_regression(times, values).slope * 60
+            if len(set(times)) > 1
+            else 0.0
+        )
+    return result
+
+
+def print_level(result):
+    mib = 1024 * 1024
+    errors = ", ".join(f"{code}={n}" for code, n in sorted(result["errors"].items()))
+    print(
+        f"concurrency {result['params']['concurrency']:<5} "
+        f"{result['flows']:>7} flows  {result['ops_per_sec']:>8.1f} flows/s  "
+        f"flow p50 {result.get('flow_p50_ms', 0):>7.2f} "
+        f"p90 {result.get('flow_p90_ms', 0):>7.2f} "
+        f"p99 {result.get('flow_p99_ms', 0):>7.2f} ms  "
+        f"submit p99 {result.get('submit_p99_ms', 0):>7.2f} ms"
+    )
+    if "rss_start_bytes" in result:
+        print(
+            f"{'':<19}rss {result['rss_start_bytes'] / mib:.1f} -> "
+            f"{result['rss_end_bytes'] / mib:.1f} MiB "
+            f"(peak {result['rss_peak_bytes'] / mib:.1f}, "
+            f"{result['rss_growth_bytes_per_min'] / mib:+.2f} MiB/min)  {errors}"
+        )
+    else:
+        print(f"{'':<19}{errors}")
+
+
+async def run(args):
+    workdir = tempfile.mkdtemp(prefix="tmcp-load-")
+    print(f"Minting credentials for {args.holders} holders...")
+    registry_path, builders = mint_corpus(workdir, args.holders)
+    server = _Server(args.transport, registry_path)
+    results = []
+    try:
+        print(f"* list_required_credentials -> submit_credential ({args.transport})")
+        for concurrency in args.concurrency:
+            result = await run_level(
+                server,
+                builders,
+                concurrency,
+                args.duration,
+                args.invalid_ratio,
+                args.seed,
+            )
+            print_level(result)
+            results.append(result)
+            if not result["errors"].get("OK") and args.invalid_ratio < 1:
+                raise RuntimeError(
+                    f"No flow succeeded at concurrency {concurrency}: "
+                    f"{result['errors']}"
+                )
+    finally:
+        server.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--transport",
+        choices=("in-process", "loopback", "direct"),
+        default="in-process",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=lambda value: [int(level) for level in value.split(",")],
+        default=[1, 4, 16, 64],
+        help="Comma-separated numbers of concurrent agents, one level each",
+    )
+    parser.add_argument(
+        "--duration", type=float, default=10.0, help="Seconds per concurrency level"
+    )
+    parser.add_argument(
+        "--holders", type=int, default=64, help="Distinct holder credentials"
+    )
+    parser.add_argument(
+        "--invalid-ratio",
+        type=float,
+        default=0.0,
+        help="Fraction of presentations made for the wrong audience",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="Write machine-readable results to this file")
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve_loopback()
+        return
+
+    results = asyncio.run(run(args))
+    if args.json:
+        write_report(args.json, "load", results)
+
+
+if __name__ == "__main__":
+    main()
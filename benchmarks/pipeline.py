@@ -0,0 +1,265 @@
+"""
+Benchmark the SD-JWT issue/present/verify pipeline and the `submit_credential` tool.
+
+Usage: uv run benchmarks/pipeline.py [--suite handler|server|all] [--iterations N] [--json PATH]
+
+The handler suite sweeps claim counts, disclosure counts, nesting depth and
+issuer key types. The server suite drives `list_required_credentials` and
+`submit_credential` through an in-process MCP client session.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from harness import measure, measure_async, print_result, write_report
+
+from credential_handler import SdJwtHandler, SdJwtPresentationBuilder, generate_key
+from jwcrypto.jwk import JWK
+from sd_jwt.common import SDObj
+from sd_jwt.holder import SDJWTHolder
+
+# The server is imported as `src.credential_checking_server`
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+ISSUER_DID = "did:webvh:issuer.example.com"
+HOLDER_DID = "did:webvh:holder.example.com"
+VERIFIER_DID = "did:webvh:verifier.example.com"
+NONCE = "bench_nonce"
+
+# (claims per level, disclosed claims per level, nesting depth, issuer key type)
+HANDLER_SCENARIOS = [
+    (4, 4, 0, "P-256"),
+    (16, 16, 0, "P-256"),
+    (64, 64, 0, "P-256"),
+    (32, 0, 0, "P-256"),
+    (32, 8, 0, "P-256"),
+    (32, 32, 0, "P-256"),
+    (4, 4, 1, "P-256"),
+    (4, 4, 3, "P-256"),
+    (4, 4, 5, "P-256"),
+    (8, 8, 0, "P-384"),
+    (8, 8, 0, "P-521"),
+    (8, 8, 0, "Ed25519"),
+]
+
+
+def build_claims(claim_count, depth, issuer_did=ISSUER_DID, holder_did=HOLDER_DID):
+    """Builds user claims with `claim_count` selectively disclosable claims per nesting level."""
+
+    def level(remaining_depth):
+        claims = {SDObj(f"claim_{i}"): f"value_{i}" for i in range(claim_count)}
+        if remaining_depth:
+            claims[SDObj("nested")] = level(remaining_depth - 1)
+        return claims
+
+    now = int(time.time())
+    return {
+        "iss": issuer_did,
+        "sub": holder_did,
+        "iat": now,
+        "exp": now + 3600,
+        "cnf": {"kid": holder_did},
+        **level(depth),
+    }
+
+
+def build_disclosure(disclosed_count, depth):
+    """Builds the `disclosed_claims` selection matching `build_claims`."""
+    disclosed = {f"claim_{i}": True for i in range(disclosed_count)}
+    if depth:
+        disclosed["nested"] = build_disclosure(disclosed_count, depth - 1)
+    return disclosed
+
+
+def _holder_presentation(credential, disclosed_claims, holder_key, options):
+    """Creates a presentation without the handler's builder cache, parsing the credential each time."""
+    holder = SDJWTHolder(credential)
+    holder.create_presentation(
+        disclosed_claims, options["nonce"], options["aud"], holder_key
+    )
+    return holder.sd_jwt_presentation
+
+
+def run_handler_suite(iterations):
+    handler = SdJwtHandler()
+    holder_key = JWK.generate(kty="EC", crv="P-256")
+    results = []
+
+    for claim_count, disclosed_count, depth, key_type in HANDLER_SCENARIOS:
+        params = {
+            "claims": claim_count,
+            "disclosed": disclosed_count,
+            "depth": depth,
+            "key": key_type,
+        }
+        issuer_key = generate_key(key_type)
+        issuer_public_key = JWK.from_json(issuer_key.export_public())
+        claims = build_claims(claim_count, depth)
+        disclosed_claims = build_disclosure(disclosed_count, depth)
+        options = {"nonce": NONCE, "aud": VERIFIER_DID}
+
+        credential = handler.issue_credential(claims, issuer_key, holder_key)
+        presentation = handler.create_presentation(
+            credential, disclosed_claims, holder_key, options
+        )
+        builder = SdJwtPresentationBuilder(credential, holder_key)
+
+        def get_issuer_key(issuer, header_parameters):
+            return issuer_public_key
+
+        for name, fn in (
+            (
+                "issue_credential",
+                lambda: handler.issue_credential(claims, issuer_key, holder_key),
+            ),
+            (
+                "create_presentation",
+                lambda: handler.create_presentation(
+                    credential, disclosed_claims, holder_key, options
+                ),
+            ),
+            (
+                "SDJWTHolder.create_presentation",
+                lambda: _holder_presentation(
+                    credential, disclosed_claims, holder_key, options
+                ),
+            ),
+            (
+                "builder.present",
+                lambda: builder.present(
+                    disclosed_claims, options["nonce"], options["aud"]
+                ),
+            ),
+            (
+                "verify_presentation",
+                lambda: handler.verify_presentation(
+                    presentation, get_issuer_key, options
+                ),
+            ),
+        ):
+            result = measure(name, fn, iterations=iterations, params=params)
+            print_result(result)
+            results.append(result)
+
+    return results
+
+
+def _tool_json(result):
+    if getattr(result, "structuredContent", None):
+        return result.structuredContent.get("result", result.structuredContent)
+    return json.loads(result.content[0].text)
+
+
+async def _run_server_suite(iterations):
+    from mcp.shared.memory import create_connected_server_and_client_session
+
+    handler = SdJwtHandler()
+    keys = handler.generate_keys()
+    workdir = tempfile.mkdtemp(prefix="tmcp-bench-")
+    registry_path = os.path.join(workdir, "issuer_public_key.json")
+    with open(registry_path, "w") as f:
+        json.dump(
+            {
+                "issuer_did": ISSUER_DID,
+                "public_key": json.loads(keys["issuer_public_key"].export()),
+            },
+            f,
+        )
+
+    from src.credential_checking_server.server import ServerConfig, create_app
+
+    app = create_app(ServerConfig(trust_registry_path=registry_path))
+
+    # An identity credential meeting the server's default requirements policy
+    claims = {
+        **build_claims(4, 0),
+        "vct": "IdentityCredential",
+        SDObj("given_name"): "Jon",
+        SDObj("family_name"): "Doe",
+    }
+    credential = handler.issue_credential(
+        claims, keys["issuer_key"], keys["holder_key"]
+    )
+    disclosed_claims = {
+        **build_disclosure(2, 0),
+        "given_name": True,
+        "family_name": True,
+    }
+    aud = app.did
+
+    # Nonces and presentations are minted up front so only the tool call is timed
+    submissions = []
+    for _ in range(iterations + 40):
+        nonce, _ = app.nonce_store.issue()
+        presentation = handler.create_presentation(
+            credential,
+            disclosed_claims,
+            keys["holder_key"],
+            {"nonce": nonce, "aud": aud},
+        )
+        submissions.append((presentation, nonce))
+
+    results = []
+    async with create_connected_server_and_client_session(
+        app.mcp._mcp_server
+    ) as client:
+
+        async def list_requirements():
+            _tool_json(await client.call_tool("list_required_credentials", {}))
+
+        async def submit():
+            presentation, nonce = submissions.pop()
+            response = _tool_json(
+                await client.call_tool(
+                    "submit_credential",
+                    {"format": "sd-jwt", "presentation": presentation, "nonce": nonce},
+                )
+            )
+            if response["status"] != "success":
+                raise RuntimeError(f"submit_credential failed: {response['error']}")
+
+        for name, fn in (
+            ("list_required_credentials", list_requirements),
+            ("submit_credential", submit),
+        ):
+            result = await measure_async(
+                name, fn, iterations=iterations, params={"transport": "in-process"}
+            )
+            print_result(result)
+            results.append(result)
+
+    app.close()
+    return results
+
+
+def run_server_suite(iterations):
+    return asyncio.run(_run_server_suite(iterations))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--suite", choices=("handler", "server", "all"), default="all")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--json", help="Write machine-readable results to this file")
+    args = parser.parse_args()
+
+    results = []
+    if args.suite in ("handler", "all"):
+        print("* SdJwtHandler pipeline")
+        results += run_handler_suite(args.iterations)
+    if args.suite in ("server", "all"):
+        print("\n* submit_credential tool (in-process MCP client)")
+        results += run_server_suite(args.iterations)
+
+    if args.json:
+        write_report(args.json, "pipeline", results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""
+Benchmark credential checking server startup.
+
+Usage: uv run benchmarks/startup.py [--runs N] [--warm-up] [--json PATH]
+
+Each run starts a fresh interpreter and reports the time to import the
+server module, build the app with `create_app`, warm it up (with --warm-up)
+and verify the first presentation.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from harness import write_report
+
+ROOT = Path(__file__).parent.parent
+
+# Runs in a fresh interpreter so module imports are measured cold
+CHILD = """
+import json, sys, time
+
+start = time.perf_counter()
+from src.credential_checking_server.server import ServerConfig, create_app
+import_seconds = time.perf_counter() - start
+
+registry_path, credential_path, warm_up = sys.argv[1], sys.argv[2], sys.argv[3] == "1"
+start = time.perf_counter()
+app = create_app(ServerConfig(trust_registry_path=registry_path, warm_up=warm_up))
+create_app_seconds = time.perf_counter() - start
+
+with open(credential_path) as f:
+    credential = json.load(f)
+from credential_handler import SdJwtHandler
+from jwcrypto.jwk import JWK
+
+nonce, _ = app.nonce_store.issue()
+presentation = SdJwtHandler().create_presentation(
+    credential["credential"],
+    {"given_name": True},
+    JWK.from_json(credential["holder_key"]),
+    {"nonce": nonce, "aud": app.did},
+)
+
+import asyncio
+
+start = time.perf_counter()
+response = asyncio.run(app.submit_credential("sd-jwt", presentation, nonce))
+first_verify_seconds = time.perf_counter() - start
+app.close()
+
+print(json.dumps({
+    "import": import_seconds,
+    "create_app": create_app_seconds,
+    "first_verification": first_verify_seconds,
+    "status": response["status"],
+    "error": response.get("error"),
+    **{f"phase_{phase}": seconds for phase, seconds in app.startup_timings.items()},
+}))
+"""
+
+
+def write_fixtures(workdir):
+    """Writes a trust registry and an issued credential for the child processes."""
+    sys.path.insert(0, str(ROOT))
+    from benchmarks.pipeline import HOLDER_DID, ISSUER_DID, build_claims
+    from credential_handler import SdJwtHandler
+
+    handler = SdJwtHandler()
+    keys = handler.generate_keys()
+    registry_path = os.path.join(workdir, "issuer_public_key.json")
+    with open(registry_path, "w") as f:
+        json.dump(
+            {
+                "issuer_did": ISSUER_DID,
+                "public_key": json.loads(keys["issuer_public_key"].export()),
+            },
+            f,
+        )
+
+    # An identity credential meeting the server's default requirements policy
+    claims = build_claims(4, 0, ISSUER_DID, HOLDER_DID)
+    claims["vct"] = "IdentityCredential"
+    claims["given_name"] = "Bench"
+    claims["family_name"] = "Mark"
+    credential_path = os.path.join(workdir, "credential.json")
+    with open(credential_path, "w") as f:
+        json.dump(
+            {
+                "credential": handler.issue_credential(
+                    claims, keys["issuer_key"], keys["holder_key"]
+                ),
+                "holder_key": keys["holder_key"].export(private_key=True),
+            },
+            f,
+        )
+    return registry_path, credential_path
+
+
+def run_once(registry_path, credential_path, warm_up):
+    completed = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            CHILD,
+            registry_path,
+            credential_path,
+            "1" if warm_up else "0",
+        ],
+        cwd=ROOT,
+        env={
+            **os.environ,
+            "PYTHONPATH": os.pathsep.join(
+                filter(None, [str(ROOT / "src"), os.environ.get("PYTHONPATH")])
+            ),
+        },
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument(
+        "--warm-up", action="store_true", help="Build the app with warm_up=True"
+    )
+    parser.add_argument("--json", help="Write machine-readable results to this file")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="tmcp-bench-")
+    registry_path, credential_path = write_fixtures(workdir)
+
+    runs = []
+    for _ in range(args.runs):
+        start = time.perf_counter()
+        run = run_once(registry_path, credential_path, args.warm_up)
+        run["process"] = time.perf_counter() - start
+        error = run.pop("error")
+        if run.pop("status") != "success":
+            raise RuntimeError(f"First verification failed: {error}")
+        runs.append(run)
+
+    results = []
+    for phase in runs[0]:
+        samples = sorted(run[phase] for run in runs)
+        result = {
+            "name": phase,
+            "params": {"warm_up": args.warm_up},
+            "runs": len(samples),
+            "p50_ms": statistics.median(samples) * 1000,
+            "max_ms": samples[-1] * 1000,
+        }
+        print(
+            f"{phase:<28} warm_up={args.warm_up!s:<6} "
+            f"p50 {result['p50_ms']:>8.1f} ms  max {result['max_ms']:>8.1f} ms"
+        )
+        results.append(result)
+
+    if args.json:
+        write_report(args.json, "startup", results)
+
+
+if __name__ == "__main__":
+    main()
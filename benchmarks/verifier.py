@@ -0,0 +1,107 @@
+"""
+Compare the fast SD-JWT verifier with the reference verifier.
+
+Usage: uv run benchmarks/verifier.py [--iterations N] [--json PATH]
+
+Runs `verify_presentation` with `SdJwtHandler(verifier="reference")` and
+`SdJwtHandler(verifier="fast")` over the handler scenarios of the pipeline
+benchmark and prints the speedup per scenario. Before timing, each scenario
+checks that both verifiers return the same claims, and that both reject a
+tampered presentation.
+"""
+
+import argparse
+
+from harness import measure, print_result, write_report
+from pipeline import (
+    HANDLER_SCENARIOS,
+    NONCE,
+    VERIFIER_DID,
+    build_claims,
+    build_disclosure,
+)
+
+from credential_handler import SdJwtHandler, error_code, generate_key
+from jwcrypto.jwk import JWK
+
+
+def _outcome(handler, presentation, get_issuer_key, options):
+    try:
+        return handler.verify_presentation(presentation, get_issuer_key, options)
+    except Exception as e:
+        return error_code(e)
+
+
+def run(iterations):
+    reference = SdJwtHandler(verifier="reference")
+    fast = SdJwtHandler(verifier="fast")
+    holder_key = JWK.generate(kty="EC", crv="P-256")
+    options = {"nonce": NONCE, "aud": VERIFIER_DID}
+    results = []
+
+    for claim_count, disclosed_count, depth, key_type in HANDLER_SCENARIOS:
+        issuer_key = generate_key(key_type)
+        issuer_public_key = JWK.from_json(issuer_key.export_public())
+        credential = reference.issue_credential(
+            build_claims(claim_count, depth), issuer_key, holder_key
+        )
+        presentation = reference.create_presentation(
+            credential, build_disclosure(disclosed_count, depth), holder_key, options
+        )
+        # A disclosure is dropped, so the key binding JWT's sd_hash no longer matches
+        segments = presentation.split("~")
+        tampered = "~".join(segments[:1] + segments[2:])
+
+        def get_issuer_key(issuer, header_parameters):
+            return issuer_public_key
+
+        for candidate in (presentation, tampered):
+            expected = _outcome(reference, candidate, get_issuer_key, options)
+            actual = _outcome(fast, candidate, get_issuer_key, options)
+            if expected != actual:
+                raise RuntimeError(
+                    f"Verifiers disagree on scenario {claim_count}/{disclosed_count}/"
+                    f"{depth}/{key_type}: {expected!r} != {actual!r}"
+                )
+
+        scenario = []
+        for handler in (reference, fast):
+            result = measure(
+                "verify_presentation",
+                lambda: handler.verify_presentation(
+                    presentation, get_issuer_key, options
+                ),
+                iterations=iterations,
+                params={
+                    "verifier": handler.verifier,
+                    "claims": claim_count,
+                    "disclosed": disclosed_count,
+                    "depth": depth,
+                    "key": key_type,
+                },
+            )
+            print_result(result)
+            scenario.append(result)
+        speedup = scenario[1]["ops_per_sec"] / scenario[0]["ops_per_sec"]
+        scenario[1]["params"]["speedup"] = round(speedup, 2)
+        print(f"{'':<28} speedup {speedup:.2f}x\n")
+        results += scenario
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--json", help="Write machine-readable results to this file")
+    args = parser.parse_args()
+
+    print("* verify_presentation, reference vs fast verifier")
+    results = run(args.iterations)
+
+    if args.json:
+        write_report(args.json, "verifier", results)
+
+
+if __name__ == "__main__":
+    main()
@@ -43,6 +43,7 @@ def generate_credential(server_did: str, issuer_did: str, holder_did: str):
         "iat": int(time.time()),
         "exp": int(time.time()) + 3600,
         "cnf": {"kid": holder_did},
+        "vct": "IdentityCredential",
         # These will be selectively disclosable
         "given_name": "Jon",
         "family_name": "Doe",
@@ -63,6 +64,7 @@ def generate_credential(server_did: str, issuer_did: str, holder_did: str):
         "iat": int(time.time()),
         "exp": int(time.time()) + 3600,
         "cnf": {"kid": holder_did},
+        "vct": "IdentityCredential",
         SDObj("given_name"): "Jon",
         SDObj("family_name"): "Doe",
         SDObj("email"): "jondoe@mail.com",
@@ -106,7 +108,7 @@ def generate_credential(server_did: str, issuer_did: str, holder_did: str):
 
     print("\n" + "=" * 60)
     print("Next steps:")
-    print("1. Restart the TMCP server to load the new issuer public key")
+    print("1. Wait for the TMCP server to reload the new issuer public key")
     print(
         "2. Connect with fast-agent and run the `list_required_credential` tool and update the nonce in test_presentation.txt"
     )
@@ -0,0 +1,189 @@
+"""
+Issue SD-JWT credentials in bulk from a JSONL file of claim sets.
+Usage: uv run examples/issue_credentials.py <claims.jsonl> <credentials.jsonl> --issuer-did <did> [options]
+
+Each input line is either a claims object, or an object with:
+- "claims": the claims object
+- "disclosable": names of the selectively disclosable top-level claims
+  (default: every claim except iss, sub, iat, exp, nbf, cnf and vct)
+- "holder_key": the holder's public JWK to bind the credential to
+
+Each output line is {"sub": ..., "credential": ...}, in input order, plus
+"holder_key" (the private JWK) when --generate-holder-keys is given.
+Use "-" to read from stdin or write to stdout.
+"""
+
+import argparse
+import itertools
+import json
+import os
+import sys
+import time
+from collections import deque
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from credential_handler import KEY_TYPES, CredentialHandler, SdJwtHandler, generate_key
+from jwcrypto.jwk import JWK
+from sd_jwt.common import SDObj
+
+# Claims that are always disclosed
+NON_DISCLOSABLE_CLAIMS = {"iss", "sub", "iat", "exp", "nbf", "cnf", "vct"}
+
+
+def read_claim_sets(lines, issuer_did, ttl, generate_holder_keys):
+    """
+    Parses JSONL claim sets lazily into (user_claims, holder_key, generated)
+    tuples, where `generated` tells whether the holder key was generated here.
+    """
+    for line_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            entry = json.loads(line)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Line {line_number}: invalid JSON: {e}") from e
+
+        claims = entry.get("claims", entry)
+        disclosable = entry.get("disclosable")
+        if disclosable is None:
+            disclosable = [
+                name for name in claims if name not in NON_DISCLOSABLE_CLAIMS
+            ]
+
+        now = int(time.time())
+        user_claims = {"iss": issuer_did, "iat": now, "exp": now + ttl}
+        for name, value in claims.items():
+            user_claims[SDObj(name) if name in disclosable else name] = value
+
+        holder_key = None
+        if "holder_key" in entry:
+            holder_key = JWK(**entry["holder_key"])
+        elif generate_holder_keys:
+            holder_key = generate_key("P-256")
+
+        yield (
+            user_claims,
+            holder_key,
+            holder_key is not None and "holder_key" not in entry,
+        )
+
+
+def load_issuer_key(path, key_type="P-256"):
+    """Loads the issuer's private JWK, generating and saving a key of `key_type` if the file does not exist."""
+    if os.path.exists(path):
+        with open(path) as f:
+            return JWK.from_json(f.read())
+    issuer_key = generate_key(key_type)
+    with open(path, "w") as f:
+        f.write(issuer_key.export())
+    print(f"Generated issuer key in {path}", file=sys.stderr)
+    return issuer_key
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("input", help="JSONL claim sets, or - for stdin")
+    parser.add_argument("output", help="JSONL credentials, or - for stdout")
+    parser.add_argument("--issuer-did", required=True)
+    parser.add_argument(
+        "--issuer-key",
+        default="issuer_key.json",
+        help="Issuer private JWK; generated if the file does not exist",
+    )
+    parser.add_argument(
+        "--key-type",
+        choices=list(KEY_TYPES),
+        default="P-256",
+        help="Type of a newly generated issuer key",
+    )
+    parser.add_argument(
+        "--registry",
+        help="Also write the issuer's public key to this trust registry file "
+        "(e.g. issuer_public_key.json)",
+    )
+    parser.add_argument(
+        "--ttl", type=int, default=3600, help="Seconds until credentials expire"
+    )
+    parser.add_argument(
+        "--generate-holder-keys",
+        action="store_true",
+        help="Generate a holder key for claim sets without one",
+    )
+    parser.add_argument(
+        "--workers", type=int, default=None, help="Signing processes (default: cores)"
+    )
+    parser.add_argument("--chunk-size", type=int, default=64)
+    args = parser.parse_args()
+
+    issuer_key = load_issuer_key(args.issuer_key, args.key_type)
+    if args.registry:
+        with open(args.registry, "w") as f:
+            json.dump(
+                {
+                    "issuer_did": args.issuer_did,
+                    "public_key": json.loads(issuer_key.export_public()),
+                },
+                f,
+                indent=2,
+            )
+        print(f"Saved issuer public key to {args.registry}", file=sys.stderr)
+
+    handler = CredentialHandler()
+    handler.register_handler(SdJwtHandler())
+
+    source = sys.stdin if args.input == "-" else open(args.input)
+    sink = sys.stdout if args.output == "-" else open(args.output, "w")
+
+    # Subjects and generated holder keys wait here until their credential is
+    # written; at most a few chunks per worker are in flight.
+    pending = deque()
+
+    def claim_sets():
+        for user_claims, holder_key, generated in read_claim_sets(
+            source, args.issuer_did, args.ttl, args.generate_holder_keys
+        ):
+            pending.append((user_claims.get("sub"), holder_key if generated else None))
+            yield user_claims, holder_key
+
+    # zip() in issue_many pulls claims and holder keys alternately, so tee
+    # only ever buffers one entry
+    claims_entries, holder_key_entries = itertools.tee(claim_sets())
+
+    start = time.perf_counter()
+    count = 0
+    try:
+        for credential in handler.issue_many(
+            "sd-jwt",
+            (user_claims for user_claims, _ in claims_entries),
+            issuer_key,
+            (holder_key for _, holder_key in holder_key_entries),
+            max_workers=args.workers,
+            chunk_size=args.chunk_size,
+        ):
+            sub, generated_key = pending.popleft()
+            line = {"sub": sub, "credential": credential}
+            if generated_key is not None:
+                line["holder_key"] = json.loads(generated_key.export())
+            sink.write(json.dumps(line) + "\n")
+            count += 1
+            if count % 10_000 == 0:
+                elapsed = time.perf_counter() - start
+                print(f"{count} credentials ({count / elapsed:.0f}/s)", file=sys.stderr)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if sink is not sys.stdout:
+            sink.close()
+
+    elapsed = time.perf_counter() - start
+    print(
+        f"Issued {count} credentials in {elapsed:.1f}s "
+        f"({count / elapsed if elapsed else 0:.0f}/s)",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main()
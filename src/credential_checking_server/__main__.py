@@ -1,12 +1,45 @@
-from .server import mcp
+import logging
+import os
+
+from .server import ServerConfig, create_app
 
 
 def main():
     """
     Initialize and run the server
     """
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    config = ServerConfig.from_env()
+    if not os.path.exists(config.trust_registry_path):
+        print(
+            f"Error: {config.trust_registry_path} not found. "
+            "Run examples/generate_test_credential.py first."
+        )
+        exit(1)
+
+    if config.workers > 1:
+        from .supervisor import Supervisor
+
+        print(
+            f"Starting TMCP Credential Checking Server with {config.workers} workers..."
+        )
+        Supervisor(config).run()
+        return
+
+    app = create_app(config)
+    print(
+        f"Verifying Server loaded {len(app.trust_registry.snapshot.issuers)} "
+        "trusted issuer(s)."
+    )
+    print(
+        "Startup: "
+        + ", ".join(
+            f"{phase} {seconds * 1000:.1f} ms"
+            for phase, seconds in app.startup_timings.items()
+        )
+    )
     print("Starting TMCP Credential Checking Server...")
-    mcp.run(transport="streamable-http")
+    app.run()
 
 
 if __name__ == "__main__":
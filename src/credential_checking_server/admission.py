@@ -0,0 +1,155 @@
+import asyncio
+import contextlib
+import time
+from collections import OrderedDict
+
+from ..credential_handler.errors import OverloadedError
+
+
+class _ClientState:
+    __slots__ = ("tokens", "updated", "running")
+
+    def __init__(self, tokens, now):
+        self.tokens = tokens
+        self.updated = now
+        self.running = 0
+
+
+class AdmissionController:
+    """
+    Bounds verification work so that overload fails fast instead of slowing
+    every client down.
+
+    - At most `max_concurrent` verifications run at once; up to `max_queued`
+      more wait, each for at most `queue_timeout` seconds.
+    - Each client (session DID) may run `client_max_concurrent` verifications
+      at once and start `client_rate` per second, with bursts of `client_burst`
+      (token bucket). A `client_rate` of 0 disables rate limiting.
+
+    Requests over a limit raise OverloadedError. A batch is admitted as one
+    request costing one rate token per presentation; it takes one slot per
+    presentation, but never more than `client_max_concurrent`.
+    """
+
+    def __init__(
+        self,
+        max_concurrent,
+        max_queued=256,
+        queue_timeout=2.0,
+        client_max_concurrent=4,
+        client_rate=0.0,
+        client_burst=10,
+        max_clients=100_000,
+        metrics=None,
+    ):
+        self.max_concurrent = max_concurrent
+        self.max_queued = max_queued
+        self.queue_timeout = queue_timeout
+        self.client_max_concurrent = client_max_concurrent
+        self.client_rate = client_rate
+        self.client_burst = client_burst
+        self.max_clients = max_clients
+        self.metrics = metrics
+        self.running = 0
+        self.queued = 0
+        self._clients = OrderedDict()
+        self._condition = None
+        self._loop = None
+
+    def _client(self, client, now):
+        state = self._clients.get(client)
+        if state is None:
+            state = self._clients[client] = _ClientState(self.client_burst, now)
+            # Idle clients are forgotten first; a forgotten client starts with a full bucket
+            while len(self._clients) > self.max_clients:
+                oldest, oldest_state = next(iter(self._clients.items()))
+                if oldest_state.running:
+                    break
+                del self._clients[oldest]
+        else:
+            self._clients.move_to_end(client)
+        return state
+
+    def _admit_client(self, client, slots, cost):
+        now = time.monotonic()
+        state = self._client(client, now)
+        if state.running + slots > self.client_max_concurrent:
+            raise OverloadedError(
+                f"Too many concurrent verifications for client '{client}'",
+                reason="client_concurrency",
+            )
+        if self.client_rate > 0:
+            state.tokens = min(
+                max(self.client_burst, cost),
+                state.tokens + (now - state.updated) * self.client_rate,
+            )
+            state.updated = now
+            if state.tokens < cost:
+                raise OverloadedError(
+                    f"Rate limit exceeded for client '{client}'",
+                    reason="client_rate",
+                    retry_after=round((cost - state.tokens) / self.client_rate, 3),
+                )
+        return state
+
+    @contextlib.asynccontextmanager
+    async def admit(self, client=None, cost=1):
+        """Waits for a verification slot for `client`, or raises OverloadedError."""
+        cost = max(1, cost)
+        slots = min(cost, self.max_concurrent)
+        if client is not None:
+            slots = min(slots, self.client_max_concurrent)
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._condition = asyncio.Condition()
+            self._loop = loop
+        condition = self._condition
+
+        state = self._admit_client(client, slots, cost) if client is not None else None
+        if self.running + slots > self.max_concurrent:
+            if self.queued + slots > self.max_queued:
+                raise OverloadedError(
+                    "Verification queue is full",
+                    reason="queue_full",
+                    retry_after=self.queue_timeout,
+                )
+
+        # Rate tokens are only spent by requests that get into the queue
+        start = time.perf_counter()
+        if state is not None:
+            if self.client_rate > 0:
+                state.tokens -= cost
+            state.running += slots
+        self.queued += slots
+        admitted = False
+        try:
+            async with condition:
+                await asyncio.wait_for(
+                    condition.wait_for(
+                        lambda: self.running + slots <= self.max_concurrent
+                    ),
+                    self.queue_timeout,
+                )
+                self.running += slots
+                admitted = True
+        except TimeoutError:
+            raise OverloadedError(
+                f"No verification slot within {self.queue_timeout}s",
+                reason="queue_timeout",
+                retry_after=self.queue_timeout,
+            ) from None
+        finally:
+            self.queued -= slots
+            if not admitted and state is not None:
+                state.running -= slots
+        if self.metrics is not None:
+            self.metrics.observe("admission_wait_seconds", time.perf_counter() - start)
+
+        try:
+            yield
+        finally:
+            if state is not None:
+                state.running -= slots
+            async with condition:
+                self.running -= slots
+                condition.notify_all()
@@ -0,0 +1,280 @@
+"""
+Append-only audit log of verification outcomes.
+Usage: uv run -m src.credential_checking_server.audit <directory> [--status success|failure]
+
+The server enqueues every `submit_credential` response in a bounded in-memory
+ring buffer; a background thread writes them in batches to segment files in
+the audit directory, one JSON object per line with the response's "status",
+"verification_result" and, on failure, "error". Segments rotate by size and
+age, and closed segments can be gzip-compressed. When the buffer overflows the
+oldest entries are dropped and a {"dropped": n} line records how many.
+"""
+
+import argparse
+import gzip
+import json
+import logging
+import mmap
+import os
+import sys
+import threading
+import time
+from collections import deque
+
+SEGMENT_PREFIX = "audit-"
+SEGMENT_SUFFIX = ".jsonl"
+COMPRESSED_SUFFIX = ".jsonl.gz"
+
+logger = logging.getLogger(__name__)
+
+
+class AuditLog:
+    """
+    Verification outcomes, buffered in memory and written by a background thread.
+
+    `record` only appends the response to a ring buffer of `capacity` entries,
+    so it never does I/O. The writer thread drains the buffer every
+    `flush_interval` seconds and appends the batch to the current segment,
+    which is closed once it holds `segment_bytes` bytes or is `segment_seconds`
+    old. With `compress`, closed segments are replaced by a gzip copy.
+    Segment names start with the UTC time they were opened and include the
+    process ID, so workers of one server can share a directory.
+    """
+
+    def __init__(
+        self,
+        directory,
+        segment_bytes=64 * 1024 * 1024,
+        segment_seconds=3600,
+        compress=False,
+        capacity=65536,
+        flush_interval=0.2,
+        metrics=None,
+    ):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.segment_seconds = segment_seconds
+        self.compress = compress
+        self.capacity = capacity
+        self.flush_interval = flush_interval
+        self.metrics = metrics
+        # Entries overwritten in the ring buffer, counted by `record`, and lost
+        # to a failed write, counted under the lock; each has a single writer
+        self._overflowed = 0
+        self._write_failed = 0
+        self._dropped_logged = 0
+        self._buffer = deque(maxlen=capacity)
+        # Current segment: (fd, path, size, opened_at)
+        self._segment = None
+        self._sequence = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._writer = None
+
+    def __len__(self):
+        return len(self._buffer)
+
+    @property
+    def dropped(self):
+        """Entries lost to a full buffer or a failed write."""
+        return self._overflowed + self._write_failed
+
+    def record(self, response):
+        """Enqueues a `submit_credential` response. Does no I/O and never blocks."""
+        buffer = self._buffer
+        if len(buffer) == self.capacity:
+            self._overflowed += 1
+        buffer.append(response)
+
+    def start(self):
+        """Starts the background writer thread."""
+        if self._writer is not None:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        self._stop.clear()
+        self._writer = threading.Thread(
+            target=self._write, name="audit-log-writer", daemon=True
+        )
+        self._writer.start()
+
+    def close(self):
+        """Stops the writer, writes the buffered entries and closes the current segment."""
+        if self._writer is not None:
+            self._stop.set()
+            self._writer.join()
+            self._writer = None
+        self.flush()
+        with self._lock:
+            self._close_segment()
+
+    def flush(self):
+        """Writes the buffered entries to the current segment; returns how many were written."""
+        with self._lock:
+            segment = self._segment
+            if segment is not None and time.time() - segment[3] >= self.segment_seconds:
+                self._close_segment()
+
+            batch = []
+            popleft = self._buffer.popleft
+            try:
+                for _ in range(len(self._buffer)):
+                    batch.append(popleft())
+            except IndexError:
+                pass
+            dropped = self.dropped - self._dropped_logged
+            if not batch and not dropped:
+                return 0
+
+            start = time.perf_counter()
+            lines = [json.dumps(_audit_entry(response), **_JSON) for response in batch]
+            if dropped:
+                lines.append(json.dumps({"dropped": dropped}))
+            data = ("\n".join(lines) + "\n").encode("utf-8")
+            try:
+                self._append(data)
+            except OSError as e:
+                logger.warning(
+                    "Audit log write failed, dropping %d entries: %s", len(batch), e
+                )
+                self._write_failed += len(batch)
+                return 0
+            self._dropped_logged += dropped
+
+            if self.metrics is not None:
+                self.metrics.observe("audit_flush_seconds", time.perf_counter() - start)
+                self.metrics.increment("audit_entries_written_total", len(batch))
+            return len(batch)
+
+    def _write(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+    def _append(self, data):
+        if self._segment is None:
+            opened_at = time.time()
+            self._sequence += 1
+            path = os.path.join(
+                self.directory,
+                f"{SEGMENT_PREFIX}{time.strftime('%Y%m%dT%H%M%S', time.gmtime(opened_at))}"
+                f"-{os.getpid()}-{self._sequence:06d}{SEGMENT_SUFFIX}",
+            )
+            fd = os.open(
+                path, os.O_WRONLY | os.O_CREAT | os.O_EXCL | os.O_APPEND, 0o640
+            )
+            self._segment = (fd, path, 0, opened_at)
+
+        fd, path, size, opened_at = self._segment
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view) :]
+        size += len(data)
+        self._segment = (fd, path, size, opened_at)
+        if size >= self.segment_bytes:
+            self._close_segment()
+
+    def _close_segment(self):
+        if self._segment is None:
+            return
+        fd, path, _, _ = self._segment
+        self._segment = None
+        os.close(fd)
+        if self.compress:
+            try:
+                _compress_segment(path)
+            except OSError as e:
+                logger.warning(
+                    "Audit log segment compression failed, keeping %s: %s", path, e
+                )
+
+
+_JSON = {"separators": (",", ":"), "default": str}
+
+
+def _audit_entry(response):
+    entry = {
+        "status": response["status"],
+        "verification_result": response["verification_result"],
+    }
+    if "error" in response:
+        entry["error"] = response["error"]
+    return entry
+
+
+def _compress_segment(path):
+    # The gzip copy appears under its final name atomically, then the original goes
+    compressed = path[: -len(SEGMENT_SUFFIX)] + COMPRESSED_SUFFIX
+    with open(path, "rb") as source, open(compressed + ".tmp", "wb") as sink:
+        with gzip.GzipFile(fileobj=sink, mode="wb", mtime=0) as archive:
+            while chunk := source.read(1024 * 1024):
+                archive.write(chunk)
+        sink.flush()
+        os.fsync(sink.fileno())
+    os.replace(compressed + ".tmp", compressed)
+    os.remove(path)
+
+
+def audit_segments(directory):
+    """Returns the paths of the segments in an audit directory, oldest first."""
+    names = set(os.listdir(directory))
+    segments = []
+    for name in names:
+        if not name.startswith(SEGMENT_PREFIX):
+            continue
+        # A segment whose compressed copy is complete is about to be removed
+        if name.endswith(COMPRESSED_SUFFIX) or (
+            name.endswith(SEGMENT_SUFFIX)
+            and name[: -len(SEGMENT_SUFFIX)] + COMPRESSED_SUFFIX not in names
+        ):
+            segments.append(name)
+    return [os.path.join(directory, name) for name in sorted(segments)]
+
+
+def read_audit_log(directory):
+    """
+    Yields the entries of an audit directory, oldest segment first. Segments
+    are memory-mapped; a partially written last line is skipped.
+    """
+    for path in audit_segments(directory):
+        if not os.path.exists(path):
+            # Replaced by its compressed copy since it was listed
+            path = path[: -len(SEGMENT_SUFFIX)] + COMPRESSED_SUFFIX
+            if not os.path.exists(path):
+                continue
+        with open(path, "rb") as source:
+            if os.fstat(source.fileno()).st_size == 0:
+                continue
+            with mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                if hasattr(data, "madvise") and hasattr(mmap, "MADV_SEQUENTIAL"):
+                    data.madvise(mmap.MADV_SEQUENTIAL)
+                if path.endswith(COMPRESSED_SUFFIX):
+                    with gzip.GzipFile(fileobj=data, mode="rb") as archive:
+                        for line in archive:
+                            if line.endswith(b"\n"):
+                                yield json.loads(line)
+                else:
+                    yield from _read_lines(data)
+
+
+def _read_lines(data):
+    offset, size = 0, len(data)
+    while offset < size:
+        end = data.find(b"\n", offset)
+        if end == -1:
+            return
+        yield json.loads(data[offset:end])
+        offset = end + 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("directory", help="Audit log directory (TMCP_AUDIT_LOG)")
+    parser.add_argument("--status", choices=["success", "failure"])
+    args = parser.parse_args()
+
+    for entry in read_audit_log(args.directory):
+        if args.status is None or entry.get("status") == args.status:
+            sys.stdout.write(json.dumps(entry) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+import copy
+import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from ..credential_handler.errors import InvalidIssuerError
+
+
+class RegistryKeyResolver:
+    """
+    Resolves issuer keys from an in-memory trusted registry.
+    The registry uses the `issuer_public_key.json` layout:
+    {"issuer_did": ..., "public_key": {...}, "name": ...}
+    """
+
+    def __init__(self, registry):
+        self._registry = registry
+
+    def resolve(self, issuer_did, header_parameters=None):
+        """Returns the issuer's public key, raising InvalidIssuerError if the issuer is not trusted."""
+        if issuer_did != self._registry["issuer_did"]:
+            raise InvalidIssuerError(
+                f"Issuer '{issuer_did}' is not trusted. "
+                f"Expected: {self._registry['issuer_did']}",
+                issuer_did=issuer_did,
+            )
+        from jwcrypto.jwk import JWK
+
+        return JWK(**self._registry["public_key"])
+
+
+class FileKeyResolver:
+    """Resolves issuer keys from a registry file, re-read on every resolution."""
+
+    def __init__(self, path):
+        self._path = path
+
+    def resolve(self, issuer_did, header_parameters=None):
+        """Returns the issuer's public key, raising ValueError if the issuer is not trusted."""
+        with open(self._path, "r") as f:
+            registry = json.load(f)
+        return RegistryKeyResolver(registry).resolve(issuer_did, header_parameters)
+
+
+class CachingKeyResolver:
+    """
+    Caches resolved issuer keys in front of a resolver backend.
+
+    Entries hold ready-to-use JWK objects and expire after `ttl` seconds. They
+    are keyed by issuer DID and the `kid` of the resolved key, so a `kid`
+    header that does not name the key it resolved to is not cached. Failed
+    resolutions (untrusted issuers, unknown keys) are cached separately for
+    `negative_ttl` seconds in at most `max_negative_entries` entries, so they
+    cannot evict trusted keys. Concurrent misses for the same key share a
+    single backend resolution.
+
+    When the backend exposes a `snapshot` (a `TrustRegistry`), keys are
+    resolved from it and each entry is tagged with the snapshot it came from;
+    entries from a snapshot that has since been replaced are never returned,
+    even if they were stored after the reload invalidated the cache.
+    """
+
+    def __init__(
+        self,
+        backend,
+        ttl=300,
+        negative_ttl=30,
+        max_entries=1024,
+        max_negative_entries=256,
+    ):
+        self._backend = backend
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self.max_negative_entries = max_negative_entries
+        self._entries = OrderedDict()
+        self._failures = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def resolve(self, issuer_did, header_parameters=None):
+        """Returns the issuer's public key, raising ValueError if the issuer is not trusted."""
+        kid = (header_parameters or {}).get("kid")
+        cache_key = (issuer_did, kid)
+
+        with self._lock:
+            snapshot = getattr(self._backend, "snapshot", None)
+            now = time.monotonic()
+            entry = self._entries.get(cache_key)
+            if entry is not None and entry[0] > now and entry[2] is snapshot:
+                self._entries.move_to_end(cache_key)
+                self.hits += 1
+                return entry[1]
+            failure = self._failures.get(cache_key)
+            if failure is not None and failure[0] > now and failure[2] is snapshot:
+                self.hits += 1
+                raise copy.copy(failure[1])
+
+            self.misses += 1
+            inflight_key = (cache_key, snapshot)
+            future = self._inflight.get(inflight_key)
+            leader = future is None
+            if leader:
+                future = self._inflight[inflight_key] = Future()
+
+        if not leader:
+            return self._unwrap(future.result())
+
+        try:
+            backend = self._backend if snapshot is None else snapshot
+            result = backend.resolve(issuer_did, header_parameters)
+        except ValueError as e:
+            result = e
+        except BaseException as e:
+            with self._lock:
+                del self._inflight[inflight_key]
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            del self._inflight[inflight_key]
+            if isinstance(result, ValueError):
+                entries, ttl, max_entries = (
+                    self._failures,
+                    self.negative_ttl,
+                    self.max_negative_entries,
+                )
+            elif kid is None or kid == _key_id(result):
+                entries, ttl, max_entries = self._entries, self.ttl, self.max_entries
+            else:
+                ttl = 0
+            if ttl > 0:
+                entries[cache_key] = (time.monotonic() + ttl, result, snapshot)
+                entries.move_to_end(cache_key)
+                while len(entries) > max_entries:
+                    entries.popitem(last=False)
+        future.set_result(result)
+        return self._unwrap(result)
+
+    @staticmethod
+    def _unwrap(result):
+        # Each caller gets its own exception, so concurrent raises do not share a traceback
+        if isinstance(result, ValueError):
+            raise copy.copy(result)
+        return result
+
+    def invalidate(self, issuer_did=None):
+        """Drops cached entries for one issuer, or all entries if no DID is given."""
+        with self._lock:
+            for entries in (self._entries, self._failures):
+                if issuer_did is None:
+                    entries.clear()
+                    continue
+                for cache_key in [k for k in entries if k[0] == issuer_did]:
+                    del entries[cache_key]
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def _key_id(key):
+    try:
+        return key.get("kid")
+    except AttributeError:
+        return None
@@ -0,0 +1,157 @@
+import heapq
+import secrets
+import sqlite3
+import threading
+import time
+
+from ..credential_handler.errors import InvalidNonceError
+
+
+class InMemoryNonceStore:
+    """
+    Issues single-use nonces and consumes them in O(1).
+
+    Nonces live in a dict keyed by the nonce string; a heap ordered by expiry
+    lets expired nonces be swept without scanning. When `max_entries` live
+    nonces exist, the one closest to expiry is evicted to make room.
+    """
+
+    def __init__(self, ttl=600, max_entries=100_000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._expiry = {}
+        self._heap = []
+        self._lock = threading.Lock()
+
+    def issue(self):
+        """Mints a nonce and returns `(nonce, expires_at)` with `expires_at` as a Unix timestamp."""
+        nonce = secrets.token_urlsafe(32)
+        now = time.time()
+        expires_at = now + self.ttl
+
+        with self._lock:
+            self._sweep(now)
+            while len(self._expiry) >= self.max_entries:
+                self._expiry.pop(heapq.heappop(self._heap)[1], None)
+            self._expiry[nonce] = expires_at
+            heapq.heappush(self._heap, (expires_at, nonce))
+
+        return nonce, expires_at
+
+    def consume(self, nonce):
+        """
+        Consumes a nonce and returns its expiry as a Unix timestamp.
+        Raises InvalidNonceError if the nonce is unknown, already used or expired.
+        """
+        with self._lock:
+            expires_at = self._expiry.pop(nonce, None)
+        return _check_expiry(expires_at)
+
+    def sweep(self):
+        """Removes expired nonces."""
+        with self._lock:
+            self._sweep(time.time())
+
+    def _sweep(self, now):
+        heap = self._heap
+        while heap and heap[0][0] <= now:
+            expires_at, nonce = heapq.heappop(heap)
+            if self._expiry.get(nonce) == expires_at:
+                del self._expiry[nonce]
+
+        # Consumed nonces leave stale heap entries behind; compact when they dominate.
+        if len(heap) > 2 * max(len(self._expiry), 1024):
+            self._heap = [(e, n) for n, e in self._expiry.items()]
+            heapq.heapify(self._heap)
+
+    def __len__(self):
+        return len(self._expiry)
+
+
+class SqliteNonceStore:
+    """
+    Nonce store backed by a SQLite file, shared by every worker that opens it.
+    Consumption is a single DELETE, so a nonce is accepted by at most one worker.
+    """
+
+    SWEEP_INTERVAL = 256
+
+    def __init__(self, path, ttl=600, max_entries=100_000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._issued = 0
+        self.path = path
+        self._conn = self._connect()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, check_same_thread=False, timeout=5)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS nonces "
+            "(nonce TEXT PRIMARY KEY, expires_at REAL NOT NULL)"
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS nonces_expires_at ON nonces (expires_at)"
+        )
+        conn.commit()
+        return conn
+
+    def reopen(self):
+        """Opens a new connection; called in forked workers, which must not share the parent's."""
+        self._lock = threading.Lock()
+        self._conn = self._connect()
+
+    def issue(self):
+        """Mints a nonce and returns `(nonce, expires_at)` with `expires_at` as a Unix timestamp."""
+        nonce = secrets.token_urlsafe(32)
+        now = time.time()
+        expires_at = now + self.ttl
+
+        with self._lock, self._conn:
+            self._issued += 1
+            if self._issued % self.SWEEP_INTERVAL == 0:
+                self._sweep(now)
+            self._conn.execute(
+                "INSERT INTO nonces (nonce, expires_at) VALUES (?, ?)",
+                (nonce, expires_at),
+            )
+
+        return nonce, expires_at
+
+    def consume(self, nonce):
+        """
+        Consumes a nonce and returns its expiry as a Unix timestamp.
+        Raises InvalidNonceError if the nonce is unknown, already used or expired.
+        """
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "DELETE FROM nonces WHERE nonce = ? RETURNING expires_at", (nonce,)
+            ).fetchone()
+        return _check_expiry(row[0] if row else None)
+
+    def sweep(self):
+        """Removes expired nonces."""
+        with self._lock, self._conn:
+            self._sweep(time.time())
+
+    def _sweep(self, now):
+        self._conn.execute("DELETE FROM nonces WHERE expires_at <= ?", (now,))
+        self._conn.execute(
+            "DELETE FROM nonces WHERE nonce IN "
+            "(SELECT nonce FROM nonces ORDER BY expires_at "
+            "LIMIT max(0, (SELECT count(*) FROM nonces) - ?))",
+            (self.max_entries,),
+        )
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT count(*) FROM nonces").fetchone()[0]
+
+
+def _check_expiry(expires_at):
+    if expires_at is None:
+        raise InvalidNonceError("Unknown or already used nonce")
+    if expires_at <= time.time():
+        raise InvalidNonceError("Nonce has expired")
+    return expires_at
@@ -0,0 +1,308 @@
+"""
+Re-verify an archive of credential presentations offline.
+Usage: uv run -m src.credential_checking_server.offline_verify <presentations> <results.jsonl> [options]
+
+Each input line is either a raw presentation or a JSON object with
+"presentation" and optionally "format", "nonce", "aud" and "id". When the
+nonce or audience is missing it is read from the presentation's key binding
+JWT. Blank lines and lines starting with "#" are skipped.
+
+Each output line is the `submit_credential` response for one presentation
+(`status`, `verification_result` and `error` on failure) plus its input
+"line" number, byte "offset" and "id", in input order. Progress is saved to
+<results>.checkpoint; rerun with --resume to continue an interrupted run.
+"""
+
+import argparse
+import json
+import mmap
+import os
+import sys
+import time
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+from .server import CredentialCheckingServer, ServerConfig
+
+# Verification state of a worker process
+_worker = {}
+
+
+def _init_worker(trust_registry_path, default_format, aud):
+    _worker["app"] = CredentialCheckingServer(
+        ServerConfig(trust_registry_path=trust_registry_path, verify_executor="inline")
+    )
+    _worker["default_format"] = default_format
+    _worker["aud"] = aud
+
+
+def verify_line(app, line, default_format="sd-jwt", aud=None):
+    """
+    Verifies one input line and returns `(response, entry_id)`, where `response`
+    has the `submit_credential` response schema.
+    """
+    verified_at = datetime.now(timezone.utc).isoformat()
+    entry_id = None
+    try:
+        if line.startswith(b"{"):
+            entry = json.loads(line)
+            entry_id = entry.get("id")
+        else:
+            entry = {"presentation": line.decode("utf-8")}
+
+        if "presentation" not in entry:
+            raise ValueError("Entry is missing 'presentation'")
+        cred_format = entry.get("format", default_format)
+        presentation = entry["presentation"]
+        options = {"nonce": entry.get("nonce"), "aud": aud or entry.get("aud")}
+        if options["nonce"] is None or options["aud"] is None:
+            format_handler = app.handler.get_handler(cred_format)
+            if not hasattr(format_handler, "key_binding_context"):
+                raise ValueError(
+                    f"Entry has no nonce or aud and format '{cred_format}' "
+                    "cannot read them from the presentation"
+                )
+            context = format_handler.key_binding_context(presentation)
+            options = {k: options[k] or context[k] for k in options}
+
+        verified_claims = app.handler.verify(
+            cred_format, presentation, app.get_issuer_public_key, options
+        )
+        return app.build_success_response(
+            verified_claims, verified_at, cred_format
+        ), entry_id
+    except Exception as e:
+        return app.build_failure_response(e, verified_at), entry_id
+
+
+def _verify_chunk(lines):
+    app = _worker["app"]
+    results = []
+    for line_number, offset, line in lines:
+        response, entry_id = verify_line(
+            app, line, _worker["default_format"], _worker["aud"]
+        )
+        record = {"line": line_number, "offset": offset}
+        if entry_id is not None:
+            record["id"] = entry_id
+        record.update(response)
+        outcome = response["error"]["code"] if "error" in response else "success"
+        results.append((json.dumps(record) + "\n", outcome))
+    return results
+
+
+def read_chunks(data, offset, line_number, chunk_size):
+    """
+    Yields `(lines, next_offset, next_line_number)` chunks of up to `chunk_size`
+    non-empty lines from `data`, starting at byte `offset`.
+    """
+    size = len(data)
+    lines = []
+    while offset < size:
+        end = data.find(b"\n", offset)
+        if end == -1:
+            end = size
+        line = data[offset:end].strip()
+        if line and not line.startswith(b"#"):
+            lines.append((line_number, offset, line))
+        offset = end + 1
+        line_number += 1
+        if len(lines) == chunk_size:
+            yield lines, offset, line_number
+            lines = []
+    if lines:
+        yield lines, min(offset, size), line_number
+
+
+class Checkpoint:
+    """Progress of a run: where to continue reading the input and writing the output."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return None
+        with open(self.path) as f:
+            return json.load(f)
+
+    def save(self, state):
+        # Written to a temporary file and renamed, so a crash never leaves a torn checkpoint
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(state, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def remove(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def verify_file(
+    input_path,
+    output_path,
+    trust_registry_path,
+    default_format="sd-jwt",
+    aud=None,
+    max_workers=None,
+    chunk_size=256,
+    resume=False,
+    checkpoint_interval=5.0,
+):
+    """
+    Verifies every presentation in `input_path` and writes results to `output_path`.
+    Returns a Counter of results by status and error code.
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    input_path = os.path.abspath(input_path)
+    input_size = os.path.getsize(input_path)
+    checkpoint = Checkpoint(output_path + ".checkpoint")
+
+    offset, line_number, output_size = 0, 1, 0
+    state = checkpoint.load() if resume else None
+    if state is None:
+        checkpoint.remove()
+    else:
+        if state["input"] != input_path or state["input_size"] != input_size:
+            raise ValueError(
+                f"Checkpoint {checkpoint.path} belongs to another input file"
+            )
+        offset, line_number, output_size = (
+            state["offset"],
+            state["line"],
+            state["output_size"],
+        )
+
+    counts = Counter()
+    sink = open(output_path, "r+b" if state is not None else "wb")
+    sink.truncate(output_size)
+    sink.seek(output_size)
+
+    pool = None
+    if max_workers > 1:
+        pool = ProcessPoolExecutor(
+            max_workers=max_workers,
+            initializer=_init_worker,
+            initargs=(trust_registry_path, default_format, aud),
+        )
+    else:
+        _init_worker(trust_registry_path, default_format, aud)
+
+    def write(results, next_offset, next_line_number):
+        nonlocal last_checkpoint
+        for result, outcome in results:
+            sink.write(result.encode("utf-8"))
+            counts[outcome] += 1
+        now = time.monotonic()
+        if now - last_checkpoint >= checkpoint_interval:
+            sink.flush()
+            os.fsync(sink.fileno())
+            checkpoint.save(
+                {
+                    "input": input_path,
+                    "input_size": input_size,
+                    "offset": next_offset,
+                    "line": next_line_number,
+                    "output_size": sink.tell(),
+                }
+            )
+            last_checkpoint = now
+
+    last_checkpoint = time.monotonic()
+    try:
+        with open(input_path, "rb") as source:
+            data = (
+                mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ)
+                if input_size
+                else b""
+            )
+            if hasattr(data, "madvise") and hasattr(mmap, "MADV_SEQUENTIAL"):
+                data.madvise(mmap.MADV_SEQUENTIAL)
+
+            chunks = read_chunks(data, offset, line_number, chunk_size)
+            if pool is None:
+                for lines, next_offset, next_line_number in chunks:
+                    write(_verify_chunk(lines), next_offset, next_line_number)
+            else:
+                # At most two chunks per worker are in flight
+                in_flight = deque()
+                for lines, next_offset, next_line_number in chunks:
+                    in_flight.append(
+                        (
+                            pool.submit(_verify_chunk, lines),
+                            next_offset,
+                            next_line_number,
+                        )
+                    )
+                    if len(in_flight) >= 2 * max_workers:
+                        future, *position = in_flight.popleft()
+                        write(future.result(), *position)
+                while in_flight:
+                    future, *position = in_flight.popleft()
+                    write(future.result(), *position)
+            if input_size:
+                data.close()
+    finally:
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
+        sink.close()
+
+    checkpoint.remove()
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("input", help="Presentations, one per line (text or JSONL)")
+    parser.add_argument("output", help="JSONL verification results")
+    parser.add_argument(
+        "--trust-registry",
+        default=os.environ.get("TMCP_TRUST_REGISTRY", "issuer_public_key.json"),
+        help="Trusted issuer registry to verify against",
+    )
+    parser.add_argument(
+        "--format", default="sd-jwt", help="Format of entries that do not name one"
+    )
+    parser.add_argument(
+        "--aud", help="Expected audience (server DID), overriding recorded values"
+    )
+    parser.add_argument(
+        "--workers", type=int, default=None, help="Verifier processes (default: cores)"
+    )
+    parser.add_argument("--chunk-size", type=int, default=256)
+    parser.add_argument(
+        "--resume", action="store_true", help="Continue from the last checkpoint"
+    )
+    args = parser.parse_args()
+
+    if not os.path.exists(args.trust_registry):
+        print(f"Error: {args.trust_registry} not found.")
+        sys.exit(1)
+
+    start = time.perf_counter()
+    counts = verify_file(
+        args.input,
+        args.output,
+        args.trust_registry,
+        default_format=args.format,
+        aud=args.aud,
+        max_workers=args.workers,
+        chunk_size=args.chunk_size,
+        resume=args.resume,
+    )
+    elapsed = time.perf_counter() - start
+    total = sum(counts.values())
+    print(
+        f"Verified {total} presentations in {elapsed:.1f}s "
+        f"({total / elapsed if elapsed else 0:.0f}/s)",
+        file=sys.stderr,
+    )
+    for outcome, count in counts.most_common():
+        print(f"  {outcome}: {count}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,266 @@
+import json
+import time
+
+from ..credential_handler.errors import (
+    CredentialNotYetValidError,
+    ExpiredCredentialError,
+    InvalidCredentialTypeError,
+    InvalidIssuerError,
+    MissingClaimsError,
+    VerificationError,
+)
+
+# Order in which a policy checks claims; among failing policies, the error of
+# the one that got furthest is reported
+_CHECK_ORDER = {
+    "INVALID_ISSUER": 0,
+    "INVALID_CREDENTIAL_TYPE": 1,
+    "EXPIRED_CREDENTIAL": 2,
+    "CREDENTIAL_NOT_YET_VALID": 2,
+    "MISSING_CLAIMS": 3,
+}
+
+_POLICY_FIELDS = {
+    "id",
+    "format",
+    "purpose",
+    "required_claims",
+    "credential_types",
+    "trusted_issuers",
+    "max_age",
+    "clock_skew",
+}
+
+# Seconds of tolerance for `iat`, `nbf` and `exp` when no policy sets `clock_skew`
+DEFAULT_CLOCK_SKEW = 60
+
+# Requirements advertised before policies were configurable
+DEFAULT_POLICY = {
+    "id": "identity",
+    "format": "sd-jwt",
+    "required_claims": [
+        {"claim": "given_name", "purpose": "To verify your identity"},
+        {"claim": "family_name", "purpose": "To verify your identity"},
+    ],
+    "credential_types": ["IdentityCredential"],
+}
+
+# The identity policy, for each built-in credential format
+DEFAULT_POLICIES = [
+    DEFAULT_POLICY,
+    {**DEFAULT_POLICY, "id": "identity-cbor", "format": "cbor-sd"},
+]
+
+
+def check_validity(verified_claims, now=None, clock_skew=DEFAULT_CLOCK_SKEW):
+    """
+    Raises ExpiredCredentialError past the credential's `exp`, and
+    CredentialNotYetValidError before its `nbf` or for an `iat` in the future.
+    """
+    now = time.time() if now is None else now
+    exp = verified_claims.get("exp")
+    if isinstance(exp, (int, float)) and now - clock_skew >= exp:
+        raise ExpiredCredentialError("Credential has expired")
+    iat = verified_claims.get("iat")
+    if isinstance(iat, (int, float)) and iat > now + clock_skew:
+        raise CredentialNotYetValidError("Credential is issued in the future")
+    nbf = verified_claims.get("nbf")
+    if isinstance(nbf, (int, float)) and nbf > now + clock_skew:
+        raise CredentialNotYetValidError("Credential is not valid yet")
+
+
+class RequirementsPolicy:
+    """
+    One set of presentation requirements, compiled once from its declarative
+    form: claim paths are split, allowlists become frozensets and the
+    advertised requirement is prebuilt.
+
+    Policy fields:
+    - "required_claims": claim names or dotted paths ("address.country"), or
+      {"claim": ..., "purpose": ...} objects
+    - "credential_types": accepted `vct` values; any type when omitted
+    - "trusted_issuers": issuer DIDs accepted by this policy, on top of the
+      trust registry; every registry issuer when omitted
+    - "max_age": maximum seconds since the credential's `iat`
+    - "clock_skew": seconds of tolerance for `iat`, `nbf` and `exp` (default 60)
+
+    The validity window (`exp`, `nbf`, `iat`) is checked by `PolicySet` for
+    every format, whether or not a policy covers it.
+    """
+
+    def __init__(self, policy):
+        unknown = set(policy) - _POLICY_FIELDS
+        if unknown:
+            raise ValueError(f"Unknown policy fields: {sorted(unknown)}")
+
+        self.id = policy.get("id", "default")
+        self.format = policy.get("format", "sd-jwt")
+        self.purpose = policy.get("purpose")
+
+        self.required_claims = []
+        for claim in policy.get("required_claims", ()):
+            if isinstance(claim, str):
+                claim = {"claim": claim}
+            if not claim.get("claim"):
+                raise ValueError(f"Policy '{self.id}': required claim has no name")
+            self.required_claims.append(claim)
+        self.claim_paths = tuple(
+            (claim["claim"], tuple(claim["claim"].split(".")))
+            for claim in self.required_claims
+        )
+
+        types = policy.get("credential_types")
+        self.credential_types = frozenset(types) if types else None
+        issuers = policy.get("trusted_issuers")
+        self.trusted_issuers = frozenset(issuers) if issuers else None
+        self.max_age = policy.get("max_age")
+        self.clock_skew = policy.get("clock_skew", DEFAULT_CLOCK_SKEW)
+
+        # Advertised requirement without the registry-dependent issuer list
+        self._requirement = {"id": self.id, "format": self.format}
+        if self.purpose:
+            self._requirement["purpose"] = self.purpose
+        self._requirement["required_claims"] = self.required_claims
+        if self.credential_types is not None:
+            self._requirement["credential_types"] = list(types)
+        if self.max_age is not None:
+            self._requirement["max_age"] = self.max_age
+
+    def requirement(self, snapshot):
+        """The requirement advertised by `list_required_credentials` for a registry snapshot."""
+        trusted_issuers = snapshot.trusted_issuers
+        if self.trusted_issuers is not None:
+            trusted_issuers = [
+                issuer
+                for issuer in trusted_issuers
+                if issuer["did"] in self.trusted_issuers
+            ]
+        return {**self._requirement, "trusted_issuers": list(trusted_issuers)}
+
+    def check(self, verified_claims, now=None):
+        """Raises a VerificationError if the verified claims do not meet this policy."""
+        issuer = verified_claims.get("iss")
+        if self.trusted_issuers is not None and issuer not in self.trusted_issuers:
+            raise InvalidIssuerError(
+                f"Issuer '{issuer}' is not trusted for '{self.id}' credentials",
+                issuer_did=issuer,
+            )
+
+        if self.credential_types is not None:
+            credential_type = verified_claims.get("vct")
+            if credential_type not in self.credential_types:
+                raise InvalidCredentialTypeError(
+                    f"Credential type '{credential_type}' is not accepted, "
+                    f"expected one of {sorted(self.credential_types)}",
+                    credential_type=credential_type,
+                )
+
+        if self.max_age is not None:
+            now = time.time() if now is None else now
+            iat = verified_claims.get("iat")
+            if not isinstance(iat, (int, float)):
+                raise ExpiredCredentialError("Credential has no 'iat' to check its age")
+            if now - iat > self.max_age + self.clock_skew:
+                raise ExpiredCredentialError(
+                    f"Credential is older than the maximum age of {self.max_age}s"
+                )
+
+        missing = [
+            name
+            for name, path in self.claim_paths
+            if not _has_path(verified_claims, path)
+        ]
+        if missing:
+            raise MissingClaimsError(
+                f"Required claims not disclosed: {', '.join(missing)}",
+                missing_claims=missing,
+            )
+
+
+def _has_path(claims, path):
+    for name in path:
+        if not isinstance(claims, dict) or name not in claims:
+            return False
+        claims = claims[name]
+    return True
+
+
+class PolicySet:
+    """
+    The requirements policies of a server. A verified presentation is accepted
+    if it meets any policy for its format; otherwise the error of the policy
+    that came closest is raised. The validity window is checked first, for
+    every format; formats without a policy are not restricted further.
+    """
+
+    def __init__(self, policies):
+        self.policies = [
+            policy
+            if isinstance(policy, RequirementsPolicy)
+            else RequirementsPolicy(policy)
+            for policy in policies
+        ]
+        ids = [policy.id for policy in self.policies]
+        if len(set(ids)) != len(ids):
+            raise ValueError(f"Duplicate policy ids: {ids}")
+        self._by_format = {}
+        for policy in self.policies:
+            self._by_format.setdefault(policy.format, []).append(policy)
+        # The most lenient clock skew of a format's policies applies to its validity window
+        self._clock_skew = {
+            cred_format: max(policy.clock_skew for policy in policies)
+            for cred_format, policies in self._by_format.items()
+        }
+        self._requirements = (None, [])
+
+    @classmethod
+    def load(cls, path=None):
+        """
+        Loads policies from a JSON file holding one policy or {"policies": [...]}.
+        Without a path, returns the default identity policies.
+        """
+        if path is None:
+            return cls(DEFAULT_POLICIES)
+        with open(path) as f:
+            data = json.load(f)
+        return cls(data.get("policies", [data]))
+
+    def requirements(self, snapshot):
+        """The advertised requirements, rebuilt only when the registry snapshot changes."""
+        cached_snapshot, requirements = self._requirements
+        if cached_snapshot is not snapshot:
+            requirements = [policy.requirement(snapshot) for policy in self.policies]
+            self._requirements = (snapshot, requirements)
+        return requirements
+
+    def check(self, cred_format, verified_claims, now=None):
+        """
+        Checks the credential's validity window, then returns the policy the
+        verified claims meet, or None if no policy covers `cred_format`.
+        Raises a VerificationError if they meet none.
+        """
+        check_validity(
+            verified_claims,
+            now,
+            self._clock_skew.get(cred_format, DEFAULT_CLOCK_SKEW),
+        )
+        policies = self._by_format.get(cred_format)
+        if not policies:
+            return None
+        closest = None
+        for policy in policies:
+            try:
+                policy.check(verified_claims, now)
+                return policy
+            except VerificationError as e:
+                if closest is None or _CHECK_ORDER[e.code] > _CHECK_ORDER[closest.code]:
+                    closest = e
+        raise closest
+
+    @property
+    def max_age(self):
+        """The strictest maximum credential age across policies, or None."""
+        ages = [
+            policy.max_age for policy in self.policies if policy.max_age is not None
+        ]
+        return min(ages) if ages else None
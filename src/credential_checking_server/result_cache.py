@@ -0,0 +1,172 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+class VerifiedResultCache:
+    """
+    Bounded LRU cache of verified presentation claims.
+
+    Entries are keyed by a digest of the format, the issuer-signed part of the
+    presentation (issuer JWT and disclosures) and the trust registry version,
+    so a registry reload starts over. The key binding JWT is not part of the
+    key: it is verified against each request's nonce and aud on a hit. Entries
+    expire at the credential `exp` or `ttl` seconds after verification,
+    whichever is first.
+    """
+
+    def __init__(self, ttl=60, max_entries=10_000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(cred_format, issuer_signed_part, registry_version):
+        """Returns the cache key for the issuer-signed part of a presentation."""
+        digest = hashlib.sha256()
+        for part in (cred_format, issuer_signed_part, registry_version or ""):
+            if isinstance(part, str):
+                part = part.encode("utf-8")
+            digest.update(len(part).to_bytes(8, "big"))
+            digest.update(part)
+        return digest.digest()
+
+    def get(self, key):
+        """Returns the cached verified claims for a key, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry[0] <= time.time():
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, verified_claims, not_after=None):
+        """Caches verified claims until `exp`, `not_after` or the TTL, whichever is first."""
+        now = time.time()
+        expires_at = now + self.ttl
+        if isinstance(verified_claims.get("exp"), (int, float)):
+            expires_at = min(expires_at, verified_claims["exp"])
+        if not_after is not None:
+            expires_at = min(expires_at, not_after)
+        if expires_at <= now:
+            return
+
+        with self._lock:
+            self._entries[key] = (expires_at, verified_claims)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SqliteResultCache:
+    """
+    Verified presentation cache backed by a SQLite file, shared by every worker
+    that opens it. Same interface and expiry rules as `VerifiedResultCache`;
+    when full, the entries closest to expiry are evicted first.
+    """
+
+    SWEEP_INTERVAL = 256
+
+    key = staticmethod(VerifiedResultCache.key)
+
+    def __init__(self, path, ttl=60, max_entries=10_000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._puts = 0
+        self._lock = threading.Lock()
+        self._conn = self._connect()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, check_same_thread=False, timeout=5)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS verified_results "
+            "(key BLOB PRIMARY KEY, expires_at REAL NOT NULL, claims TEXT NOT NULL)"
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS verified_results_expires_at "
+            "ON verified_results (expires_at)"
+        )
+        conn.commit()
+        return conn
+
+    def reopen(self):
+        """Opens a new connection; called in forked workers, which must not share the parent's."""
+        self._lock = threading.Lock()
+        self._conn = self._connect()
+
+    def get(self, key):
+        """Returns the cached verified claims for a key, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT claims FROM verified_results WHERE key = ? AND expires_at > ?",
+                (key, time.time()),
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, key, verified_claims, not_after=None):
+        """Caches verified claims until `exp`, `not_after` or the TTL, whichever is first."""
+        now = time.time()
+        expires_at = now + self.ttl
+        if isinstance(verified_claims.get("exp"), (int, float)):
+            expires_at = min(expires_at, verified_claims["exp"])
+        if not_after is not None:
+            expires_at = min(expires_at, not_after)
+        if expires_at <= now:
+            return
+
+        claims = json.dumps(verified_claims)
+        with self._lock, self._conn:
+            self._puts += 1
+            if self._puts % self.SWEEP_INTERVAL == 0:
+                self._sweep(now)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO verified_results (key, expires_at, claims) "
+                "VALUES (?, ?, ?)",
+                (key, expires_at, claims),
+            )
+
+    def _sweep(self, now):
+        self._conn.execute("DELETE FROM verified_results WHERE expires_at <= ?", (now,))
+        self._conn.execute(
+            "DELETE FROM verified_results WHERE key IN "
+            "(SELECT key FROM verified_results ORDER BY expires_at "
+            "LIMIT max(0, (SELECT count(*) FROM verified_results) - ?))",
+            (self.max_entries,),
+        )
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM verified_results")
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT count(*) FROM verified_results"
+            ).fetchone()[0]
@@ -1,46 +1,166 @@
-import json
+import asyncio
+import os
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
 from datetime import datetime, timezone
-from mcp.server.fastmcp import FastMCP, Context
-from tmcp import TmcpManager
-from ..credential_handler import CredentialHandler, SdJwtHandler
-from jwcrypto.jwk import JWK
-
-# --- Credential Handler Setup ---
-handler = CredentialHandler()
-sd_jwt_handler = SdJwtHandler()
-handler.register_handler(sd_jwt_handler)
-
-try:
-    with open("issuer_public_key.json", "r") as f:
-        ISSUER_REGISTRY = json.load(f)
-    print("Verifying Server loaded Issuer's public key.")
-except FileNotFoundError:
-    print(
-        "Error: issuer_public_key.json not found. "
-        "Run examples/generate_test_credential.py first."
-    )
-    exit(1)
-
-
-tmcp_manager = TmcpManager(transport="http://localhost:8001/mcp")
 
-mcp = FastMCP(
-    name="tmcp-credential-checking-server",
-    port=8001,
-    transport_manager=tmcp_manager,
+from ..credential_handler import CredentialHandler, Metrics, VerificationExecutor
+from ..credential_handler.errors import (
+    CredentialStatusError,
+    InvalidHolderError,
+    OverloadedError,
+    error_code,
 )
-
-
-def resolve_issuer_public_key(issuer_did: str) -> JWK:
-    """Check if this issuer is in the trusted registry and return their public key."""
-    if issuer_did != ISSUER_REGISTRY["issuer_did"]:
-        raise ValueError(
-            f"Issuer '{issuer_did}' is not trusted. "
-            f"Expected: {ISSUER_REGISTRY['issuer_did']}"
+from .admission import AdmissionController
+from .audit import AuditLog
+from .issuer_keys import CachingKeyResolver
+from .nonces import InMemoryNonceStore, SqliteNonceStore
+from .policy import PolicySet
+from .result_cache import SqliteResultCache, VerifiedResultCache
+from .sessions import SessionCredentialStore
+from .status_list import MAX_DOCUMENT_BYTES, MAX_LIST_BYTES, StatusListCache
+from .trust_registry import TrustRegistry
+
+
+@dataclass
+class ServerConfig:
+    """Configuration for the credential checking server."""
+
+    host: str = "127.0.0.1"
+    port: int = 8001
+    # Server processes sharing the listening socket; more than 1 runs a supervisor
+    workers: int = 1
+    # Requests a worker serves before it is replaced; 0 never recycles workers
+    worker_max_requests: int = 0
+    # Trusted issuer registry file, reloaded when it changes
+    trust_registry_path: str = "issuer_public_key.json"
+    trust_registry_poll_interval: float = 2.0
+    # Presentation requirements policies (JSON); the built-in identity policy when None
+    policy_path: str | None = None
+    # Where verification runs: "thread", "process" or "inline"
+    verify_executor: str = "thread"
+    verify_workers: int | None = None
+    # SD-JWT presentation verifier: "reference" (sd-jwt library) or "fast"
+    sd_jwt_verifier: str = "reference"
+    # Admission control: verifications running at once (default: 2 per verify
+    # worker), waiting for a slot, and seconds a request may wait
+    max_concurrent_verifications: int | None = None
+    max_queued_verifications: int = 256
+    queue_timeout: float = 2.0
+    # Per client DID: verifications at once, and started per second (0: unlimited)
+    client_max_concurrent: int = 4
+    client_rate: float = 0.0
+    client_burst: int = 10
+    issuer_key_ttl: int = 300
+    nonce_ttl: int = 600
+    # SQLite file for nonces shared between workers; in-memory when None
+    nonce_store_path: str | None = None
+    # Seconds to cache verified presentations; 0 disables the cache
+    result_cache_ttl: int = 0
+    # SQLite file for the result cache shared between workers; in-memory when None
+    result_cache_path: str | None = None
+    # Seconds between refreshes of the status lists credentials reference
+    status_list_ttl: int = 300
+    # fetcher(uri) -> bytes for remote status lists; fetches HTTP(S) when None
+    status_list_fetcher: Callable[[str], bytes] | None = None
+    # Directory local (file://) status lists are read from; local lists are refused when None
+    status_list_dir: str | None = None
+    # Largest status list document accepted, and largest list once decompressed
+    status_list_max_document_bytes: int = MAX_DOCUMENT_BYTES
+    status_list_max_list_bytes: int = MAX_LIST_BYTES
+    # Seconds a credential verified on a session is remembered, at most until its `exp`
+    session_ttl: int = 3600
+    # resolver(ctx) -> client DID of the TMCP session; holder binding trusts `sub`
+    # and no credential is remembered for a session when None
+    session_did_resolver: Callable[[object], str | None] | None = None
+    metrics: bool = False
+    # Directory for the audit log of verification outcomes; disabled when None
+    audit_log_path: str | None = None
+    # Audit segments are closed at this size or age, then gzipped with audit_log_compress
+    audit_segment_bytes: int = 64 * 1024 * 1024
+    audit_segment_seconds: int = 3600
+    audit_log_compress: bool = False
+    # Preload handlers, keys and worker pools before accepting traffic
+    warm_up: bool = False
+
+    @classmethod
+    def from_env(cls):
+        """Builds a configuration from TMCP_* environment variables."""
+        env = os.environ
+        return cls(
+            host=env.get("TMCP_HOST", cls.host),
+            port=int(env.get("TMCP_PORT", cls.port)),
+            workers=int(env.get("TMCP_WORKERS", cls.workers)) or os.cpu_count() or 1,
+            worker_max_requests=int(
+                env.get("TMCP_WORKER_MAX_REQUESTS", cls.worker_max_requests)
+            ),
+            trust_registry_path=env.get("TMCP_TRUST_REGISTRY", cls.trust_registry_path),
+            trust_registry_poll_interval=float(
+                env.get(
+                    "TMCP_TRUST_REGISTRY_POLL_INTERVAL",
+                    cls.trust_registry_poll_interval,
+                )
+            ),
+            policy_path=env.get("TMCP_POLICY") or None,
+            verify_executor=env.get("TMCP_VERIFY_EXECUTOR", cls.verify_executor),
+            verify_workers=int(env.get("TMCP_VERIFY_WORKERS", 0)) or None,
+            sd_jwt_verifier=env.get("TMCP_SDJWT_VERIFIER", cls.sd_jwt_verifier),
+            max_concurrent_verifications=int(
+                env.get("TMCP_MAX_CONCURRENT_VERIFICATIONS", 0)
+            )
+            or None,
+            max_queued_verifications=int(
+                env.get("TMCP_MAX_QUEUED_VERIFICATIONS", cls.max_queued_verifications)
+            ),
+            queue_timeout=float(env.get("TMCP_QUEUE_TIMEOUT", cls.queue_timeout)),
+            client_max_concurrent=int(
+                env.get("TMCP_CLIENT_MAX_CONCURRENT", cls.client_max_concurrent)
+            ),
+            client_rate=float(env.get("TMCP_CLIENT_RATE", cls.client_rate)),
+            client_burst=int(env.get("TMCP_CLIENT_BURST", cls.client_burst)),
+            issuer_key_ttl=int(env.get("TMCP_ISSUER_KEY_TTL", cls.issuer_key_ttl)),
+            nonce_store_path=env.get("TMCP_NONCE_STORE") or None,
+            result_cache_ttl=int(
+                env.get("TMCP_RESULT_CACHE_TTL", cls.result_cache_ttl)
+            ),
+            result_cache_path=env.get("TMCP_RESULT_CACHE_STORE") or None,
+            status_list_ttl=int(env.get("TMCP_STATUS_LIST_TTL", cls.status_list_ttl)),
+            status_list_dir=env.get("TMCP_STATUS_LIST_DIR") or None,
+            status_list_max_document_bytes=int(
+                env.get(
+                    "TMCP_STATUS_LIST_MAX_DOCUMENT_BYTES",
+                    cls.status_list_max_document_bytes,
+                )
+            ),
+            status_list_max_list_bytes=int(
+                env.get(
+                    "TMCP_STATUS_LIST_MAX_LIST_BYTES", cls.status_list_max_list_bytes
+                )
+            ),
+            session_ttl=int(env.get("TMCP_SESSION_TTL", cls.session_ttl)),
+            metrics=env.get("TMCP_METRICS") == "1",
+            audit_log_path=env.get("TMCP_AUDIT_LOG") or None,
+            audit_segment_bytes=int(
+                env.get("TMCP_AUDIT_SEGMENT_BYTES", cls.audit_segment_bytes)
+            ),
+            audit_segment_seconds=int(
+                env.get("TMCP_AUDIT_SEGMENT_SECONDS", cls.audit_segment_seconds)
+            ),
+            audit_log_compress=env.get("TMCP_AUDIT_COMPRESS") == "1",
+            warm_up=env.get("TMCP_WARM_UP") == "1",
         )
 
-    issuer_key = JWK(**ISSUER_REGISTRY["public_key"])
-    return issuer_key
+
+# Template of failure responses; only the error and the time are filled in, and
+# the nested holder and issuer results are shared, so they must not be modified
+_FAILURE_RESPONSE = {
+    "status": "failure",
+    "verification_result": {
+        "holder": {"verified": False},
+        "issuer": {"verified": False, "trusted": False},
+    },
+}
 
 
 def verify_holder_binding(verified_claims: dict, session_client_did: str) -> dict:
@@ -56,20 +176,22 @@ def verify_holder_binding(verified_claims: dict, session_client_did: str) -> dic
     cnf_did = cnf.get("kid") if isinstance(cnf, dict) else None
 
     if not sub:
-        raise ValueError("Missing 'sub' claim in credential")
+        raise InvalidHolderError("Missing 'sub' claim in credential")
 
     if not cnf_did:
-        raise ValueError("Missing 'cnf.kid' (holder DID reference) in credential")
+        raise InvalidHolderError(
+            "Missing 'cnf.kid' (holder DID reference) in credential"
+        )
 
     # Verify sub matches cnf
     if sub != cnf_did:
-        raise ValueError(
+        raise InvalidHolderError(
             f"Holder binding mismatch: sub='{sub}' does not match cnf.kid='{cnf_did}'"
         )
 
     # Verify sub matches session client DID
     if sub != session_client_did:
-        raise ValueError(
+        raise InvalidHolderError(
             f"Session binding mismatch: credential sub='{sub}' does not match "
             f"session client DID='{session_client_did}'"
         )
@@ -77,91 +199,380 @@ def verify_holder_binding(verified_claims: dict, session_client_did: str) -> dic
     return {"did": sub, "verified": True}
 
 
-@mcp.tool()
-def get_server_did() -> dict:
-    """Returns the server's DID for credential binding."""
-    return {
-        "server_did": tmcp_manager.did,
-        "usage": "Use this DID as the 'aud' claim when generating credentials",
-    }
+def _hit_ratio(cache):
+    lookups = cache.hits + cache.misses
+    return cache.hits / lookups if lookups else 0.0
 
 
-@mcp.tool()
-def list_required_credentials() -> dict:
-    """
-    Returns requirements for credential presentation including nonce for replay protection.
-    """
-    import secrets
-    from datetime import datetime, timedelta
-
-    nonce = secrets.token_urlsafe(32)
-    expires_at = datetime.now(timezone.utc) + timedelta(seconds=600)
-
-    return {
-        "requirements": [
-            {
-                "format": "sd-jwt",
-                "required_claims": [
-                    {"claim": "given_name", "purpose": "To verify your identity"},
-                    {"claim": "family_name", "purpose": "To verify your identity"},
-                ],
-                "trusted_issuers": [
-                    {
-                        "did": ISSUER_REGISTRY["issuer_did"],
-                        "name": "Trusted Issuer",
-                        "description": "Registered credential issuer",
-                    }
-                ],
-                "credential_types": ["IdentityCredential"],
-            }
-        ],
-        "presentation_definition": {
-            "nonce": nonce,
-            "expires_at": expires_at.isoformat(),
-            "max_age": 300,
-        },
-        "verifier": {
-            "did": tmcp_manager.did,
-            "name": "TMCP Credential Checking Server",
-            "purpose": "Verify identity for service access",
-        },
-    }
-
-
-@mcp.tool()
-async def submit_credential(
-    ctx: Context, format: str, presentation: str, nonce: str
-) -> dict:
+def _create_sd_jwt_handler(metrics, trusted_issuers, verifier):
+    from ..credential_handler.sd_jwt_handler import SdJwtHandler
+
+    return SdJwtHandler(
+        metrics=metrics, trusted_issuers=trusted_issuers, verifier=verifier
+    )
+
+
+def _create_cbor_sd_handler(metrics, trusted_issuers):
+    from ..credential_handler.cbor_sd_handler import CborSdHandler
+
+    return CborSdHandler(metrics=metrics, trusted_issuers=trusted_issuers)
+
+
+class CredentialCheckingServer:
     """
-    Submits a credential presentation for verification.
+    Verification state and logic of the credential checking server.
+    Built by `create_app`, which also wires it to a FastMCP server as `self.mcp`.
     """
-    verified_at = datetime.now(timezone.utc).isoformat()
 
-    try:
+    def __init__(self, config: ServerConfig):
+        self.config = config
+        self.startup_timings = {}
+
+        # Per-stage timings, result counters and cache gauges
+        self.metrics = Metrics() if config.metrics else None
+
+        # Verification runs off the event loop
+        self.verification_executor = VerificationExecutor(
+            mode=config.verify_executor, max_workers=config.verify_workers
+        )
+        self.handler = CredentialHandler(
+            executor=self.verification_executor, metrics=self.metrics
+        )
+        # Bounded verification queue and per-client limits; excess requests
+        # fail fast with OVERLOADED
+        self.admission = AdmissionController(
+            config.max_concurrent_verifications
+            or 2 * self.verification_executor.max_workers,
+            max_queued=config.max_queued_verifications,
+            queue_timeout=config.queue_timeout,
+            client_max_concurrent=config.client_max_concurrent,
+            client_rate=config.client_rate,
+            client_burst=config.client_burst,
+            metrics=self.metrics,
+        )
+
+        start = time.perf_counter()
+        self.trust_registry = TrustRegistry(
+            config.trust_registry_path,
+            poll_interval=config.trust_registry_poll_interval,
+        )
+        self.startup_timings["trust_registry"] = time.perf_counter() - start
+
+        # Requirements are compiled once, checked after verification and advertised
+        # by list_required_credentials
+        self.policies = PolicySet.load(config.policy_path)
+
+        # Format handlers are imported on first use
+        self.handler.register_lazy_handler(
+            "sd-jwt",
+            lambda: _create_sd_jwt_handler(
+                self.metrics,
+                self.trust_registry.snapshot.issuer_dids,
+                config.sd_jwt_verifier,
+            ),
+        )
+        self.handler.register_lazy_handler(
+            "cbor-sd",
+            lambda: _create_cbor_sd_handler(
+                self.metrics, self.trust_registry.snapshot.issuer_dids
+            ),
+        )
+
+        # Parsed issuer keys are cached; untrusted issuers are negatively cached.
+        self.issuer_key_resolver = CachingKeyResolver(
+            self.trust_registry, ttl=config.issuer_key_ttl
+        )
+        self.trust_registry.add_reload_listener(self._on_registry_reload)
+
+        # Nonces are shared between workers when a SQLite store path is configured.
+        if config.nonce_store_path:
+            self.nonce_store = SqliteNonceStore(
+                config.nonce_store_path, ttl=config.nonce_ttl
+            )
+        else:
+            self.nonce_store = InMemoryNonceStore(ttl=config.nonce_ttl)
+
+        # Opt-in cache of verified issuer-signed parts; a presentation of an already
+        # verified credential and disclosures only has its key binding JWT checked
+        self.result_cache = None
+        if config.result_cache_ttl > 0 and config.result_cache_path:
+            self.result_cache = SqliteResultCache(
+                config.result_cache_path, ttl=config.result_cache_ttl
+            )
+        elif config.result_cache_ttl > 0:
+            self.result_cache = VerifiedResultCache(ttl=config.result_cache_ttl)
+
+        # Revocation: status lists are loaded on first reference and refreshed
+        # in the background; remote lists must be tokens signed by trusted issuers
+        self.status_lists = StatusListCache(
+            self.get_issuer_public_key,
+            fetcher=config.status_list_fetcher,
+            ttl=config.status_list_ttl,
+            directory=config.status_list_dir,
+            max_document_bytes=config.status_list_max_document_bytes,
+            max_list_bytes=config.status_list_max_list_bytes,
+        )
+
+        # Credentials verified on each client session, so other tools can check
+        # the session's identity without another presentation
+        self.session_credentials = SessionCredentialStore(ttl=config.session_ttl)
+        self.remember_sessions = True
+
+        # Every submit_credential outcome is buffered and written off the event loop
+        self.audit_log = None
+        if config.audit_log_path:
+            self.audit_log = AuditLog(
+                config.audit_log_path,
+                segment_bytes=config.audit_segment_bytes,
+                segment_seconds=config.audit_segment_seconds,
+                compress=config.audit_log_compress,
+                metrics=self.metrics,
+            )
+
+        if self.metrics is not None:
+            self.metrics.register_gauge(
+                "cache_hit_ratio",
+                lambda: _hit_ratio(self.issuer_key_resolver),
+                cache="issuer_keys",
+            )
+            self.metrics.register_gauge(
+                "cache_hit_ratio",
+                lambda: _hit_ratio(self.session_credentials),
+                cache="sessions",
+            )
+            self.metrics.register_gauge(
+                "sessions_verified", lambda: len(self.session_credentials)
+            )
+            self.metrics.register_gauge(
+                "admission_queued", lambda: self.admission.queued
+            )
+            self.metrics.register_gauge(
+                "admission_running", lambda: self.admission.running
+            )
+            self.metrics.register_gauge(
+                "status_lists_loaded", lambda: len(self.status_lists)
+            )
+            self.metrics.register_gauge(
+                "status_list_bytes", lambda: self.status_lists.size
+            )
+            self.metrics.register_gauge(
+                "nonces_outstanding", lambda: len(self.nonce_store)
+            )
+            if self.result_cache is not None:
+                self.metrics.register_gauge(
+                    "cache_hit_ratio",
+                    lambda: _hit_ratio(self.result_cache),
+                    cache="results",
+                )
+            if self.audit_log is not None:
+                self.metrics.register_gauge(
+                    "audit_log_buffered", lambda: len(self.audit_log)
+                )
+                self.metrics.register_gauge(
+                    "audit_log_dropped", lambda: self.audit_log.dropped
+                )
+
+        self.tmcp_manager = None
+        self.mcp = None
+
+    @property
+    def did(self):
+        return self.tmcp_manager.did
+
+    def _on_registry_reload(self, snapshot):
+        # Presentations from issuers outside the registry are rejected before key resolution
+        for format_handler in self.handler.loaded_handlers().values():
+            if hasattr(format_handler, "trusted_issuers"):
+                format_handler.trusted_issuers = snapshot.issuer_dids
+        self.issuer_key_resolver.invalidate()
+
+    def warm_up(self, start_workers=True):
+        """
+        Imports format handlers, primes the issuer key cache and starts verification
+        workers. A supervisor warms up before forking with `start_workers=False`.
+        """
+        start = time.perf_counter()
+        self.handler.load_all()
+        for did, kid in list(self.trust_registry.snapshot.keys)[
+            : self.issuer_key_resolver.max_entries
+        ]:
+            self.issuer_key_resolver.resolve(did, {"kid": kid} if kid else None)
+        if start_workers:
+            self.verification_executor.start()
+        self.startup_timings["warm_up"] = time.perf_counter() - start
+
+    def start(self):
+        """
+        Starts background work: trust registry reloads, status list refreshes
+        and audit log writes.
+        """
+        self.trust_registry.start_watching()
+        self.status_lists.start_refreshing()
+        if self.audit_log is not None:
+            self.audit_log.start()
+
+    def close(self):
+        """Stops background work and verification workers, and writes out the audit log."""
+        self.trust_registry.stop_watching()
+        self.status_lists.stop_refreshing()
+        if self.audit_log is not None:
+            self.audit_log.close()
+        self.verification_executor.shutdown()
+        self.handler.close()
+
+    def after_fork(self, start_workers=False):
+        """Reopens per-process resources in a worker forked from a preloaded app."""
+        for store in (self.nonce_store, self.result_cache):
+            if hasattr(store, "reopen"):
+                store.reopen()
+        if start_workers:
+            self.verification_executor.start()
+
+    def serve(self, sockets, limit_max_requests=None):
+        """
+        Serves streamable HTTP on already-bound sockets until the process is
+        signalled or has served `limit_max_requests` requests. Sessions are
+        stateless so that any worker sharing the sockets can answer any request.
+        """
+        import uvicorn
+
+        self.mcp.settings.stateless_http = True
+        # Every stateless request gets a new session, so none would be found again
+        self.remember_sessions = False
+        server = uvicorn.Server(
+            uvicorn.Config(
+                self.mcp.streamable_http_app(),
+                log_level=self.mcp.settings.log_level.lower(),
+                limit_max_requests=limit_max_requests or None,
+            )
+        )
+        self.start()
+        try:
+            asyncio.run(server.serve(sockets=sockets))
+        finally:
+            self.close()
+
+    def run(self):
+        """Runs the MCP server until interrupted."""
+        self.start()
+        try:
+            self.mcp.run(transport="streamable-http")
+        finally:
+            self.close()
+
+    def resolve_issuer_public_key(
+        self, issuer_did: str, header_parameters: dict | None = None
+    ):
+        """Check if this issuer is in the trusted registry and return their public key."""
+        return self.issuer_key_resolver.resolve(issuer_did, header_parameters)
+
+    def get_issuer_public_key(self, issuer_did, header_parameters):
+        """Key-resolution callback passed to the credential handler."""
+        return self.resolve_issuer_public_key(issuer_did, header_parameters)
+
+    def get_server_did(self) -> dict:
+        return {
+            "server_did": self.did,
+            "usage": "Use this DID as the 'aud' claim when generating credentials",
+        }
 
-        def get_issuer_public_key(issuer_did, header_parameters):
-            return resolve_issuer_public_key(issuer_did)
+    def list_required_credentials(self) -> dict:
+        nonce, expires_at = self.nonce_store.issue()
+        expires_at = datetime.fromtimestamp(expires_at, tz=timezone.utc)
 
-        # Verify the presentation
-        verified_claims = handler.verify(
-            cred_format=format,
-            presentation=presentation,
-            get_issuer_key_callback=get_issuer_public_key,
-            options={
+        return {
+            "requirements": self.policies.requirements(self.trust_registry.snapshot),
+            "presentation_definition": {
                 "nonce": nonce,
-                "aud": tmcp_manager.did,
+                "expires_at": expires_at.isoformat(),
+                "max_age": self.policies.max_age,
             },
-        )
+            "verifier": {
+                "did": self.did,
+                "name": "TMCP Credential Checking Server",
+                "purpose": "Verify identity for service access",
+            },
+        }
 
-        # Verify Holder Binding
-        # TODO: Get actual client DID from TMCP session context
-        # For now, we trust the sub claim matches the session
-        session_client_did = verified_claims.get("sub", "")
-        holder_result = verify_holder_binding(verified_claims, session_client_did)
+    def session_client_did(self, ctx) -> str | None:
+        """The client DID of the TMCP session behind a tool call, if the transport exposes it."""
+        resolver = self.config.session_did_resolver
+        return resolver(ctx) if resolver is not None else None
+
+    def verified_session(self, session, policy: str | None = None):
+        """
+        Returns the credential verified on `session` (a tool call's `ctx.session`)
+        as a `SessionCredential`, or None if the session has not presented a
+        valid credential, it expired or it has since been revoked. With
+        `policy`, only a credential that met that requirements policy counts.
+        Only credentials bound to the session's client DID are remembered, so
+        this is always None without a `session_did_resolver`.
+        """
+        entry = self.session_credentials.get(session, policy)
+        if entry is not None:
+            try:
+                self.status_lists.check(entry.claims)
+            except CredentialStatusError:
+                self.session_credentials.evict(session)
+                return None
+        return entry
+
+    def _remember_session(self, session, response, verified_claims):
+        # Credentials whose holder was not checked against the session's client
+        # DID are not remembered, so other tools never rely on `sub` alone
+        result = response["verification_result"]
+        if (
+            session is not None
+            and self.remember_sessions
+            and result["holder"]["session_bound"]
+        ):
+            self.session_credentials.put(
+                session, result["holder"]["did"], verified_claims, result.get("policy")
+            )
+
+    def build_success_response(
+        self,
+        verified_claims: dict,
+        verified_at: str,
+        format: str = "sd-jwt",
+        session_client_did: str | None = None,
+    ) -> dict:
+        """
+        Verifies holder binding, the presentation requirements and the
+        credential's status, and builds the success response for verified claims.
+        """
+        metrics = self.metrics
+
+        if metrics is None:
+            policy = self.policies.check(format, verified_claims)
+            self.status_lists.check(verified_claims)
+        else:
+            with metrics.time("verification_stage_seconds", stage="requirements"):
+                policy = self.policies.check(format, verified_claims)
+            with metrics.time("verification_stage_seconds", stage="status"):
+                self.status_lists.check(verified_claims)
+
+        # Verify Holder Binding against the session's client DID; without one,
+        # the sub claim is trusted to match the session
+        session_bound = session_client_did is not None
+        if not session_bound:
+            session_client_did = verified_claims.get("sub", "")
+        if metrics is None:
+            holder_result = verify_holder_binding(verified_claims, session_client_did)
+        else:
+            with metrics.time("verification_stage_seconds", stage="holder_binding"):
+                holder_result = verify_holder_binding(
+                    verified_claims, session_client_did
+                )
+        holder_result["session_bound"] = session_bound
 
         issuer_did = verified_claims.get("iss", "unknown")
+        issuer = self.trust_registry.snapshot.issuers.get(issuer_did, {})
 
-        return {
+        if metrics is not None:
+            metrics.increment("verification_results_total", status="success")
+
+        result = {
             "status": "success",
             "message": "Credential verified successfully",
             "verification_result": {
@@ -169,7 +580,7 @@ async def submit_credential(
                 "holder": holder_result,
                 "issuer": {
                     "did": issuer_did,
-                    "name": ISSUER_REGISTRY.get("name", "Trusted Issuer"),
+                    "name": issuer.get("name", "Trusted Issuer"),
                     "verified": True,
                     "trusted": True,
                 },
@@ -184,55 +595,327 @@ async def submit_credential(
                     ).isoformat()
                     if verified_claims.get("exp")
                     else None,
-                    "type": "IdentityCredential",
+                    "type": verified_claims.get("vct", "IdentityCredential"),
                 },
                 "disclosed_claims": {
                     k: v
                     for k, v in verified_claims.items()
-                    if k not in ["iss", "sub", "iat", "exp", "cnf", "_sd", "_sd_alg"]
+                    if k
+                    not in [
+                        "iss",
+                        "sub",
+                        "iat",
+                        "exp",
+                        "cnf",
+                        "vct",
+                        "status",
+                        "_sd",
+                        "_sd_alg",
+                    ]
                 },
             },
         }
-
-    except ValueError as e:
-        error_message = str(e)
-
-        if "not trusted" in error_message.lower():
-            error_code = "INVALID_ISSUER"
-        elif "holder" in error_message.lower() or "sub" in error_message.lower():
-            error_code = "INVALID_HOLDER"
-        elif "aud" in error_message.lower():
-            error_code = "INVALID_AUDIENCE"
-        elif "nonce" in error_message.lower():
-            error_code = "INVALID_NONCE"
+        if policy is not None:
+            result["verification_result"]["policy"] = policy.id
+        return result
+
+    def build_failure_response(self, error: Exception, verified_at: str) -> dict:
+        """Builds the failure response for an error raised during verification."""
+        code = error_code(error)
+        if code == "INTERNAL_ERROR":
+            details = {"error_type": type(error).__name__}
         else:
-            error_code = "VERIFICATION_FAILED"
+            details = {"reason": str(error), **getattr(error, "details", {})}
 
-        return {
-            "status": "failure",
-            "error": {
-                "code": error_code,
-                "message": error_message,
-                "details": {"reason": error_message},
-            },
-            "verification_result": {
-                "verified_at": verified_at,
-                "holder": {"verified": False},
-                "issuer": {"verified": False, "trusted": False},
-            },
-        }
+        if self.metrics is not None:
+            self.metrics.increment(
+                "verification_results_total", status="failure", code=code
+            )
 
-    except Exception as e:
         return {
-            "status": "failure",
-            "error": {
-                "code": "INTERNAL_ERROR",
-                "message": str(e),
-                "details": {"error_type": type(e).__name__},
-            },
+            **_FAILURE_RESPONSE,
+            "error": {"code": code, "message": str(error), "details": details},
             "verification_result": {
+                **_FAILURE_RESPONSE["verification_result"],
                 "verified_at": verified_at,
-                "holder": {"verified": False},
-                "issuer": {"verified": False, "trusted": False},
             },
         }
+
+    def get_metrics(self, format: str = "json") -> dict:
+        if self.metrics is None:
+            return {
+                "enabled": False,
+                "message": "Set TMCP_METRICS=1 to collect metrics",
+            }
+        if format == "prometheus":
+            return {"enabled": True, "prometheus": self.metrics.to_prometheus()}
+        return {"enabled": True, **self.metrics.snapshot()}
+
+    async def load_status_list(self, verified_claims: dict):
+        """Fetches the status list a credential references off the event loop, if not loaded yet."""
+        if self.status_lists.needs_load(verified_claims):
+            await asyncio.to_thread(self.status_lists.check, verified_claims)
+
+    def _result_cache_key(self, format, presentation):
+        """The result cache key of a presentation, or None if it cannot be cached."""
+        if self.result_cache is None:
+            return None
+        issuer_signed_part = self.handler.issuer_signed_part(format, presentation)
+        if issuer_signed_part is None:
+            return None
+        return self.result_cache.key(
+            format, issuer_signed_part, self.trust_registry.snapshot.version
+        )
+
+    async def submit_credential(
+        self,
+        format: str,
+        presentation: str,
+        nonce: str,
+        session=None,
+        session_client_did: str | None = None,
+    ):
+        """
+        Verifies a presentation. When given the client `session`, a verified
+        credential is remembered for it; see `verified_session`. Admission
+        limits apply per session client DID, or per session without one.
+        """
+        verified_at = datetime.now(timezone.utc).isoformat()
+        result_cache = self.result_cache
+        client = session_client_did
+        if client is None and session is not None:
+            client = f"session:{id(session)}"
+
+        try:
+            # Requests over the admission limits fail before the nonce is used
+            async with self.admission.admit(client):
+                # Reject unknown, replayed or expired nonces before any other work;
+                # a cached result never stands in for the nonce check
+                self.nonce_store.consume(nonce)
+
+                options = {"nonce": nonce, "aud": self.did}
+                cache_key = self._result_cache_key(format, presentation)
+                verified_claims = None
+                if cache_key is not None:
+                    verified_claims = result_cache.get(cache_key)
+
+                if verified_claims is not None:
+                    # Same issuer JWT and disclosures as before; the key binding
+                    # JWT must still match this request's nonce and audience
+                    self.handler.verify_key_binding(
+                        format, presentation, verified_claims, options
+                    )
+                else:
+                    # Verify the presentation
+                    verified_claims = await self.handler.averify(
+                        cred_format=format,
+                        presentation=presentation,
+                        get_issuer_key_callback=self.get_issuer_public_key,
+                        options=options,
+                    )
+                    if cache_key is not None:
+                        result_cache.put(cache_key, verified_claims)
+
+            await self.load_status_list(verified_claims)
+            response = self.build_success_response(
+                verified_claims, verified_at, format, session_client_did
+            )
+            self._remember_session(session, response, verified_claims)
+
+        except Exception as e:
+            response = self.build_failure_response(e, verified_at)
+            # A failed presentation withdraws the credential verified on the session
+            if session is not None and not isinstance(e, OverloadedError):
+                self.session_credentials.evict(session)
+
+        if self.audit_log is not None:
+            self.audit_log.record(response)
+        return response
+
+    async def submit_credentials_batch(
+        self,
+        format: str,
+        presentations: list[str],
+        nonces: list[str],
+        session=None,
+        session_client_did: str | None = None,
+    ) -> dict:
+        """
+        Verifies a batch of presentations, admitted together at one unit of
+        admission cost each. Every nonce is consumed before the result cache is
+        consulted. Holder binding, admission limits, the result cache and
+        remembered credentials work as for `submit_credential`.
+        """
+        verified_at = datetime.now(timezone.utc).isoformat()
+        result_cache = self.result_cache
+        client = session_client_did
+        if client is None and session is not None:
+            client = f"session:{id(session)}"
+
+        if len(presentations) != len(nonces):
+            error = ValueError(
+                f"Got {len(presentations)} presentations but {len(nonces)} nonces"
+            )
+            results = [self.build_failure_response(error, verified_at)]
+            if self.audit_log is not None:
+                self.audit_log.record(results[0])
+            return {"results": results}
+
+        results = [None] * len(presentations)
+        cache_keys = [None] * len(presentations)
+        # index -> (verified claims, error); cached indexes only check key binding
+        outcomes, cached, pending = {}, set(), []
+        try:
+            async with self.admission.admit(client, cost=len(presentations)):
+                for index, nonce in enumerate(nonces):
+                    try:
+                        # Nonces are consumed before the result cache is consulted
+                        self.nonce_store.consume(nonce)
+                        cache_keys[index] = self._result_cache_key(
+                            format, presentations[index]
+                        )
+                        if cache_keys[index] is not None:
+                            verified_claims = result_cache.get(cache_keys[index])
+                            if verified_claims is not None:
+                                self.handler.verify_key_binding(
+                                    format,
+                                    presentations[index],
+                                    verified_claims,
+                                    {"nonce": nonce, "aud": self.did},
+                                )
+                                outcomes[index] = (verified_claims, None)
+                                cached.add(index)
+                                continue
+                        pending.append(index)
+                    except Exception as e:
+                        results[index] = self.build_failure_response(e, verified_at)
+
+                if pending:
+                    try:
+                        verified = await self.handler.averify_many(
+                            cred_format=format,
+                            presentations=[presentations[index] for index in pending],
+                            get_issuer_key_callback=self.get_issuer_public_key,
+                            options=[
+                                {"nonce": nonces[index], "aud": self.did}
+                                for index in pending
+                            ],
+                        )
+                    except Exception as e:
+                        verified = [(None, e)] * len(pending)
+                    outcomes.update(zip(pending, verified))
+        except OverloadedError as e:
+            for index in range(len(presentations)):
+                results[index] = self.build_failure_response(e, verified_at)
+
+        for index, (verified_claims, error) in sorted(outcomes.items()):
+            try:
+                if error is not None:
+                    raise error
+                if cache_keys[index] is not None and index not in cached:
+                    result_cache.put(cache_keys[index], verified_claims)
+                await self.load_status_list(verified_claims)
+                results[index] = self.build_success_response(
+                    verified_claims, verified_at, format, session_client_did
+                )
+                self._remember_session(session, results[index], verified_claims)
+            except Exception as e:
+                results[index] = self.build_failure_response(e, verified_at)
+
+        if self.audit_log is not None:
+            for response in results:
+                self.audit_log.record(response)
+        return {"results": results}
+
+
+def _register_tools(app, mcp, Context):
+    @mcp.tool()
+    def get_server_did() -> dict:
+        """Returns the server's DID for credential binding."""
+        return app.get_server_did()
+
+    @mcp.tool()
+    def list_required_credentials() -> dict:
+        """
+        Returns requirements for credential presentation including nonce for replay protection.
+        """
+        return app.list_required_credentials()
+
+    @mcp.tool()
+    def get_metrics(format: str = "json") -> dict:
+        """
+        Returns verification metrics: per-stage latency histograms, result counts
+        per error code, cache hit ratios and verification queue depth.
+        Use format="prometheus" for the Prometheus text exposition format.
+        """
+        return app.get_metrics(format)
+
+    @mcp.tool()
+    async def submit_credential(
+        ctx: Context, format: str, presentation: str, nonce: str
+    ) -> dict:
+        """
+        Submits a credential presentation for verification.
+        """
+        return await app.submit_credential(
+            format,
+            presentation,
+            nonce,
+            session=ctx.session,
+            session_client_did=app.session_client_did(ctx),
+        )
+
+    @mcp.tool()
+    async def submit_credentials_batch(
+        ctx: Context, format: str, presentations: list[str], nonces: list[str]
+    ) -> dict:
+        """
+        Submits a batch of credential presentations for verification.
+        Each presentation is paired with the nonce at the same position and gets
+        its own success or failure result; one bad item does not fail the batch.
+        """
+        return await app.submit_credentials_batch(
+            format,
+            presentations,
+            nonces,
+            session=ctx.session,
+            session_client_did=app.session_client_did(ctx),
+        )
+
+
+def create_app(config: ServerConfig | None = None) -> CredentialCheckingServer:
+    """
+    Builds the credential checking server. Importing this module has no side
+    effects; the trust registry, TMCP identity and MCP server are created here.
+    Raises FileNotFoundError if the trust registry file does not exist.
+    """
+    config = config or ServerConfig()
+    start = time.perf_counter()
+
+    from mcp.server.fastmcp import Context, FastMCP
+    from tmcp import TmcpManager
+
+    app = CredentialCheckingServer(config)
+
+    app.tmcp_manager = TmcpManager(transport=f"http://localhost:{config.port}/mcp")
+    app.mcp = FastMCP(
+        name="tmcp-credential-checking-server",
+        host=config.host,
+        port=config.port,
+        transport_manager=app.tmcp_manager,
+    )
+    _register_tools(app, app.mcp, Context)
+    app.startup_timings["create_app"] = time.perf_counter() - start
+
+    if config.warm_up:
+        app.warm_up()
+
+    if app.metrics is not None:
+        for phase in app.startup_timings:
+            app.metrics.register_gauge(
+                "startup_seconds",
+                lambda phase=phase: app.startup_timings[phase],
+                phase=phase,
+            )
+
+    return app
@@ -0,0 +1,79 @@
+import threading
+import time
+import weakref
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class SessionCredential:
+    """A credential verified on a session, bound to the session's client DID."""
+
+    client_did: str
+    issuer_did: str
+    policy: str | None
+    claims: dict
+    verified_at: float
+    expires_at: float | None
+
+
+class SessionCredentialStore:
+    """
+    Verified credentials per client session.
+
+    Entries are keyed by the session object and held weakly, so they are evicted
+    when the session closes and is released. An entry also expires with its
+    credential (`exp`) or `ttl` seconds after verification, whichever is first.
+    Lookups are O(1).
+    """
+
+    def __init__(self, ttl=3600):
+        self.ttl = ttl
+        self._entries = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def put(self, session, client_did, verified_claims, policy=None):
+        """Records the verified claims for a session, replacing any earlier credential."""
+        now = time.time()
+        expires_at = now + self.ttl if self.ttl else None
+        exp = verified_claims.get("exp")
+        if isinstance(exp, (int, float)):
+            expires_at = exp if expires_at is None else min(expires_at, exp)
+        entry = SessionCredential(
+            client_did=client_did,
+            issuer_did=verified_claims.get("iss"),
+            policy=policy,
+            claims=verified_claims,
+            verified_at=now,
+            expires_at=expires_at,
+        )
+        with self._lock:
+            self._entries[session] = entry
+        return entry
+
+    def get(self, session, policy=None):
+        """
+        Returns the session's unexpired credential, or None. With `policy`, only
+        a credential that met that policy is returned.
+        """
+        with self._lock:
+            entry = self._entries.get(session)
+            if entry is not None and (
+                entry.expires_at is not None and entry.expires_at <= time.time()
+            ):
+                del self._entries[session]
+                entry = None
+            if entry is None or (policy is not None and entry.policy != policy):
+                self.misses += 1
+                return None
+            self.hits += 1
+            return entry
+
+    def evict(self, session):
+        """Forgets the session's credential, e.g. when the session is closed."""
+        with self._lock:
+            self._entries.pop(session, None)
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,357 @@
+import base64
+import json
+import logging
+import os
+import threading
+import time
+import urllib.request
+import zlib
+from collections import OrderedDict
+from concurrent.futures import Future
+from functools import partial
+
+from ..credential_handler.errors import (
+    CredentialStatusError,
+    RevokedCredentialError,
+    StatusUnavailableError,
+    SuspendedCredentialError,
+)
+
+logger = logging.getLogger(__name__)
+
+# Status values of the Token Status List format
+STATUS_VALID = 0x00
+STATUS_INVALID = 0x01
+STATUS_SUSPENDED = 0x02
+
+# Limits on a fetched status list document and on its decompressed list
+MAX_DOCUMENT_BYTES = 4 * 1024 * 1024
+MAX_LIST_BYTES = 16 * 1024 * 1024
+
+
+class StatusList:
+    """
+    Compact status list: `bits` (1, 2, 4 or 8) status bits per credential,
+    packed least significant bit first. One million credentials take 125 KB
+    with 1 bit per status, and a lookup is a single byte read.
+    """
+
+    def __init__(self, data, bits=1):
+        if bits not in (1, 2, 4, 8):
+            raise ValueError(f"Unsupported status list bits: {bits}")
+        self.bits = bits
+        self.data = data
+        self._mask = (1 << bits) - 1
+
+    @classmethod
+    def create(cls, size, bits=1):
+        """Returns an empty, writable status list for `size` credentials."""
+        return cls(bytearray((size * bits + 7) // 8), bits)
+
+    @classmethod
+    def decode(cls, status_list, max_bytes=MAX_LIST_BYTES):
+        """
+        Decodes a {"bits": ..., "lst": ...} object, decompressing the list once.
+        Raises ValueError if the list decompresses to more than `max_bytes`.
+        """
+        lst = status_list["lst"]
+        decompressor = zlib.decompressobj()
+        data = decompressor.decompress(
+            base64.urlsafe_b64decode(lst + "=" * (-len(lst) % 4)), max_bytes + 1
+        )
+        if len(data) > max_bytes or decompressor.unconsumed_tail:
+            raise ValueError(f"Status list is larger than {max_bytes} bytes")
+        if not decompressor.eof:
+            raise ValueError("Status list is truncated")
+        return cls(data, status_list["bits"])
+
+    def encode(self):
+        """Returns the {"bits": ..., "lst": ...} object for this list."""
+        lst = base64.urlsafe_b64encode(zlib.compress(bytes(self.data), 9))
+        return {"bits": self.bits, "lst": lst.rstrip(b"=").decode("ascii")}
+
+    def __len__(self):
+        return len(self.data) * 8 // self.bits
+
+    def __getitem__(self, index):
+        if not 0 <= index < len(self):
+            raise IndexError(f"Status list index {index} is out of range")
+        position = index * self.bits
+        return (self.data[position >> 3] >> (position & 7)) & self._mask
+
+    def __setitem__(self, index, status):
+        if not 0 <= index < len(self):
+            raise IndexError(f"Status list index {index} is out of range")
+        if not 0 <= status <= self._mask:
+            raise ValueError(f"Status {status} does not fit in {self.bits} bits")
+        position = index * self.bits
+        shift = position & 7
+        byte = self.data[position >> 3] & ~(self._mask << shift)
+        self.data[position >> 3] = byte | (status << shift)
+
+
+def status_reference(verified_claims):
+    """Returns the (uri, index) status list entry a credential references, or None."""
+    status = verified_claims.get("status")
+    if not isinstance(status, dict) or "status_list" not in status:
+        return None
+    entry = status["status_list"]
+    if (
+        not isinstance(entry, dict)
+        or not isinstance(entry.get("uri"), str)
+        or not isinstance(entry.get("idx"), int)
+        or entry["idx"] < 0
+    ):
+        raise CredentialStatusError("Malformed 'status_list' reference in credential")
+    return entry["uri"], entry["idx"]
+
+
+def _is_local(uri):
+    return uri.startswith("file://") or "://" not in uri
+
+
+def fetch_status_list(uri, timeout=10, max_bytes=MAX_DOCUMENT_BYTES):
+    """
+    Default fetcher for remote status lists: fetches HTTP(S) URIs. Raises
+    ValueError if the response is larger than `max_bytes`.
+    """
+    if not uri.startswith(("https://", "http://")):
+        raise ValueError(f"Unsupported status list URI '{uri}'")
+    request = urllib.request.Request(
+        uri, headers={"Accept": "application/statuslist+jwt"}
+    )
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        document = response.read(max_bytes + 1)
+    if len(document) > max_bytes:
+        raise ValueError(f"Status list document is larger than {max_bytes} bytes")
+    return document
+
+
+class StatusListCache:
+    """
+    Status lists referenced by credentials, keyed by URI.
+
+    Each list is fetched and decompressed once, then refreshed in the
+    background every `ttl` seconds; a failed refresh keeps the previous list.
+    Credentials whose list cannot be loaded are rejected; the failure is
+    remembered for `retry_after` seconds, and concurrent loads of one list
+    share a single fetch.
+
+    Remote URIs are loaded with `fetcher` (HTTP(S) by default) and must be
+    status list tokens (JWT with `typ` "statuslist+jwt"), whose signature is
+    checked against the key of their issuer. `file://` URIs and paths are read
+    only from `directory` (disabled when None); those may also be a plain JSON
+    object with a "status_list" member.
+
+    Documents larger than `max_document_bytes`, and lists that decompress to
+    more than `max_list_bytes`, are rejected.
+    """
+
+    def __init__(
+        self,
+        get_issuer_key=None,
+        fetcher=None,
+        ttl=300,
+        max_lists=1024,
+        directory=None,
+        retry_after=30,
+        max_document_bytes=MAX_DOCUMENT_BYTES,
+        max_list_bytes=MAX_LIST_BYTES,
+    ):
+        self._get_issuer_key = get_issuer_key
+        self._fetcher = fetcher or partial(
+            fetch_status_list, max_bytes=max_document_bytes
+        )
+        self.ttl = ttl
+        self.max_lists = max_lists
+        self.directory = os.path.realpath(directory) if directory else None
+        self.retry_after = retry_after
+        self.max_document_bytes = max_document_bytes
+        self.max_list_bytes = max_list_bytes
+        # uri -> (StatusList, loaded_at)
+        self._lists = OrderedDict()
+        # uri -> (error message, retry_at) of lists that failed to load
+        self._failures = OrderedDict()
+        self._loading = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._refresher = None
+
+    def __len__(self):
+        return len(self._lists)
+
+    @property
+    def size(self):
+        """Bytes held by the loaded lists."""
+        return sum(len(status_list.data) for status_list, _ in self._lists.values())
+
+    def needs_load(self, verified_claims):
+        """Tells whether checking these claims would fetch a status list first."""
+        try:
+            reference = status_reference(verified_claims)
+        except CredentialStatusError:
+            return False
+        return reference is not None and reference[0] not in self._lists
+
+    def check(self, verified_claims):
+        """Raises CredentialStatusError if the credential is revoked or suspended."""
+        reference = status_reference(verified_claims)
+        if reference is None:
+            return
+        uri, index = reference
+        status_list = self.get(uri)
+        try:
+            status = status_list[index]
+        except IndexError as e:
+            raise CredentialStatusError(str(e), status_list=uri) from None
+        if status == STATUS_VALID:
+            return
+        if status == STATUS_SUSPENDED:
+            raise SuspendedCredentialError(
+                "Credential is suspended", status_list=uri, status=status
+            )
+        raise RevokedCredentialError(
+            "Credential has been revoked", status_list=uri, status=status
+        )
+
+    def get(self, uri):
+        """
+        Returns the status list at `uri`, loading it on first use. Raises
+        StatusUnavailableError if it cannot be loaded.
+        """
+        with self._lock:
+            entry = self._lists.get(uri)
+            if entry is not None:
+                self._lists.move_to_end(uri)
+                return entry[0]
+            failure = self._failures.get(uri)
+            if failure is not None and failure[1] > time.monotonic():
+                raise StatusUnavailableError(failure[0], status_list=uri)
+            future = self._loading.get(uri)
+            leader = future is None
+            if leader:
+                future = self._loading[uri] = Future()
+
+        if not leader:
+            status_list, error = future.result()
+        else:
+            status_list, error = None, f"Status list '{uri}' could not be loaded"
+            try:
+                status_list = self._load(uri)
+            except Exception as e:
+                error = f"{error}: {e}"
+            finally:
+                self._finish_load(uri, future, status_list, error)
+
+        if status_list is None:
+            raise StatusUnavailableError(error, status_list=uri)
+        return status_list
+
+    def _finish_load(self, uri, future, status_list, error):
+        with self._lock:
+            del self._loading[uri]
+            if status_list is not None:
+                self._failures.pop(uri, None)
+                self._lists[uri] = (status_list, time.monotonic())
+                self._lists.move_to_end(uri)
+                while len(self._lists) > self.max_lists:
+                    self._lists.popitem(last=False)
+            else:
+                self._failures[uri] = (error, time.monotonic() + self.retry_after)
+                self._failures.move_to_end(uri)
+                while len(self._failures) > self.max_lists:
+                    self._failures.popitem(last=False)
+        future.set_result((status_list, error))
+
+    def _read_local(self, uri):
+        if self.directory is None:
+            raise ValueError("Local status lists are disabled")
+        path = os.path.realpath(
+            os.path.join(self.directory, uri.removeprefix("file://"))
+        )
+        if os.path.commonpath([path, self.directory]) != self.directory:
+            raise ValueError("Path is outside the status list directory")
+        with open(path, "rb") as f:
+            return f.read(self.max_document_bytes + 1)
+
+    def _load(self, uri):
+        local = _is_local(uri)
+        document = self._read_local(uri) if local else self._fetcher(uri)
+        if len(document) > self.max_document_bytes:
+            raise ValueError(
+                f"Status list document is larger than {self.max_document_bytes} bytes"
+            )
+        if isinstance(document, bytes):
+            document = document.decode("utf-8")
+        document = document.strip()
+        if not document.startswith("{"):
+            payload = self._verify_token(document)
+        elif local:
+            payload = json.loads(document)
+        else:
+            raise ValueError("Remote status lists must be signed status list tokens")
+        if payload.get("sub", uri) != uri:
+            raise ValueError(f"Status list is for '{payload['sub']}'")
+        return StatusList.decode(payload["status_list"], self.max_list_bytes)
+
+    def _verify_token(self, token):
+        from jwcrypto.jws import JWS
+
+        if self._get_issuer_key is None:
+            raise ValueError("No issuer key resolver to verify status list tokens")
+        jws = JWS()
+        jws.deserialize(token)
+        header = jws.jose_header
+        if header.get("typ") != "statuslist+jwt":
+            raise ValueError(f"Unexpected status list token type '{header.get('typ')}'")
+        # The issuer is read before the signature is checked against its key
+        payload = json.loads(jws.objects["payload"])
+        jws.verify(self._get_issuer_key(payload.get("iss"), header))
+        exp = payload.get("exp")
+        if isinstance(exp, (int, float)) and exp <= time.time():
+            raise ValueError("Status list token has expired")
+        return payload
+
+    def refresh_stale(self):
+        """Reloads lists older than `ttl`. Returns the number of lists refreshed."""
+        now = time.monotonic()
+        with self._lock:
+            stale = [
+                uri
+                for uri, (_, loaded_at) in self._lists.items()
+                if now - loaded_at >= self.ttl
+            ]
+        refreshed = 0
+        for uri in stale:
+            try:
+                status_list = self._load(uri)
+            except Exception as e:
+                logger.warning(
+                    "Status list refresh failed, keeping previous list %s: %s", uri, e
+                )
+                continue
+            with self._lock:
+                if uri in self._lists:
+                    self._lists[uri] = (status_list, time.monotonic())
+                    refreshed += 1
+        return refreshed
+
+    def start_refreshing(self):
+        """Starts a background thread that refreshes stale lists."""
+        if self._refresher is not None:
+            return
+        self._stop.clear()
+        self._refresher = threading.Thread(
+            target=self._refresh, name="status-list-refresher", daemon=True
+        )
+        self._refresher.start()
+
+    def stop_refreshing(self):
+        if self._refresher is not None:
+            self._stop.set()
+            self._refresher.join()
+            self._refresher = None
+
+    def _refresh(self):
+        while not self._stop.wait(max(1.0, self.ttl / 4)):
+            self.refresh_stale()
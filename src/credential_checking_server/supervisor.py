@@ -0,0 +1,187 @@
+import dataclasses
+import logging
+import os
+import shutil
+import signal
+import socket
+import tempfile
+import time
+
+from .server import ServerConfig, create_app
+
+logger = logging.getLogger(__name__)
+
+
+def shared_state_config(config: ServerConfig, state_dir: str) -> ServerConfig:
+    """
+    Returns `config` with nonces, and the result cache when enabled, moved to
+    SQLite files in `state_dir` unless shared store paths are already set.
+    In-memory stores would give every worker its own view of the state, and
+    each worker would verify every credential's issuer signature once itself.
+    """
+    changes = {}
+    if not config.nonce_store_path:
+        changes["nonce_store_path"] = os.path.join(state_dir, "nonces.sqlite3")
+    if config.result_cache_ttl > 0 and not config.result_cache_path:
+        changes["result_cache_path"] = os.path.join(state_dir, "results.sqlite3")
+    return dataclasses.replace(config, **changes)
+
+
+class Supervisor:
+    """
+    Pre-forks `config.workers` server processes that share one listening socket.
+
+    The app is built once in the supervisor and inherited by each worker, which
+    reopens its SQLite stores and starts its own event loop and verification
+    pool. Nonces and verified results are shared through SQLite; each worker
+    watches the trust registry file itself.
+
+    Signals:
+    - SIGHUP: reload the trust registry and replace all workers gracefully.
+    - SIGTERM / SIGINT: stop workers gracefully and exit.
+
+    Workers that exit, including after `worker_max_requests` requests, are replaced.
+    """
+
+    def __init__(self, config: ServerConfig, graceful_timeout=30.0):
+        if not hasattr(os, "fork"):
+            raise RuntimeError("Multi-worker mode requires os.fork()")
+        self.config = config
+        self.graceful_timeout = graceful_timeout
+        self.workers = {}
+        self.app = None
+        self._socket = None
+        self._state_dir = None
+        self._stopping = False
+        self._reload_requested = False
+
+    def run(self):
+        """Binds the socket, starts the workers and supervises them until stopped."""
+        config = self.config
+        if not config.nonce_store_path or (
+            config.result_cache_ttl > 0 and not config.result_cache_path
+        ):
+            self._state_dir = tempfile.mkdtemp(prefix="tmcp-state-")
+            config = shared_state_config(config, self._state_dir)
+
+        # Worker pools cannot be carried across fork, so they start in each worker
+        self.app = create_app(dataclasses.replace(config, warm_up=False))
+        if config.warm_up:
+            self.app.warm_up(start_workers=False)
+
+        self._socket = socket.create_server(
+            (config.host, config.port), backlog=2048, reuse_port=False
+        )
+        logger.info(
+            "Supervisor %d listening on %s:%d with %d workers",
+            os.getpid(),
+            config.host,
+            config.port,
+            config.workers,
+        )
+
+        signal.signal(signal.SIGHUP, self._request_reload)
+        signal.signal(signal.SIGTERM, self._request_stop)
+        signal.signal(signal.SIGINT, self._request_stop)
+
+        try:
+            for _ in range(config.workers):
+                self._spawn()
+            while not self._stopping:
+                if self._reload_requested:
+                    self._reload_requested = False
+                    self._reload()
+                self._reap()
+                time.sleep(0.2)
+        finally:
+            self._stop_workers(list(self.workers))
+            self._socket.close()
+            self.app.close()
+            if self._state_dir:
+                shutil.rmtree(self._state_dir, ignore_errors=True)
+
+    def _request_reload(self, signum, frame):
+        self._reload_requested = True
+
+    def _request_stop(self, signum, frame):
+        self._stopping = True
+
+    def _spawn(self):
+        pid = os.fork()
+        if pid:
+            self.workers[pid] = time.monotonic()
+            return pid
+
+        # Worker process
+        exit_code = 0
+        try:
+            for signum in (signal.SIGHUP, signal.SIGTERM, signal.SIGINT):
+                signal.signal(signum, signal.SIG_DFL)
+            self.app.after_fork(start_workers=self.config.warm_up)
+            self.app.serve(
+                [self._socket], limit_max_requests=self.config.worker_max_requests
+            )
+        except BaseException:
+            logger.exception("Worker %d failed", os.getpid())
+            exit_code = 1
+        finally:
+            os._exit(exit_code)
+
+    def _reap(self):
+        while self.workers:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            started_at = self.workers.pop(pid, None)
+            if started_at is None or self._stopping:
+                continue
+            logger.info(
+                "Worker %d exited with status %d, replacing it",
+                pid,
+                os.waitstatus_to_exitcode(status),
+            )
+            # Back off when workers die right after starting
+            if time.monotonic() - started_at < 1.0:
+                time.sleep(1.0)
+            self._spawn()
+
+    def _reload(self):
+        """Replaces every worker: new ones start serving before old ones drain."""
+        logger.info("Reloading workers")
+        self.app.trust_registry.reload_if_changed()
+        old_workers = list(self.workers)
+        for _ in range(self.config.workers):
+            self._spawn()
+        self._stop_workers(old_workers)
+
+    def _stop_workers(self, pids):
+        for pid in pids:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+        deadline = time.monotonic() + self.graceful_timeout
+        remaining = set(pids)
+        while remaining and time.monotonic() < deadline:
+            for pid in list(remaining):
+                try:
+                    done, _ = os.waitpid(pid, os.WNOHANG)
+                except ChildProcessError:
+                    done = pid
+                if done:
+                    remaining.discard(pid)
+                    self.workers.pop(pid, None)
+            time.sleep(0.05)
+
+        for pid in remaining:
+            logger.warning("Worker %d did not stop in time, killing it", pid)
+            try:
+                os.kill(pid, signal.SIGKILL)
+                os.waitpid(pid, 0)
+            except (ProcessLookupError, ChildProcessError):
+                pass
+            self.workers.pop(pid, None)
@@ -0,0 +1,178 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+
+from ..credential_handler.errors import InvalidIssuerError
+
+logger = logging.getLogger(__name__)
+
+
+class RegistrySnapshot:
+    """
+    Immutable, indexed view of the trusted issuers loaded from one version of
+    the registry file. Keys are parsed once, when the snapshot is built.
+    """
+
+    def __init__(self, registry):
+        from jwcrypto.jwk import JWK
+
+        # Identifies the registry contents, the same in every worker that loads them
+        self.version = hashlib.sha256(
+            json.dumps(registry, sort_keys=True).encode("utf-8")
+        ).hexdigest()
+        self.issuers = {}
+        self.keys = {}
+        # Issuers whose keys have a `kid`; a `kid` they name must be one of them,
+        # without one the first key is used
+        self.issuers_with_kids = set()
+
+        for entry in _issuer_entries(registry):
+            did = entry["did"]
+            self.issuers[did] = {
+                "did": did,
+                "name": entry.get("name", "Trusted Issuer"),
+                "description": entry.get("description", "Registered credential issuer"),
+            }
+            for jwk in entry["keys"]:
+                key = JWK(**jwk)
+                # The first key of an issuer is its default for JWTs without a `kid`
+                self.keys.setdefault((did, None), key)
+                if jwk.get("kid"):
+                    self.keys[(did, jwk["kid"])] = key
+                    self.issuers_with_kids.add(did)
+
+        self.issuer_dids = frozenset(self.issuers)
+        self.trusted_issuers = tuple(self.issuers.values())
+
+    def resolve(self, issuer_did, header_parameters=None):
+        """
+        Returns the issuer's public key, raising InvalidIssuerError if the issuer
+        is not trusted or publishes key IDs and `kid` is none of them.
+        """
+        kid = (header_parameters or {}).get("kid")
+        key = self.keys.get((issuer_did, kid))
+        if key is not None:
+            return key
+        if kid is not None and issuer_did in self.issuers_with_kids:
+            raise InvalidIssuerError(
+                f"Issuer '{issuer_did}' has no key '{kid}'",
+                issuer_did=issuer_did,
+                kid=kid,
+            )
+        key = self.keys.get((issuer_did, None))
+        if key is None:
+            raise InvalidIssuerError(
+                f"Issuer '{issuer_did}' is not trusted", issuer_did=issuer_did
+            )
+        return key
+
+
+def _issuer_entries(registry):
+    """
+    Normalizes the registry file layouts into issuer entries. Supported layouts:
+    - single issuer: {"issuer_did": ..., "public_key": {...}, "name": ...}
+    - multiple issuers: {"issuers": [{"did": ..., "keys": [{...}, ...], "name": ...}]}
+    """
+    if "issuers" not in registry:
+        registry = {
+            "issuers": [
+                {
+                    "did": registry["issuer_did"],
+                    "name": registry.get("name", "Trusted Issuer"),
+                    "keys": [registry["public_key"]],
+                }
+            ]
+        }
+
+    for entry in registry["issuers"]:
+        keys = entry.get("keys")
+        if keys is None:
+            keys = [entry["public_key"]]
+        yield {**entry, "keys": keys}
+
+
+class TrustRegistry:
+    """
+    Trusted issuer registry backed by a JSON file and reloaded when it changes.
+
+    Reloads build a complete new snapshot before swapping it in, so readers
+    always see a consistent set of issuers and keys. A file that fails to load
+    leaves the current snapshot in place.
+    """
+
+    def __init__(self, path, poll_interval=2.0):
+        self.path = path
+        self.poll_interval = poll_interval
+        self._listeners = []
+        self._stat = None
+        self._stop = threading.Event()
+        self._watcher = None
+        self._snapshot = self._load()
+
+    @property
+    def snapshot(self):
+        return self._snapshot
+
+    def resolve(self, issuer_did, header_parameters=None):
+        """Returns the issuer's public key, raising ValueError if the issuer is not trusted."""
+        return self._snapshot.resolve(issuer_did, header_parameters)
+
+    def __contains__(self, issuer_did):
+        return issuer_did in self._snapshot.issuers
+
+    def add_reload_listener(self, listener):
+        """Registers `listener(snapshot)`, called after each successful reload."""
+        self._listeners.append(listener)
+
+    def _load(self):
+        stat = os.stat(self.path)
+        with open(self.path, "r") as f:
+            snapshot = RegistrySnapshot(json.load(f))
+        self._stat = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def reload_if_changed(self):
+        """Reloads the registry if the file changed. Returns True if a new snapshot was swapped in."""
+        try:
+            stat = os.stat(self.path)
+            if (stat.st_mtime_ns, stat.st_size) == self._stat:
+                return False
+            # Remember this version even if it fails to load, so it is retried
+            # only once the file changes again.
+            self._stat = (stat.st_mtime_ns, stat.st_size)
+            snapshot = self._load()
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(
+                "Trust registry reload failed, keeping previous registry: %s", e
+            )
+            return False
+
+        self._snapshot = snapshot
+        for listener in self._listeners:
+            listener(snapshot)
+        logger.info(
+            "Trust registry reloaded: %d trusted issuers.", len(snapshot.issuers)
+        )
+        return True
+
+    def start_watching(self):
+        """Starts a background thread that polls the registry file for changes."""
+        if self._watcher is not None:
+            return
+        self._stop.clear()
+        self._watcher = threading.Thread(
+            target=self._watch, name="trust-registry-watcher", daemon=True
+        )
+        self._watcher.start()
+
+    def stop_watching(self):
+        if self._watcher is not None:
+            self._stop.set()
+            self._watcher.join()
+            self._watcher = None
+
+    def _watch(self):
+        while not self._stop.wait(self.poll_interval):
+            self.reload_if_changed()
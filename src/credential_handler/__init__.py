@@ -1,2 +1,19 @@
+from .async_handler import AsyncBaseCredentialHandler, SyncHandlerAdapter
+from .errors import ERROR_CODES, VerificationError, error_code
+from .executor import VerificationExecutor
+from .key_pool import KEY_TYPES, KeyPool, generate_key
 from .handler import CredentialHandler
-from .sd_jwt_handler import SdJwtHandler
+from .metrics import Metrics
+
+
+def __getattr__(name):
+    # Format handlers pull in their crypto libraries, so import them on first use
+    if name in ("SdJwtHandler", "SdJwtPresentationBuilder"):
+        from . import sd_jwt_handler
+
+        return getattr(sd_jwt_handler, name)
+    if name == "CborSdHandler":
+        from . import cbor_sd_handler
+
+        return cbor_sd_handler.CborSdHandler
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,189 @@
+import asyncio
+import functools
+import inspect
+from abc import ABC, abstractmethod
+
+from .base_handler import expand_options
+from .executor import VerificationExecutor
+
+
+def memoize_async_issuer_key_callback(get_issuer_key_callback):
+    """
+    Wraps a key-resolution callback, sync or async, into an async callback that
+    resolves each (issuer, kid) pair once. Concurrent lookups for the same pair
+    share one resolution, and failures are remembered as well.
+    """
+    resolving = {}
+
+    async def callback(issuer, header_parameters):
+        cache_key = (issuer, (header_parameters or {}).get("kid"))
+        task = resolving.get(cache_key)
+        if task is None:
+            task = resolving[cache_key] = asyncio.ensure_future(
+                resolve_issuer_key(get_issuer_key_callback, issuer, header_parameters)
+            )
+        return await asyncio.shield(task)
+
+    return callback
+
+
+async def resolve_issuer_key(get_issuer_key_callback, issuer, header_parameters):
+    """Calls a key-resolution callback and awaits its result if it is async."""
+    key = get_issuer_key_callback(issuer, header_parameters)
+    if inspect.isawaitable(key):
+        key = await key
+    return key
+
+
+class AsyncBaseCredentialHandler(ABC):
+    """
+    Abstract base class for async credential handlers.
+    Same operations as `BaseCredentialHandler`, as coroutines. The key-resolution
+    callback passed to `averify_presentation` may be sync or async.
+    """
+
+    @property
+    @abstractmethod
+    def format_name(self):
+        """The name of the credential format this handler supports (e.g., 'sd-jwt')."""
+        pass
+
+    @abstractmethod
+    async def aissue_credential(self, user_claims, issuer_key, holder_key=None):
+        """Issues a credential."""
+        pass
+
+    @abstractmethod
+    async def acreate_presentation(
+        self, credential, disclosed_claims, holder_key=None, options=None
+    ):
+        """Creates a presentation from a credential."""
+        pass
+
+    @abstractmethod
+    async def averify_presentation(
+        self, presentation, get_issuer_key_callback, options=None
+    ):
+        """Verifies a credential presentation."""
+        pass
+
+    async def averify_many(self, presentations, get_issuer_key_callback, options=None):
+        """
+        Verifies a batch of presentations concurrently, resolving each issuer key once.
+        Returns a `(verified_claims, error)` tuple per presentation, in order.
+        """
+        presentations = list(presentations)
+        callback = memoize_async_issuer_key_callback(get_issuer_key_callback)
+
+        async def verify_one(presentation, item_options):
+            try:
+                return (
+                    await self.averify_presentation(
+                        presentation, callback, item_options
+                    ),
+                    None,
+                )
+            except Exception as e:
+                return None, e
+
+        return await asyncio.gather(
+            *(
+                verify_one(presentation, item_options)
+                for presentation, item_options in zip(
+                    presentations, expand_options(options, len(presentations))
+                )
+            )
+        )
+
+    @abstractmethod
+    async def agenerate_keys(self):
+        """Generates the necessary keys for the credential format."""
+        pass
+
+
+class SyncHandlerAdapter(AsyncBaseCredentialHandler):
+    """
+    Exposes a sync `BaseCredentialHandler` through the async interface by running
+    it on a `VerificationExecutor`.
+
+    Async key-resolution callbacks are awaited on the event loop before the
+    handler runs when the handler can name the issuer key up front (see
+    `BaseCredentialHandler.issuer_key_request`). Otherwise, on a thread executor,
+    the handler's worker thread waits for the callback to finish on the loop.
+    """
+
+    def __init__(self, handler, executor=None):
+        self.handler = handler
+        self.executor = executor or VerificationExecutor()
+
+    @property
+    def format_name(self):
+        return self.handler.format_name
+
+    async def aissue_credential(self, user_claims, issuer_key, holder_key=None):
+        return await self.executor.call(
+            self.handler.issue_credential, user_claims, issuer_key, holder_key
+        )
+
+    async def acreate_presentation(
+        self, credential, disclosed_claims, holder_key=None, options=None
+    ):
+        return await self.executor.call(
+            self.handler.create_presentation,
+            credential,
+            disclosed_claims,
+            holder_key,
+            options,
+        )
+
+    async def averify_presentation(
+        self, presentation, get_issuer_key_callback, options=None
+    ):
+        if not inspect.iscoroutinefunction(get_issuer_key_callback):
+            return await self.executor.run(
+                self.handler, presentation, get_issuer_key_callback, options
+            )
+
+        request = self.handler.issuer_key_request(presentation)
+        if request is not None:
+            issuer, header_parameters = request
+            key = await get_issuer_key_callback(issuer, header_parameters)
+            return await self.executor.run(
+                self.handler, presentation, _ResolvedIssuerKey(issuer, key), options
+            )
+
+        if self.executor.mode != "thread":
+            raise TypeError(
+                f"Handler for format '{self.format_name}' cannot resolve issuer keys "
+                f"up front; async key resolution needs a thread executor, "
+                f"not '{self.executor.mode}'."
+            )
+        loop = asyncio.get_running_loop()
+
+        def callback(issuer, header_parameters):
+            return asyncio.run_coroutine_threadsafe(
+                get_issuer_key_callback(issuer, header_parameters), loop
+            ).result()
+
+        return await self.executor.run(self.handler, presentation, callback, options)
+
+    async def agenerate_keys(self, *args, **kwargs):
+        return await self.executor.call(
+            functools.partial(self.handler.generate_keys, *args, **kwargs)
+        )
+
+
+class _ResolvedIssuerKey:
+    """Sync key-resolution callback returning a key resolved ahead of verification."""
+
+    def __init__(self, issuer, key):
+        self.issuer = issuer
+        self.key = key
+
+    def __call__(self, issuer, header_parameters):
+        if issuer != self.issuer:
+            raise ValueError(
+                f"Presentation issuer '{issuer}' does not match the resolved "
+                f"issuer '{self.issuer}'"
+            )
+        return self.key
@@ -1,6 +1,54 @@
 from abc import ABC, abstractmethod
 
 
+def memoize_issuer_key_callback(get_issuer_key_callback):
+    """
+    Wraps a key-resolution callback so each (issuer, kid) pair is resolved once.
+    Resolution failures are remembered as well.
+    """
+    resolved = {}
+
+    def callback(issuer, header_parameters):
+        cache_key = (issuer, (header_parameters or {}).get("kid"))
+        if cache_key not in resolved:
+            try:
+                resolved[cache_key] = (
+                    get_issuer_key_callback(issuer, header_parameters),
+                    None,
+                )
+            except ValueError as e:
+                resolved[cache_key] = (None, e)
+        key, error = resolved[cache_key]
+        if error is not None:
+            raise error
+        return key
+
+    return callback
+
+
+class StaticIssuerKey:
+    """Picklable key-resolution callback that returns an already resolved JWK."""
+
+    def __init__(self, key):
+        self._key_json = key.export()
+
+    def __call__(self, issuer, header_parameters):
+        from jwcrypto.jwk import JWK
+
+        return JWK.from_json(self._key_json)
+
+
+def expand_options(options, count):
+    """Returns per-item options for a batch from a single dict or a list of dicts."""
+    if options is None or isinstance(options, dict):
+        return [options] * count
+    if len(options) != count:
+        raise ValueError(
+            f"Expected {count} option sets for the batch, got {len(options)}"
+        )
+    return list(options)
+
+
 class BaseCredentialHandler(ABC):
     """
     Abstract base class for credential handlers.
@@ -30,6 +78,76 @@ class BaseCredentialHandler(ABC):
         """Verifies a credential presentation."""
         pass
 
+    def issue_many(self, claim_sets, issuer_key, holder_keys=None):
+        """
+        Issues a credential per claim set, signed by `issuer_key` and bound to the
+        holder key at the same position in `holder_keys`, if given.
+        Yields credentials lazily, in order.
+        """
+        if holder_keys is None:
+            for user_claims in claim_sets:
+                yield self.issue_credential(user_claims, issuer_key)
+            return
+        for user_claims, holder_key in zip(claim_sets, holder_keys, strict=True):
+            yield self.issue_credential(user_claims, issuer_key, holder_key)
+
+    def verify_many(self, presentations, get_issuer_key_callback, options=None):
+        """
+        Verifies a batch of presentations, resolving each issuer key once.
+        Returns a `(verified_claims, error)` tuple per presentation, in order.
+        """
+        presentations = list(presentations)
+        callback = memoize_issuer_key_callback(get_issuer_key_callback)
+        results = []
+        for presentation, item_options in zip(
+            presentations, expand_options(options, len(presentations))
+        ):
+            try:
+                results.append(
+                    (
+                        self.verify_presentation(presentation, callback, item_options),
+                        None,
+                    )
+                )
+            except Exception as e:
+                results.append((None, e))
+        return results
+
+    def issuer_signed_part(self, presentation):
+        """
+        Returns the part of `presentation` whose verified claims do not depend on
+        the key binding, or None if the format cannot verify key binding on its
+        own. Formats returning a part must implement `verify_key_binding`.
+        """
+        return None
+
+    def verify_key_binding(self, presentation, verified_claims, options=None):
+        """
+        Verifies only the key binding of a presentation whose issuer-signed part
+        was verified before, yielding `verified_claims`.
+        """
+        raise NotImplementedError(
+            f"Handler for format '{self.format_name}' cannot verify key binding on its own"
+        )
+
+    def close(self):
+        """Releases resources the handler holds, such as background threads."""
+
+    def issuer_key_request(self, presentation):
+        """
+        Returns the `(issuer, header_parameters)` the handler will pass to the
+        key-resolution callback when verifying `presentation`, or None if it
+        cannot tell without verifying. Lets callers resolve the key ahead of time.
+        """
+        return None
+
+    def prefetch_issuer_key(self, presentation, get_issuer_key_callback):
+        """
+        Returns a key-resolution callback that can be sent to another process.
+        Formats that can resolve the issuer key up front should override this.
+        """
+        return get_issuer_key_callback
+
     @abstractmethod
     def generate_keys(self):
         """Generates the necessary keys for the credential format."""
@@ -0,0 +1,591 @@
+import base64
+import contextlib
+import hashlib
+import io
+import re
+import secrets
+import time
+from functools import lru_cache
+
+import cbor2
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519, padding, rsa
+from cryptography.hazmat.primitives.asymmetric.utils import (
+    decode_dss_signature,
+    encode_dss_signature,
+)
+from jwcrypto.common import JWException
+from jwcrypto.jwk import JWK
+from sd_jwt.common import SDObj
+
+from .base_handler import BaseCredentialHandler, StaticIssuerKey
+from .errors import (
+    InvalidAudienceError,
+    InvalidDisclosureError,
+    InvalidHolderError,
+    InvalidIssuerError,
+    InvalidNonceError,
+    InvalidSignatureError,
+    MalformedPresentationError,
+)
+from .key_pool import KEY_TYPES, generate_key
+
+_BASE64URL = re.compile(r"[A-Za-z0-9_-]*")
+
+# COSE algorithm (RFC 9053) -> (JOSE name, key type, curve, hash)
+COSE_ALGS = {
+    -7: ("ES256", "EC", "P-256", hashes.SHA256),
+    -35: ("ES384", "EC", "P-384", hashes.SHA384),
+    -36: ("ES512", "EC", "P-521", hashes.SHA512),
+    -8: ("EdDSA", "OKP", "Ed25519", None),
+    -37: ("PS256", "RSA", None, hashes.SHA256),
+}
+
+DEFAULT_ALLOWED_ALGS = tuple(name for name, *_ in COSE_ALGS.values())
+
+_COSE_ALG_IDS = {name: alg for alg, (name, *_) in COSE_ALGS.items()}
+
+_SIGNING_ALGS = {(kty, crv): alg for alg, (_, kty, crv, _) in COSE_ALGS.items()}
+
+# Curve -> (COSE curve, signature size of r and s)
+_EC_CURVES = {
+    "P-256": (ec.SECP256R1, 1, 32),
+    "P-384": (ec.SECP384R1, 2, 48),
+    "P-521": (ec.SECP521R1, 3, 66),
+}
+_COSE_EC_CURVES = {cose: name for name, (_, cose, _) in _EC_CURVES.items()}
+_COSE_ED25519 = 6
+
+# COSE header and COSE_Key labels (RFC 9052)
+_ALG, _CRIT, _KID = 1, 2, 4
+_KTY, _CRV, _X, _Y = 1, -1, -2, -3
+_KTY_OKP, _KTY_EC2 = 1, 2
+_COSE_SIGN1_TAG = 18
+
+DIGEST_ALG = "SHA-256"
+
+
+def _b64encode(data):
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(value):
+    return base64.urlsafe_b64decode(value + "=" * (-len(value) % 4))
+
+
+def _loads(data, what, max_depth=64):
+    """Decodes one CBOR item, raising MalformedPresentationError on invalid or trailing data."""
+    stream = io.BytesIO(data)
+    try:
+        decoded = cbor2.CBORDecoder(
+            stream, max_depth=max_depth, allow_duplicate_keys=False
+        ).decode()
+    except Exception:
+        raise MalformedPresentationError(f"Malformed {what}: not CBOR") from None
+    if stream.tell() != len(data):
+        raise MalformedPresentationError(f"Malformed {what}: trailing data")
+    return decoded
+
+
+def _strip_sd(value):
+    # Data elements are disclosed whole, so nested selective disclosure markers are dropped
+    if isinstance(value, dict):
+        return {
+            (key.value if isinstance(key, SDObj) else key): _strip_sd(item)
+            for key, item in value.items()
+        }
+    if isinstance(value, list):
+        return [
+            _strip_sd(item.value if isinstance(item, SDObj) else item) for item in value
+        ]
+    return value
+
+
+def _cose_key(jwk):
+    """Returns the COSE_Key of a public EC or OKP JWK (a dict or jwcrypto JWK)."""
+    if jwk.get("kty") == "EC" and jwk.get("crv") in _EC_CURVES:
+        return {
+            _KTY: _KTY_EC2,
+            _CRV: _EC_CURVES[jwk["crv"]][1],
+            _X: _b64decode(jwk["x"]),
+            _Y: _b64decode(jwk["y"]),
+        }
+    if jwk.get("kty") == "OKP" and jwk.get("crv") == "Ed25519":
+        return {_KTY: _KTY_OKP, _CRV: _COSE_ED25519, _X: _b64decode(jwk["x"])}
+    raise ValueError(
+        f"Unsupported holder key type: {jwk.get('kty')} {jwk.get('crv', '')}".strip()
+    )
+
+
+@lru_cache(maxsize=1024)
+def _device_public_key(kty, crv, x, y):
+    if kty == _KTY_EC2 and crv in _COSE_EC_CURVES:
+        curve, _, _ = _EC_CURVES[_COSE_EC_CURVES[crv]]
+        return ec.EllipticCurvePublicNumbers(
+            int.from_bytes(x, "big"), int.from_bytes(y, "big"), curve()
+        ).public_key()
+    if kty == _KTY_OKP and crv == _COSE_ED25519:
+        return ed25519.Ed25519PublicKey.from_public_bytes(x)
+    raise ValueError(f"Unsupported COSE key type {kty} curve {crv}")
+
+
+def _sign(private_key, alg, data):
+    _, key_type, curve, hash_alg = COSE_ALGS[alg]
+    if key_type == "EC":
+        r, s = decode_dss_signature(private_key.sign(data, ec.ECDSA(hash_alg())))
+        size = _EC_CURVES[curve][2]
+        return r.to_bytes(size, "big") + s.to_bytes(size, "big")
+    if key_type == "OKP":
+        return private_key.sign(data)
+    return private_key.sign(
+        data,
+        padding.PSS(mgf=padding.MGF1(hash_alg()), salt_length=hash_alg.digest_size),
+        hash_alg(),
+    )
+
+
+def _verify(public_key, alg, signature, data):
+    """Checks a COSE signature; False if it or the key does not match the algorithm."""
+    _, key_type, curve, hash_alg = COSE_ALGS[alg]
+    try:
+        if key_type == "EC":
+            curve_type, _, size = _EC_CURVES[curve]
+            if (
+                not isinstance(public_key, ec.EllipticCurvePublicKey)
+                or not isinstance(public_key.curve, curve_type)
+                or len(signature) != 2 * size
+            ):
+                return False
+            der = encode_dss_signature(
+                int.from_bytes(signature[:size], "big"),
+                int.from_bytes(signature[size:], "big"),
+            )
+            public_key.verify(der, data, ec.ECDSA(hash_alg()))
+        elif key_type == "OKP":
+            if not isinstance(public_key, ed25519.Ed25519PublicKey):
+                return False
+            public_key.verify(signature, data)
+        else:
+            if not isinstance(public_key, rsa.RSAPublicKey):
+                return False
+            public_key.verify(
+                signature,
+                data,
+                padding.PSS(
+                    mgf=padding.MGF1(hash_alg()), salt_length=hash_alg.digest_size
+                ),
+                hash_alg(),
+            )
+    except InvalidSignature:
+        return False
+    return True
+
+
+def _sig_structure(protected, payload):
+    return cbor2.dumps(["Signature1", protected, b"", payload])
+
+
+def _sign1(private_key, alg, payload, kid=None):
+    """Returns a COSE_Sign1 message as a list."""
+    header = {_ALG: alg}
+    if kid:
+        header[_KID] = kid.encode("utf-8")
+    protected = cbor2.dumps(header)
+    return [
+        protected,
+        {},
+        payload,
+        _sign(private_key, alg, _sig_structure(protected, payload)),
+    ]
+
+
+def _sd_hash(issuer_auth, items):
+    return hashlib.sha256(cbor2.dumps([issuer_auth, list(items)])).digest()
+
+
+class CborSdHandler(BaseCredentialHandler):
+    """
+    Credential handler for "cbor-sd", a compact mdoc-style format encoded in
+    CBOR and signed with COSE.
+
+    A credential is `[issuerAuth, items]`: `issuerAuth` is a COSE_Sign1 over a
+    mobile security object (MSO) holding the always-disclosed claims, the
+    holder's COSE_Key and the SHA-256 digest of every item; each item is an
+    encoded [digestID, random, elementIdentifier, elementValue] array for one
+    selectively disclosable top-level claim (claims marked with `SDObj`).
+    Nested claims are disclosed with their top-level claim.
+
+    A presentation is `[issuerAuth, disclosed items, deviceAuth]`, where
+    `deviceAuth` is a COSE_Sign1 by the holder key over the `aud`, `nonce`,
+    `iat` and a hash of the issuer signature and disclosed items. Credentials
+    and presentations travel as base64url strings; `verify_presentation` also
+    takes the raw CBOR bytes.
+
+    Issuer keys are the same JWKs the SD-JWT handler uses, resolved with the
+    same callback, and structural checks (size, item count, `alg` allowlist
+    and `trusted_issuers`) run before key resolution or signature work.
+    """
+
+    def __init__(
+        self,
+        max_presentation_size=64 * 1024,
+        max_disclosures=256,
+        allowed_algs=DEFAULT_ALLOWED_ALGS,
+        trusted_issuers=None,
+        metrics=None,
+        issuer_key_type="P-256",
+    ):
+        if issuer_key_type not in KEY_TYPES:
+            raise ValueError(
+                f"Unsupported key type: '{issuer_key_type}'. Supported key types: {list(KEY_TYPES)}"
+            )
+        self.issuer_key_type = issuer_key_type
+        self.metrics = metrics
+        self.max_presentation_size = max_presentation_size
+        self.max_disclosures = max_disclosures
+        self.allowed_algs = frozenset(allowed_algs)
+        self.trusted_issuers = trusted_issuers
+
+    @property
+    def format_name(self):
+        return "cbor-sd"
+
+    def __getstate__(self):
+        # Metrics are collected per process; workers of a process pool verify without them
+        state = self.__dict__.copy()
+        state["metrics"] = None
+        return state
+
+    def issue_credential(self, user_claims, issuer_key, holder_key=None):
+        claims, elements = {}, {}
+        for name, value in user_claims.items():
+            if isinstance(name, SDObj):
+                elements[name.value] = _strip_sd(value)
+            else:
+                claims[name] = _strip_sd(value)
+
+        # Digest IDs are shuffled so they do not reveal the order of the claims
+        digest_ids = list(range(len(elements)))
+        secrets.SystemRandom().shuffle(digest_ids)
+        items, digests = [], {}
+        for digest_id, (name, value) in zip(digest_ids, elements.items()):
+            item = cbor2.dumps([digest_id, secrets.token_bytes(16), name, value])
+            items.append(item)
+            digests[digest_id] = hashlib.sha256(item).digest()
+
+        mso = {
+            "version": "1.0",
+            "digestAlgorithm": DIGEST_ALG,
+            "valueDigests": digests,
+            "claims": claims,
+        }
+        if holder_key is not None:
+            mso["deviceKey"] = _cose_key(holder_key.export_public(as_dict=True))
+
+        key_type = issuer_key.get("kty")
+        curve = issuer_key.get("crv") if key_type in ("EC", "OKP") else None
+        try:
+            alg = _SIGNING_ALGS[(key_type, curve)]
+        except KeyError:
+            raise ValueError(
+                f"Unsupported key type for signing: {key_type} {curve or ''}".strip()
+            ) from None
+        issuer_auth = _sign1(
+            issuer_key.get_op_key("sign"),
+            alg,
+            cbor2.dumps(mso),
+            issuer_key.get("kid"),
+        )
+        return _b64encode(
+            cbor2.dumps([cbor2.CBORTag(_COSE_SIGN1_TAG, issuer_auth), items])
+        )
+
+    def create_presentation(
+        self, credential, disclosed_claims, holder_key=None, options=None
+    ):
+        """
+        Presents the items of the top-level claims selected in `disclosed_claims`
+        (a truthy value discloses the claim); with a `nonce` and `aud` in
+        `options`, the presentation is signed with `holder_key`.
+        """
+        options = options or {}
+        issuer_auth, items = self._decode(credential, "credential", 2)
+        selected = [
+            item
+            for item in items
+            if disclosed_claims.get(_loads(item, "credential item")[2])
+        ]
+
+        device_auth = None
+        nonce, aud = options.get("nonce"), options.get("aud")
+        if nonce is not None or aud is not None:
+            if holder_key is None:
+                raise ValueError("A holder key is needed to sign for a nonce and aud")
+            payload = cbor2.dumps(
+                {
+                    "aud": aud,
+                    "nonce": nonce,
+                    "iat": int(time.time()),
+                    "sd_hash": _sd_hash(issuer_auth, selected),
+                }
+            )
+            device_alg = _SIGNING_ALGS[(holder_key.get("kty"), holder_key.get("crv"))]
+            device_auth = _sign1(holder_key.get_op_key("sign"), device_alg, payload)
+
+        return _b64encode(cbor2.dumps([issuer_auth, selected, device_auth]))
+
+    def verify_presentation(self, presentation, get_issuer_key_callback, options=None):
+        options = options or {}
+        aud, nonce = options.get("aud"), options.get("nonce")
+        metrics = self.metrics
+
+        def stage(name):
+            if metrics is None:
+                return contextlib.nullcontext()
+            return metrics.time("verification_stage_seconds", stage=name)
+
+        with stage("prevalidate"):
+            issuer_auth, items, device_auth, header, mso = self.prevalidate(
+                presentation
+            )
+
+        start = time.perf_counter()
+        issuer_key = get_issuer_key_callback(mso["claims"].get("iss"), header)
+        if metrics is not None:
+            metrics.observe(
+                "verification_stage_seconds",
+                time.perf_counter() - start,
+                stage="key_resolution",
+            )
+
+        with stage("issuer_signature"):
+            try:
+                issuer_public_key = issuer_key.get_op_key("verify")
+            except (KeyError, ValueError, TypeError, AttributeError, JWException) as e:
+                raise InvalidIssuerError(f"Unusable issuer key: {e}") from None
+            protected, _, payload, signature = issuer_auth.value
+            if not _verify(
+                issuer_public_key,
+                _COSE_ALG_IDS[header["alg"]],
+                signature,
+                _sig_structure(protected, payload),
+            ):
+                raise InvalidSignatureError("Issuer signature verification failed")
+
+        if aud or nonce:
+            if not (aud and nonce):
+                raise ValueError(
+                    "Either both expected_aud and expected_nonce must be provided or both must be None"
+                )
+            with stage("device_signature"):
+                self._verify_device_auth(
+                    mso, issuer_auth, items, device_auth, aud, nonce
+                )
+
+        with stage("claims"):
+            claims = dict(mso["claims"])
+            value_digests = mso["valueDigests"]
+            seen = set()
+            for item in items:
+                element = _loads(item, "item")
+                if (
+                    not isinstance(element, list)
+                    or len(element) != 4
+                    or type(element[0]) is not int
+                ):
+                    raise InvalidDisclosureError("Invalid disclosure: not an item")
+                digest_id, _, name, value = element
+                if value_digests.get(digest_id) != hashlib.sha256(item).digest():
+                    raise InvalidDisclosureError(
+                        "Invalid disclosure: item digest does not match the MSO"
+                    )
+                if digest_id in seen:
+                    raise InvalidDisclosureError(
+                        f"Invalid disclosure: duplicate item {digest_id}"
+                    )
+                seen.add(digest_id)
+                if not isinstance(name, str) or name in claims:
+                    raise InvalidDisclosureError(
+                        f"Invalid disclosure: claim name {name!r}"
+                    )
+                claims[name] = value
+            return claims
+
+    def _verify_device_auth(self, mso, issuer_auth, items, device_auth, aud, nonce):
+        if device_auth is None:
+            raise MalformedPresentationError("Presentation has no device signature")
+        device_key = mso.get("deviceKey")
+        if not isinstance(device_key, dict):
+            raise InvalidHolderError("No holder public key ('deviceKey') in MSO")
+
+        protected, payload, signature = self._sign1_parts(
+            device_auth, "device signature"
+        )
+        header = _loads(protected, "device signature header")
+        try:
+            device_public_key = _device_public_key(
+                device_key.get(_KTY),
+                device_key.get(_CRV),
+                device_key.get(_X),
+                device_key.get(_Y),
+            )
+        except (ValueError, TypeError):
+            device_public_key = None
+        if (
+            device_public_key is None
+            or not isinstance(header, dict)
+            or header.get(_ALG) not in COSE_ALGS
+            or not _verify(
+                device_public_key,
+                header[_ALG],
+                signature,
+                _sig_structure(protected, payload),
+            )
+        ):
+            raise InvalidSignatureError("Device signature verification failed")
+
+        device_payload = _loads(payload, "device signature payload")
+        if not isinstance(device_payload, dict):
+            raise MalformedPresentationError(
+                "Malformed device signature payload: not a map"
+            )
+        if device_payload.get("aud") != aud:
+            raise InvalidAudienceError("Invalid audience in device signature")
+        if device_payload.get("nonce") != nonce:
+            raise InvalidNonceError("Invalid nonce in device signature")
+        if device_payload.get("sd_hash") != _sd_hash(issuer_auth, items):
+            raise InvalidDisclosureError("Invalid digest in device signature")
+
+    def _decode(self, value, what, length):
+        """Decodes a base64url or raw CBOR credential or presentation array."""
+        if isinstance(value, str):
+            try:
+                if not _BASE64URL.fullmatch(value):
+                    raise ValueError
+                value = _b64decode(value)
+            except ValueError:
+                raise MalformedPresentationError(
+                    f"Malformed {what}: not base64url-encoded"
+                ) from None
+        decoded = _loads(value, what)
+        if not isinstance(decoded, list) or len(decoded) != length:
+            raise MalformedPresentationError(
+                f"Malformed {what}: expected an array of {length} elements"
+            )
+        issuer_auth, items = decoded[0], decoded[1]
+        if (
+            not isinstance(issuer_auth, cbor2.CBORTag)
+            or issuer_auth.tag != _COSE_SIGN1_TAG
+        ):
+            raise MalformedPresentationError(
+                f"Malformed {what}: issuerAuth is not a tagged COSE_Sign1"
+            )
+        self._sign1_parts(issuer_auth.value, "issuerAuth")
+        if not isinstance(items, list) or not all(
+            isinstance(item, bytes) for item in items
+        ):
+            raise MalformedPresentationError(
+                f"Malformed {what}: items are not byte strings"
+            )
+        return decoded
+
+    @staticmethod
+    def _sign1_parts(message, what):
+        if (
+            not isinstance(message, (list, tuple))
+            or len(message) != 4
+            or not isinstance(message[0], bytes)
+            or not isinstance(message[2], bytes)
+            or not isinstance(message[3], bytes)
+        ):
+            raise MalformedPresentationError(f"Malformed {what}: not a COSE_Sign1")
+        return message[0], message[2], message[3]
+
+    def prevalidate(self, presentation):
+        """
+        Cheap structural checks on a presentation. Returns the issuerAuth, the
+        items and deviceAuth, the issuer's header parameters (JOSE names) and
+        the unverified MSO, or raises MalformedPresentationError.
+        """
+        if len(presentation) > self.max_presentation_size:
+            raise MalformedPresentationError(
+                f"Presentation exceeds the maximum size of {self.max_presentation_size} bytes"
+            )
+        issuer_auth, items, device_auth = self._decode(presentation, "presentation", 3)
+        if len(items) > self.max_disclosures:
+            raise MalformedPresentationError(
+                f"Presentation has {len(items)} disclosures, "
+                f"the maximum is {self.max_disclosures}"
+            )
+
+        protected, payload, _ = self._sign1_parts(issuer_auth.value, "issuerAuth")
+        cose_header = _loads(protected, "issuerAuth header")
+        if not isinstance(cose_header, dict):
+            raise MalformedPresentationError("Malformed issuerAuth header: not a map")
+        alg = COSE_ALGS.get(cose_header.get(_ALG), (None,))[0]
+        if alg not in self.allowed_algs:
+            raise MalformedPresentationError(
+                f"Algorithm '{alg or cose_header.get(_ALG)}' of the issuerAuth is not allowed"
+            )
+        if _CRIT in cose_header:
+            raise MalformedPresentationError(
+                "Unsupported critical header parameters in the issuerAuth"
+            )
+        header = {"alg": alg}
+        kid = cose_header.get(_KID)
+        if isinstance(kid, bytes):
+            header["kid"] = kid.decode("utf-8", "replace")
+
+        mso = _loads(payload, "MSO")
+        if (
+            not isinstance(mso, dict)
+            or not isinstance(mso.get("claims"), dict)
+            or not isinstance(mso.get("valueDigests"), dict)
+        ):
+            raise MalformedPresentationError("Malformed MSO: missing claims or digests")
+        if mso.get("digestAlgorithm") != DIGEST_ALG:
+            raise InvalidDisclosureError("Invalid hash algorithm")
+        if self.trusted_issuers is not None:
+            issuer = mso["claims"].get("iss")
+            if issuer not in self.trusted_issuers:
+                raise InvalidIssuerError(f"Issuer '{issuer}' is not trusted")
+
+        return issuer_auth, items, device_auth, header, mso
+
+    def key_binding_context(self, presentation):
+        """
+        Returns the `nonce` and `aud` of the presentation's device signature
+        without verifying it, e.g. to re-verify an archived presentation.
+        """
+        _, _, device_auth = self._decode(presentation, "presentation", 3)
+        if device_auth is None:
+            raise MalformedPresentationError("Presentation has no device signature")
+        _, payload, _ = self._sign1_parts(device_auth, "device signature")
+        device_payload = _loads(payload, "device signature payload")
+        if not isinstance(device_payload, dict):
+            raise MalformedPresentationError(
+                "Malformed device signature payload: not a map"
+            )
+        return {"nonce": device_payload.get("nonce"), "aud": device_payload.get("aud")}
+
+    def issuer_key_request(self, presentation):
+        _, _, _, header, mso = self.prevalidate(presentation)
+        return mso["claims"].get("iss"), header
+
+    def prefetch_issuer_key(self, presentation, get_issuer_key_callback):
+        issuer, header = self.issuer_key_request(presentation)
+        return StaticIssuerKey(get_issuer_key_callback(issuer, header))
+
+    def generate_keys(self, issuer_key_type=None):
+        """
+        Generates an issuer key of `issuer_key_type` (default: the handler's
+        `issuer_key_type`) and a P-256 holder key.
+        """
+        issuer_key = generate_key(issuer_key_type or self.issuer_key_type)
+        holder_key = generate_key("P-256")
+        return {
+            "issuer_key": issuer_key,
+            "holder_key": holder_key,
+            "issuer_public_key": JWK(**issuer_key.export_public(as_dict=True)),
+        }
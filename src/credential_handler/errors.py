@@ -0,0 +1,117 @@
+class VerificationError(ValueError):
+    """
+    Base class of credential verification failures. Each subclass carries the
+    error `code` reported to clients; keyword arguments become the `details`
+    of the failure response.
+    """
+
+    code = "VERIFICATION_FAILED"
+
+    def __init__(self, message, **details):
+        super().__init__(message)
+        self.details = details
+
+
+class UnsupportedFormatError(VerificationError):
+    code = "UNSUPPORTED_FORMAT"
+
+
+class MalformedPresentationError(VerificationError):
+    code = "MALFORMED_PRESENTATION"
+
+
+class InvalidIssuerError(VerificationError):
+    code = "INVALID_ISSUER"
+
+
+class InvalidSignatureError(VerificationError):
+    code = "INVALID_SIGNATURE"
+
+
+class InvalidDisclosureError(VerificationError):
+    code = "INVALID_DISCLOSURE"
+
+
+class InvalidAudienceError(VerificationError):
+    code = "INVALID_AUDIENCE"
+
+
+class InvalidNonceError(VerificationError):
+    code = "INVALID_NONCE"
+
+
+class InvalidHolderError(VerificationError):
+    code = "INVALID_HOLDER"
+
+
+class ExpiredCredentialError(VerificationError):
+    code = "EXPIRED_CREDENTIAL"
+
+
+class CredentialNotYetValidError(VerificationError):
+    code = "CREDENTIAL_NOT_YET_VALID"
+
+
+class InvalidCredentialTypeError(VerificationError):
+    code = "INVALID_CREDENTIAL_TYPE"
+
+
+class MissingClaimsError(VerificationError):
+    code = "MISSING_CLAIMS"
+
+
+class CredentialStatusError(VerificationError):
+    """A credential whose status list entry is malformed or out of range."""
+
+    code = "INVALID_STATUS"
+
+
+class RevokedCredentialError(CredentialStatusError):
+    code = "REVOKED_CREDENTIAL"
+
+
+class SuspendedCredentialError(CredentialStatusError):
+    code = "SUSPENDED_CREDENTIAL"
+
+
+class StatusUnavailableError(CredentialStatusError):
+    code = "STATUS_UNAVAILABLE"
+
+
+class OverloadedError(VerificationError):
+    """A verification request rejected by admission control."""
+
+    code = "OVERLOADED"
+
+
+def _subclasses(cls):
+    for subclass in cls.__subclasses__():
+        yield subclass
+        yield from _subclasses(subclass)
+
+
+# Exception class per error code
+ERROR_CODES = {
+    cls.code: cls for cls in (VerificationError, *_subclasses(VerificationError))
+}
+
+# Error code per exception type, filled in as types are first seen
+_codes_by_type = {}
+
+
+def error_code(error):
+    """
+    Returns the error code for an exception: the `code` of a VerificationError,
+    VERIFICATION_FAILED for other ValueErrors and INTERNAL_ERROR otherwise.
+    """
+    error_type = type(error)
+    code = _codes_by_type.get(error_type)
+    if code is None:
+        if issubclass(error_type, VerificationError):
+            code = error_type.code
+        elif issubclass(error_type, ValueError):
+            code = VerificationError.code
+        else:
+            code = "INTERNAL_ERROR"
+        _codes_by_type[error_type] = code
+    return code
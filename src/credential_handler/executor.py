@@ -0,0 +1,97 @@
+import asyncio
+import functools
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+EXECUTOR_MODES = ("inline", "thread", "process")
+
+
+def _warm_worker():
+    """Imports the verification dependencies in a pool worker."""
+    from . import sd_jwt_handler  # noqa: F401
+
+
+class VerificationExecutor:
+    """
+    Runs credential verification off the asyncio event loop.
+
+    Modes:
+    - "inline": verify on the calling thread (blocks the event loop).
+    - "thread": verify on a thread pool.
+    - "process": verify on a process pool. The issuer key is resolved in the
+      calling process, so key-resolution callbacks do not need to be picklable.
+    """
+
+    def __init__(self, mode="thread", max_workers=None):
+        if mode not in EXECUTOR_MODES:
+            raise ValueError(
+                f"Unsupported executor mode: '{mode}'. Supported modes: {list(EXECUTOR_MODES)}"
+            )
+        self.mode = mode
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self._pool = None
+        self.in_flight = 0
+
+    def _get_pool(self):
+        if self._pool is None:
+            if self.mode == "process":
+                self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._pool = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix="credential-verifier",
+                )
+        return self._pool
+
+    def start(self):
+        """Starts the worker pool ahead of traffic and waits until every worker is up."""
+        if self.mode == "inline":
+            return
+        pool = self._get_pool()
+        for future in [pool.submit(_warm_worker) for _ in range(self.max_workers)]:
+            future.result()
+
+    async def run(self, handler, presentation, get_issuer_key_callback, options=None):
+        """Verifies a presentation with the given handler and returns its result."""
+        if self.mode == "inline":
+            return handler.verify_presentation(
+                presentation, get_issuer_key_callback, options
+            )
+
+        if self.mode == "process":
+            get_issuer_key_callback = handler.prefetch_issuer_key(
+                presentation, get_issuer_key_callback
+            )
+
+        loop = asyncio.get_running_loop()
+        self.in_flight += 1
+        try:
+            return await loop.run_in_executor(
+                self._get_pool(),
+                functools.partial(
+                    handler.verify_presentation,
+                    presentation,
+                    get_issuer_key_callback,
+                    options,
+                ),
+            )
+        finally:
+            self.in_flight -= 1
+
+    async def call(self, fn, *args):
+        """
+        Runs `fn(*args)` off the event loop. Process mode uses the loop's default
+        thread pool, so handlers and keys do not need to be picklable.
+        """
+        if self.mode == "inline":
+            return fn(*args)
+        pool = self._get_pool() if self.mode == "thread" else None
+        return await asyncio.get_running_loop().run_in_executor(
+            pool, functools.partial(fn, *args)
+        )
+
+    def shutdown(self, wait=True):
+        """Shuts down the worker pool, if one was started."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait)
+            self._pool = None
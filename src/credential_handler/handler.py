@@ -1,45 +1,232 @@
+import asyncio
+import inspect
+import logging
+import threading
+
+from .async_handler import AsyncBaseCredentialHandler, SyncHandlerAdapter
+from .base_handler import expand_options, memoize_issuer_key_callback
+from .errors import UnsupportedFormatError
+from .executor import VerificationExecutor
+
+logger = logging.getLogger(__name__)
+
+
 class CredentialHandler:
     """
     Main credential handler that dispatches to format-specific sub-handlers.
+
+    Handlers may implement `BaseCredentialHandler`, `AsyncBaseCredentialHandler`
+    or both. The `a*` methods work with every handler, running sync ones on the
+    executor; the sync methods need a sync handler.
     """
 
-    def __init__(self):
+    def __init__(self, executor=None, metrics=None):
         self._handlers = {}
+        self._async_handlers = {}
+        self._factories = {}
+        self._factories_lock = threading.Lock()
+        self._executor = executor or VerificationExecutor(mode="inline")
+        self.metrics = metrics
+        if metrics is not None:
+            metrics.register_gauge(
+                "verification_queue_depth", lambda: self._executor.in_flight
+            )
 
     def register_handler(self, handler):
         """Registers a new credential format handler."""
         format_name = handler.format_name
-        if format_name in self._handlers:
+        if format_name in self._handlers or format_name in self._factories:
             raise ValueError(
                 f"Handler for format '{format_name}' is already registered."
             )
         self._handlers[format_name] = handler
-        print(f"Handler for format '{format_name}' registered.")
+        logger.info("Handler for format '%s' registered.", format_name)
+
+    def register_lazy_handler(self, format_name, factory):
+        """
+        Registers a factory that builds the handler for a format on first use,
+        so format modules and their dependencies are only imported when needed.
+        """
+        if format_name in self._handlers or format_name in self._factories:
+            raise ValueError(
+                f"Handler for format '{format_name}' is already registered."
+            )
+        self._factories[format_name] = factory
+        logger.info("Lazy handler for format '%s' registered.", format_name)
 
     def get_supported_formats(self):
         """Returns a list of supported credential formats."""
-        return list(self._handlers.keys())
+        return list(self._handlers.keys()) + list(self._factories.keys())
+
+    def loaded_handlers(self):
+        """Returns the handlers that have been instantiated, keyed by format."""
+        return dict(self._handlers)
+
+    def load_all(self):
+        """Instantiates every lazily registered handler."""
+        for cred_format in list(self._factories):
+            self._get_handler(cred_format)
 
     def _get_handler(self, cred_format):
         """Retrieves the handler for a given format."""
-        if cred_format not in self._handlers:
-            raise ValueError(
-                f"Unsupported credential format: '{cred_format}'. Supported formats: {self.get_supported_formats()}"
+        handler = self._handlers.get(cred_format)
+        if handler is not None:
+            return handler
+
+        with self._factories_lock:
+            if cred_format in self._handlers:
+                return self._handlers[cred_format]
+            if cred_format not in self._factories:
+                raise UnsupportedFormatError(
+                    f"Unsupported credential format: '{cred_format}'. Supported formats: {self.get_supported_formats()}"
+                )
+            handler = self._factories[cred_format]()
+            self._handlers[cred_format] = handler
+            del self._factories[cred_format]
+            return handler
+
+    def close(self):
+        """Closes the handlers that have been instantiated."""
+        for handler in list(self._handlers.values()):
+            close = getattr(handler, "close", None)
+            if close is not None:
+                close()
+
+    def get_handler(self, cred_format):
+        """Returns the format-specific handler for a format, loading it if needed."""
+        return self._get_handler(cred_format)
+
+    def _get_sync_handler(self, cred_format):
+        handler = self._get_handler(cred_format)
+        if not hasattr(handler, "verify_presentation"):
+            raise TypeError(
+                f"Handler for format '{cred_format}' is async-only; use the async methods."
             )
-        return self._handlers[cred_format]
+        return handler
+
+    def _get_async_handler(self, cred_format):
+        """Retrieves the handler for a format through the async interface."""
+        handler = self._async_handlers.get(cred_format)
+        if handler is None:
+            handler = self._get_handler(cred_format)
+            if not isinstance(handler, AsyncBaseCredentialHandler):
+                handler = SyncHandlerAdapter(handler, self._executor)
+            self._async_handlers[cred_format] = handler
+        return handler
 
     def issue(self, cred_format, *args, **kwargs):
-        handler = self._get_handler(cred_format)
+        handler = self._get_sync_handler(cred_format)
         return handler.issue_credential(*args, **kwargs)
 
+    def issue_many(self, cred_format, *args, **kwargs):
+        """Issues credentials in bulk; yields them lazily, in order."""
+        handler = self._get_sync_handler(cred_format)
+        return handler.issue_many(*args, **kwargs)
+
     def create_presentation(self, cred_format, *args, **kwargs):
-        handler = self._get_handler(cred_format)
+        handler = self._get_sync_handler(cred_format)
         return handler.create_presentation(*args, **kwargs)
 
     def verify(self, cred_format, *args, **kwargs):
-        handler = self._get_handler(cred_format)
+        handler = self._get_sync_handler(cred_format)
         return handler.verify_presentation(*args, **kwargs)
 
-    def generate_keys(self, cred_format):
+    async def aissue(self, cred_format, *args, **kwargs):
+        handler = self._get_async_handler(cred_format)
+        return await handler.aissue_credential(*args, **kwargs)
+
+    async def acreate_presentation(self, cred_format, *args, **kwargs):
+        handler = self._get_async_handler(cred_format)
+        return await handler.acreate_presentation(*args, **kwargs)
+
+    async def averify(
+        self, cred_format, presentation, get_issuer_key_callback, options=None
+    ):
+        """
+        Verifies a presentation without blocking the event loop.
+        `get_issuer_key_callback` may be sync or async.
+        """
+        handler = self._get_async_handler(cred_format)
+        if self.metrics is None:
+            return await handler.averify_presentation(
+                presentation, get_issuer_key_callback, options
+            )
+        with self.metrics.time("verification_seconds", format=cred_format):
+            return await handler.averify_presentation(
+                presentation, get_issuer_key_callback, options
+            )
+
+    def issuer_signed_part(self, cred_format, presentation):
+        """
+        Returns the part of a presentation whose verified claims can be cached
+        and reused with `verify_key_binding`, or None if the format has none.
+        """
+        handler = self._get_handler(cred_format)
+        issuer_signed_part = getattr(handler, "issuer_signed_part", None)
+        if issuer_signed_part is None:
+            return None
+        return issuer_signed_part(presentation)
+
+    def verify_key_binding(
+        self, cred_format, presentation, verified_claims, options=None
+    ):
+        """
+        Verifies only the key binding of a presentation whose issuer-signed part
+        verified to `verified_claims` before. A single signature check, so it
+        runs inline.
+        """
         handler = self._get_handler(cred_format)
-        return handler.generate_keys()
+        return handler.verify_key_binding(presentation, verified_claims, options)
+
+    def verify_many(self, cred_format, *args, **kwargs):
+        handler = self._get_sync_handler(cred_format)
+        return handler.verify_many(*args, **kwargs)
+
+    async def averify_many(
+        self, cred_format, presentations, get_issuer_key_callback, options=None
+    ):
+        """
+        Verifies a batch of presentations concurrently without blocking the event loop.
+        Each issuer key is resolved once; a failing item does not fail the batch.
+        Returns a `(verified_claims, error)` tuple per presentation, in order.
+        """
+        handler = self._get_async_handler(cred_format)
+        if not isinstance(handler, SyncHandlerAdapter) or inspect.iscoroutinefunction(
+            get_issuer_key_callback
+        ):
+            return await handler.averify_many(
+                presentations, get_issuer_key_callback, options
+            )
+
+        # Sync callbacks on sync handlers stay sync, so they keep running on the
+        # executor rather than on the event loop
+        presentations = list(presentations)
+        callback = memoize_issuer_key_callback(get_issuer_key_callback)
+
+        async def verify_one(presentation, item_options):
+            try:
+                return (
+                    await handler.averify_presentation(
+                        presentation, callback, item_options
+                    ),
+                    None,
+                )
+            except Exception as e:
+                return None, e
+
+        return await asyncio.gather(
+            *(
+                verify_one(presentation, item_options)
+                for presentation, item_options in zip(
+                    presentations, expand_options(options, len(presentations))
+                )
+            )
+        )
+
+    def generate_keys(self, cred_format, *args, **kwargs):
+        handler = self._get_sync_handler(cred_format)
+        return handler.generate_keys(*args, **kwargs)
+
+    async def agenerate_keys(self, cred_format, *args, **kwargs):
+        handler = self._get_async_handler(cred_format)
+        return await handler.agenerate_keys(*args, **kwargs)
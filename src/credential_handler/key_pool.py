@@ -0,0 +1,83 @@
+import collections
+import threading
+
+# JWK generation parameters per supported key type
+KEY_TYPES = {
+    "P-256": {"kty": "EC", "crv": "P-256"},
+    "P-384": {"kty": "EC", "crv": "P-384"},
+    "P-521": {"kty": "EC", "crv": "P-521"},
+    "Ed25519": {"kty": "OKP", "crv": "Ed25519"},
+}
+
+
+def generate_key(key_type="P-256"):
+    """Generates a private JWK of the given key type."""
+    from jwcrypto.jwk import JWK
+
+    try:
+        params = KEY_TYPES[key_type]
+    except KeyError:
+        raise ValueError(
+            f"Unsupported key type: '{key_type}'. Supported key types: {list(KEY_TYPES)}"
+        ) from None
+    return JWK.generate(**params)
+
+
+class KeyPool:
+    """
+    Pool of pre-generated keys of one type, refilled up to `depth` keys by a
+    background thread so that taking a key does not wait on key generation.
+    When the pool runs dry, keys are generated on the caller's thread.
+    """
+
+    def __init__(self, key_type="P-256", depth=32):
+        if key_type not in KEY_TYPES:
+            raise ValueError(
+                f"Unsupported key type: '{key_type}'. Supported key types: {list(KEY_TYPES)}"
+            )
+        self.key_type = key_type
+        self.depth = depth
+        self.misses = 0
+        self._keys = collections.deque()
+        self._wanted = threading.Condition()
+        self._closed = False
+        self._filler = None
+
+    def start(self):
+        """Starts the background refill thread."""
+        if self._filler is None:
+            self._filler = threading.Thread(
+                target=self._fill, name=f"key-pool-{self.key_type}", daemon=True
+            )
+            self._filler.start()
+        return self
+
+    def get(self):
+        """Takes a key from the pool, generating one if the pool is empty."""
+        self.start()
+        with self._wanted:
+            try:
+                key = self._keys.popleft()
+            except IndexError:
+                key = None
+                self.misses += 1
+            self._wanted.notify()
+        return key or generate_key(self.key_type)
+
+    def _fill(self):
+        while True:
+            with self._wanted:
+                while not self._closed and len(self._keys) >= self.depth:
+                    self._wanted.wait()
+                if self._closed:
+                    return
+            self._keys.append(generate_key(self.key_type))
+
+    def close(self):
+        """Stops the refill thread."""
+        with self._wanted:
+            self._closed = True
+            self._wanted.notify_all()
+
+    def __len__(self):
+        return len(self._keys)
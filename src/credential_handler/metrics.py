@@ -0,0 +1,166 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+DEFAULT_BUCKETS = (
+    0.00005,
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+)
+
+
+class Metrics:
+    """
+    Thread-safe latency histograms, counters and gauges for the verification path.
+    Components take an optional `metrics` instance and skip all recording when it is None.
+    """
+
+    def __init__(self, namespace="tmcp", buckets=DEFAULT_BUCKETS):
+        self.namespace = namespace
+        self.buckets = tuple(buckets)
+        self._histograms = {}
+        self._counters = {}
+        self._gauges = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name, seconds, **labels):
+        """Records a duration in the histogram `name`."""
+        key = (name, tuple(sorted(labels.items())))
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [[0] * len(self.buckets), 0.0, 0]
+            if index < len(self.buckets):
+                histogram[0][index] += 1
+            histogram[1] += seconds
+            histogram[2] += 1
+
+    @contextmanager
+    def time(self, name, **labels):
+        """Context manager recording the duration of its block in the histogram `name`."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def increment(self, name, amount=1, **labels):
+        """Increments the counter `name`."""
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def register_gauge(self, name, read, **labels):
+        """Registers a gauge whose value is read by calling `read()` at export time."""
+        self._gauges[(name, tuple(sorted(labels.items())))] = read
+
+    def snapshot(self):
+        """Returns all metrics as a JSON-serializable dict."""
+        with self._lock:
+            histograms = {
+                key: (list(counts), total, count)
+                for key, (counts, total, count) in self._histograms.items()
+            }
+            counters = dict(self._counters)
+
+        result = {"histograms": [], "counters": [], "gauges": []}
+        for (name, labels), (counts, total, count) in sorted(histograms.items()):
+            result["histograms"].append(
+                {
+                    "name": name,
+                    "labels": dict(labels),
+                    "count": count,
+                    "sum": total,
+                    "mean_ms": total / count * 1000 if count else 0.0,
+                    "p50_ms": self._quantile(counts, count, 0.5) * 1000,
+                    "p99_ms": self._quantile(counts, count, 0.99) * 1000,
+                }
+            )
+        for (name, labels), value in sorted(counters.items()):
+            result["counters"].append(
+                {"name": name, "labels": dict(labels), "value": value}
+            )
+        for (name, labels), read in sorted(self._gauges.items()):
+            result["gauges"].append(
+                {"name": name, "labels": dict(labels), "value": read()}
+            )
+        return result
+
+    def _quantile(self, counts, count, q):
+        """Estimates a quantile as the upper bound of the bucket containing it."""
+        if not count:
+            return 0.0
+        rank = q * count
+        seen = 0
+        for bound, bucket_count in zip(self.buckets, counts):
+            seen += bucket_count
+            if seen >= rank:
+                return bound
+        return self.buckets[-1]
+
+    def to_prometheus(self):
+        """Renders all metrics in the Prometheus text exposition format."""
+        lines = []
+        snapshot = self.snapshot()
+        with self._lock:
+            histograms = {
+                key: (list(counts), total, count)
+                for key, (counts, total, count) in self._histograms.items()
+            }
+
+        declared = set()
+        for (name, labels), (counts, total, count) in sorted(histograms.items()):
+            metric = f"{self.namespace}_{name}"
+            if metric not in declared:
+                lines.append(f"# TYPE {metric} histogram")
+                declared.add(metric)
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                bucket_labels = labels + (("le", repr(bound)),)
+                lines.append(
+                    f"{metric}_bucket{_format_labels(bucket_labels)} {cumulative}"
+                )
+            lines.append(
+                f"{metric}_bucket{_format_labels(labels + (('le', '+Inf'),))} {count}"
+            )
+            lines.append(f"{metric}_sum{_format_labels(labels)} {total}")
+            lines.append(f"{metric}_count{_format_labels(labels)} {count}")
+
+        for kind, entries in (
+            ("counter", snapshot["counters"]),
+            ("gauge", snapshot["gauges"]),
+        ):
+            for entry in entries:
+                metric = f"{self.namespace}_{entry['name']}"
+                if metric not in declared:
+                    lines.append(f"# TYPE {metric} {kind}")
+                    declared.add(metric)
+                labels = tuple(sorted(entry["labels"].items()))
+                lines.append(f"{metric}{_format_labels(labels)} {entry['value']}")
+
+        return "\n".join(lines) + "\n"
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    escaped = (
+        (name, str(value).replace("\\", "\\\\").replace('"', '\\"'))
+        for name, value in labels
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
@@ -0,0 +1,504 @@
+import base64
+import contextlib
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.asymmetric import ec, ed448, ed25519, padding, rsa
+from cryptography.hazmat.primitives.asymmetric.utils import encode_dss_signature
+from sd_jwt.common import (
+    DEFAULT_SIGNING_ALG,
+    DIGEST_ALG_KEY,
+    KB_DIGEST_KEY,
+    SD_DIGESTS_KEY,
+    SD_LIST_PREFIX,
+    SDJWTCommon,
+)
+
+from .errors import (
+    InvalidAudienceError,
+    InvalidDisclosureError,
+    InvalidHolderError,
+    InvalidIssuerError,
+    InvalidNonceError,
+    InvalidSignatureError,
+    MalformedPresentationError,
+)
+
+_BASE64URL = re.compile(rb"[A-Za-z0-9_-]*")
+
+# JWS algorithm -> (key type, curve, hash); the curve of ES* also fixes the signature size
+_ALGS = {
+    "ES256": ("EC", "P-256", hashes.SHA256),
+    "ES384": ("EC", "P-384", hashes.SHA384),
+    "ES512": ("EC", "P-521", hashes.SHA512),
+    "EdDSA": ("OKP", None, None),
+    "RS256": ("RSA", None, hashes.SHA256),
+    "RS384": ("RSA", None, hashes.SHA384),
+    "RS512": ("RSA", None, hashes.SHA512),
+    "PS256": ("RSA", None, hashes.SHA256),
+    "PS384": ("RSA", None, hashes.SHA384),
+    "PS512": ("RSA", None, hashes.SHA512),
+}
+
+_EC_CURVES = {
+    "P-256": (ec.SECP256R1, 32),
+    "P-384": (ec.SECP384R1, 48),
+    "P-521": (ec.SECP521R1, 66),
+}
+
+_OKP_CURVES = {
+    "Ed25519": ed25519.Ed25519PublicKey,
+    "Ed448": ed448.Ed448PublicKey,
+}
+
+SUPPORTED_ALGS = frozenset(_ALGS)
+
+
+def _b64decode(segment):
+    return base64.urlsafe_b64decode(bytes(segment) + b"=" * (-len(segment) % 4))
+
+
+def _b64hash(data):
+    return base64.urlsafe_b64encode(hashlib.sha256(data).digest()).rstrip(b"=").decode()
+
+
+def _decode_int(value):
+    return int.from_bytes(_b64decode(value.encode("ascii")), "big")
+
+
+def _load_public_key(jwk):
+    key_type = jwk.get("kty")
+    if key_type == "EC":
+        curve, _ = _EC_CURVES[jwk["crv"]]
+        numbers = ec.EllipticCurvePublicNumbers(
+            _decode_int(jwk["x"]), _decode_int(jwk["y"]), curve()
+        )
+        return numbers.public_key()
+    if key_type == "OKP":
+        return _OKP_CURVES[jwk["crv"]].from_public_bytes(
+            _b64decode(jwk["x"].encode("ascii"))
+        )
+    if key_type == "RSA":
+        return rsa.RSAPublicNumbers(
+            _decode_int(jwk["e"]), _decode_int(jwk["n"])
+        ).public_key()
+    raise ValueError(f"Unsupported key type '{key_type}'")
+
+
+class _JwsParts:
+    """Offsets of a compact JWS within the presentation buffer."""
+
+    __slots__ = ("start", "dot1", "dot2", "end")
+
+    def __init__(self, start, dot1, dot2, end):
+        self.start = start
+        self.dot1 = dot1
+        self.dot2 = dot2
+        self.end = end
+
+
+class FastSdJwtVerifier:
+    """
+    Verifies compact SD-JWT presentations without the sd-jwt library.
+
+    The presentation is parsed in place: segments are memoryview slices of the
+    encoded presentation, which are hashed and signature-checked without
+    copying. All disclosures are hashed in one pass, and the unpacking of the
+    payload looks each `_sd` digest up in that table; a disclosure that no
+    digest references is rejected. Signatures are checked with `cryptography`
+    public keys parsed once per JWK and kept in an LRU cache of `max_keys`.
+
+    Results match `SDJWTVerifier` for every presentation both verifiers accept,
+    which keeps it available as a differential-testing oracle. This verifier is
+    stricter: it also rejects unreferenced disclosures, array digests repeated
+    in the payload and `crit` headers. Only the asymmetric JWS algorithms in
+    SUPPORTED_ALGS are verified.
+    """
+
+    def __init__(self, max_keys=1024):
+        self.max_keys = max_keys
+        self._keys = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        # Parsed keys are not picklable; each process builds its own cache
+        return {"max_keys": self.max_keys}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def public_key(self, jwk):
+        """Returns the `cryptography` public key of a JWK (a dict or jwcrypto JWK)."""
+        cache_key = (
+            jwk.get("kty"),
+            jwk.get("crv"),
+            jwk.get("x"),
+            jwk.get("y"),
+            jwk.get("n"),
+            jwk.get("e"),
+        )
+        with self._lock:
+            key = self._keys.get(cache_key)
+            if key is not None:
+                self._keys.move_to_end(cache_key)
+                return key
+        key = _load_public_key(jwk)
+        with self._lock:
+            self._keys[cache_key] = key
+            while len(self._keys) > self.max_keys:
+                self._keys.popitem(last=False)
+        return key
+
+    def verify(
+        self,
+        handler,
+        presentation,
+        get_issuer_key_callback,
+        aud=None,
+        nonce=None,
+        metrics=None,
+    ):
+        """
+        Verifies a presentation (str or bytes) under the structural limits of
+        `handler` (an SdJwtHandler) and returns the disclosed claims.
+        """
+
+        def stage(name):
+            if metrics is None:
+                return contextlib.nullcontext()
+            return metrics.time("verification_stage_seconds", stage=name)
+
+        with stage("prevalidate"):
+            data, issuer_jwt, disclosures, kb_jwt = self._split(handler, presentation)
+            view = memoryview(data)
+            header = self._decode_header(view, issuer_jwt, "issuer JWT", handler)
+            payload = self._decode_part(
+                view, issuer_jwt.dot1 + 1, issuer_jwt.dot2, "issuer JWT payload"
+            )
+            kb_header = kb_payload = None
+            if kb_jwt is not None:
+                kb_header = self._decode_header(
+                    view, kb_jwt, "key binding JWT", handler
+                )
+                kb_payload = self._decode_part(
+                    view, kb_jwt.dot1 + 1, kb_jwt.dot2, "key binding JWT payload"
+                )
+            handler._check_issuer(payload)
+
+        with stage("disclosure_hashing"):
+            digests = {}
+            for start, end in disclosures:
+                digest = _b64hash(view[start:end])
+                if digest in digests:
+                    raise InvalidDisclosureError(
+                        f"Invalid disclosure: Duplicate disclosure hash {digest}"
+                    )
+                digests[digest] = (start, end)
+
+        start = time.perf_counter()
+        issuer_key = get_issuer_key_callback(payload.get("iss"), header)
+        if metrics is not None:
+            metrics.observe(
+                "verification_stage_seconds",
+                time.perf_counter() - start,
+                stage="key_resolution",
+            )
+
+        with stage("issuer_signature"):
+            try:
+                issuer_public_key = self.public_key(issuer_key)
+            except (KeyError, ValueError, TypeError, AttributeError) as e:
+                raise InvalidIssuerError(f"Unusable issuer key: {e}") from None
+            if not self._verify_signature(
+                view, issuer_jwt, header["alg"], issuer_public_key
+            ):
+                raise InvalidSignatureError("Issuer signature verification failed")
+
+        if aud or nonce:
+            if not (aud and nonce):
+                raise ValueError(
+                    "Either both expected_aud and expected_nonce must be provided or both must be None"
+                )
+            with stage("kb_jwt"):
+                self._verify_key_binding_jwt(
+                    view, payload, kb_jwt, kb_header, kb_payload, aud, nonce
+                )
+
+        with stage("claims"):
+            if (
+                payload.get(DIGEST_ALG_KEY, SDJWTCommon.HASH_ALG["name"])
+                != SDJWTCommon.HASH_ALG["name"]
+            ):
+                raise InvalidDisclosureError("Invalid hash algorithm")
+            unpacker = _Unpacker(view, digests)
+            claims = unpacker.unpack(payload)
+            if unpacker.used != len(digests):
+                raise InvalidDisclosureError(
+                    "Disclosure is not referenced by the SD-JWT"
+                )
+            return claims
+
+    def verify_key_binding(self, handler, presentation, verified_claims, aud, nonce):
+        """
+        Verifies only the key binding JWT of a presentation whose issuer JWT and
+        disclosures were verified before, yielding `verified_claims`; the holder
+        key is their `cnf.jwk`.
+        """
+        if not (aud and nonce):
+            raise ValueError("Key binding needs both an expected aud and nonce")
+        data, _, _, kb_jwt = self._split(handler, presentation)
+        if kb_jwt is None:
+            raise MalformedPresentationError("Presentation has no key binding JWT")
+        view = memoryview(data)
+        kb_header = self._decode_header(view, kb_jwt, "key binding JWT", handler)
+        kb_payload = self._decode_part(
+            view, kb_jwt.dot1 + 1, kb_jwt.dot2, "key binding JWT payload"
+        )
+        self._verify_key_binding_jwt(
+            view, verified_claims, kb_jwt, kb_header, kb_payload, aud, nonce
+        )
+
+    def _split(self, handler, presentation):
+        if isinstance(presentation, str):
+            try:
+                data = presentation.encode("ascii")
+            except UnicodeEncodeError:
+                raise MalformedPresentationError(
+                    "Malformed SD-JWT: not ASCII"
+                ) from None
+        else:
+            data = bytes(presentation)
+        if len(data) > handler.max_presentation_size:
+            raise MalformedPresentationError(
+                f"Presentation exceeds the maximum size of {handler.max_presentation_size} bytes"
+            )
+
+        separators = []
+        position = data.find(b"~")
+        while position != -1:
+            separators.append(position)
+            position = data.find(b"~", position + 1)
+        if not separators:
+            raise MalformedPresentationError("Malformed SD-JWT: missing '~' separator")
+        if len(separators) - 1 > handler.max_disclosures:
+            raise MalformedPresentationError(
+                f"Presentation has {len(separators) - 1} disclosures, "
+                f"the maximum is {handler.max_disclosures}"
+            )
+
+        disclosures = list(zip((s + 1 for s in separators), separators[1:]))
+        for start, end in disclosures:
+            if start == end or not _BASE64URL.fullmatch(data, start, end):
+                raise MalformedPresentationError(
+                    "Malformed disclosure: not base64url-encoded"
+                )
+
+        issuer_jwt = self._jws_parts(data, 0, separators[0], "issuer JWT")
+        kb_jwt = None
+        if separators[-1] + 1 < len(data):
+            kb_jwt = self._jws_parts(
+                data, separators[-1] + 1, len(data), "key binding JWT"
+            )
+        return data, issuer_jwt, disclosures, kb_jwt
+
+    @staticmethod
+    def _jws_parts(data, start, end, what):
+        dot1 = data.find(b".", start, end)
+        dot2 = data.find(b".", dot1 + 1, end) if dot1 != -1 else -1
+        if (
+            dot2 == -1
+            or data.find(b".", dot2 + 1, end) != -1
+            or not _BASE64URL.fullmatch(data, start, dot1)
+            or not _BASE64URL.fullmatch(data, dot1 + 1, dot2)
+            or not _BASE64URL.fullmatch(data, dot2 + 1, end)
+        ):
+            raise MalformedPresentationError(f"Malformed {what}: not a compact JWS")
+        return _JwsParts(start, dot1, dot2, end)
+
+    @staticmethod
+    def _decode_part(view, start, end, what):
+        try:
+            decoded = json.loads(_b64decode(view[start:end]))
+        except Exception:
+            raise MalformedPresentationError(
+                f"Malformed {what}: not base64url-encoded JSON"
+            ) from None
+        if not isinstance(decoded, dict):
+            raise MalformedPresentationError(f"Malformed {what}: not a JSON object")
+        return decoded
+
+    def _decode_header(self, view, jws, what, handler):
+        header = self._decode_part(view, jws.start, jws.dot1, f"{what} header")
+        handler._check_alg(header, what)
+        if "crit" in header:
+            raise MalformedPresentationError(
+                f"Unsupported critical header parameters in the {what}"
+            )
+        return header
+
+    @staticmethod
+    def _verify_signature(view, jws, alg, public_key):
+        key_type, curve, hash_alg = _ALGS.get(alg, (None, None, None))
+        signing_input = view[jws.start : jws.dot2]
+        try:
+            signature = _b64decode(view[jws.dot2 + 1 : jws.end])
+        except ValueError:
+            return False
+        try:
+            if key_type == "EC":
+                if not isinstance(public_key, ec.EllipticCurvePublicKey):
+                    return False
+                curve_type, size = _EC_CURVES[curve]
+                if (
+                    not isinstance(public_key.curve, curve_type)
+                    or len(signature) != 2 * size
+                ):
+                    return False
+                der = encode_dss_signature(
+                    int.from_bytes(signature[:size], "big"),
+                    int.from_bytes(signature[size:], "big"),
+                )
+                public_key.verify(der, signing_input, ec.ECDSA(hash_alg()))
+            elif key_type == "OKP":
+                if not isinstance(public_key, tuple(_OKP_CURVES.values())):
+                    return False
+                public_key.verify(signature, signing_input)
+            elif key_type == "RSA":
+                if not isinstance(public_key, rsa.RSAPublicKey):
+                    return False
+                if alg.startswith("PS"):
+                    pad = padding.PSS(
+                        mgf=padding.MGF1(hash_alg()), salt_length=hash_alg.digest_size
+                    )
+                else:
+                    pad = padding.PKCS1v15()
+                public_key.verify(signature, signing_input, pad, hash_alg())
+            else:
+                raise MalformedPresentationError(
+                    f"Algorithm '{alg}' is not supported by the fast verifier"
+                )
+        except InvalidSignature:
+            return False
+        return True
+
+    def _verify_key_binding_jwt(
+        self, view, payload, kb_jwt, kb_header, kb_payload, aud, nonce
+    ):
+        if kb_jwt is None:
+            raise MalformedPresentationError("Presentation has no key binding JWT")
+
+        holder_jwk = payload.get("cnf")
+        holder_jwk = holder_jwk.get("jwk") if isinstance(holder_jwk, dict) else None
+        if not isinstance(holder_jwk, dict):
+            raise InvalidHolderError("No holder public key ('cnf.jwk') in SD-JWT")
+        try:
+            holder_public_key = self.public_key(holder_jwk)
+        except (KeyError, ValueError, TypeError, AttributeError):
+            holder_public_key = None
+        # Key binding JWTs are signed with ES256, as in SDJWTVerifier
+        if (
+            holder_public_key is None
+            or kb_header.get("alg") != DEFAULT_SIGNING_ALG
+            or not self._verify_signature(
+                view, kb_jwt, DEFAULT_SIGNING_ALG, holder_public_key
+            )
+        ):
+            raise InvalidSignatureError("Key binding JWT signature verification failed")
+
+        if kb_header.get("typ") != SDJWTCommon.KB_JWT_TYP_HEADER:
+            raise MalformedPresentationError("Invalid key binding JWT header typ")
+
+        if kb_payload.get("aud") != aud:
+            raise InvalidAudienceError("Invalid audience in KB-JWT")
+        if kb_payload.get("nonce") != nonce:
+            raise InvalidNonceError("Invalid nonce in KB-JWT")
+        # The presentation up to the key binding JWT, ending with '~'
+        if kb_payload.get(KB_DIGEST_KEY) != _b64hash(view[: kb_jwt.start]):
+            raise InvalidDisclosureError("Invalid digest in KB-JWT")
+
+
+class _Unpacker:
+    """Replaces `_sd` digests and `...` array elements by their disclosed values."""
+
+    def __init__(self, view, digests):
+        self._view = view
+        self._digests = digests
+        self._seen = set()
+        # Disclosures referenced so far
+        self.used = 0
+
+    def _disclosure(self, digest, size):
+        start, end = self._digests[digest]
+        try:
+            decoded = json.loads(_b64decode(self._view[start:end]))
+        except Exception:
+            raise InvalidDisclosureError(
+                "Invalid disclosure: not base64url-encoded JSON"
+            ) from None
+        if not isinstance(decoded, list) or len(decoded) != size:
+            raise InvalidDisclosureError(
+                f"Invalid disclosure: expected {size} elements"
+            )
+        return decoded
+
+    def unpack(self, claims):
+        if type(claims) is list:
+            output = []
+            for element in claims:
+                if (
+                    type(element) is dict
+                    and len(element) == 1
+                    and type(element.get(SD_LIST_PREFIX)) is str
+                ):
+                    digest = element[SD_LIST_PREFIX]
+                    if self._use(digest):
+                        _, value = self._disclosure(digest, 2)
+                        output.append(self.unpack(value))
+                else:
+                    output.append(self.unpack(element))
+            return output
+
+        if type(claims) is dict:
+            output = {
+                key: self.unpack(value)
+                for key, value in claims.items()
+                if key != SD_DIGESTS_KEY and key != DIGEST_ALG_KEY
+            }
+            sd_digests = claims.get(SD_DIGESTS_KEY, [])
+            if not isinstance(sd_digests, list):
+                raise InvalidDisclosureError(f"'{SD_DIGESTS_KEY}' is not an array")
+            for digest in sd_digests:
+                if not self._use(digest):
+                    # Decoy or undisclosed claim
+                    continue
+                _, key, value = self._disclosure(digest, 3)
+                if not isinstance(key, str) or key in (SD_DIGESTS_KEY, SD_LIST_PREFIX):
+                    raise InvalidDisclosureError(
+                        f"Invalid disclosure: claim name {key!r}"
+                    )
+                if key in output:
+                    raise InvalidDisclosureError(
+                        f"Duplicate key found when unpacking disclosed claim: '{key}'"
+                    )
+                output[key] = self.unpack(value)
+            return output
+
+        return claims
+
+    def _use(self, digest):
+        """Records a digest of the payload and tells whether it was disclosed."""
+        if not isinstance(digest, str):
+            raise InvalidDisclosureError(f"Invalid digest {digest!r}")
+        if digest in self._seen:
+            raise InvalidDisclosureError(f"Duplicate hash found in SD-JWT: {digest}")
+        self._seen.add(digest)
+        if digest in self._digests:
+            self.used += 1
+            return True
+        return False
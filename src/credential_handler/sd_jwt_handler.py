@@ -1,44 +1,625 @@
-from .base_handler import BaseCredentialHandler
+import itertools
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+
+from .base_handler import BaseCredentialHandler, StaticIssuerKey
+from .errors import (
+    InvalidAudienceError,
+    InvalidDisclosureError,
+    InvalidHolderError,
+    InvalidIssuerError,
+    InvalidNonceError,
+    InvalidSignatureError,
+    MalformedPresentationError,
+)
+from .key_pool import KEY_TYPES, KeyPool, generate_key
+from .sd_jwt_fast import SUPPORTED_ALGS as FAST_VERIFIER_ALGS, FastSdJwtVerifier
 from sd_jwt.issuer import SDJWTIssuer
 from sd_jwt.holder import SDJWTHolder
 from sd_jwt.verifier import SDJWTVerifier
+from sd_jwt.common import DEFAULT_SIGNING_ALG, KB_DIGEST_KEY, SD_DIGESTS_KEY
 from jwcrypto.jwk import JWK
+from jwcrypto.jws import JWS, InvalidJWSObject
+from jwcrypto.common import JWException, base64url_decode, json_decode
+
+
+# Issuer key and handler of a bulk issuance worker process
+_issue_worker = {}
+
+
+def _init_issue_worker(handler, issuer_key_json):
+    _issue_worker["handler"] = handler
+    _issue_worker["issuer_key"] = JWK.from_json(issuer_key_json)
+
+
+def _issue_chunk(chunk):
+    handler = _issue_worker["handler"]
+    issuer_key = _issue_worker["issuer_key"]
+    return [
+        handler.issue_credential(
+            user_claims,
+            issuer_key,
+            JWK.from_json(holder_key_json) if holder_key_json else None,
+        )
+        for user_claims, holder_key_json in chunk
+    ]
+
+
+# Errors of the checks SDJWTVerifier._verify_key_binding_jwt makes after the
+# signature, by message, and of its lookups of missing header or payload members
+_KEY_BINDING_CHECK_ERRORS = {
+    "Invalid header typ": MalformedPresentationError,
+    "Invalid audience in KB-JWT": InvalidAudienceError,
+    "Invalid nonce in KB-JWT": InvalidNonceError,
+    "Invalid digest in KB-JWT": InvalidDisclosureError,
+}
+_KEY_BINDING_CLAIM_ERRORS = {
+    "typ": MalformedPresentationError,
+    "aud": InvalidAudienceError,
+    "nonce": InvalidNonceError,
+    KB_DIGEST_KEY: InvalidDisclosureError,
+}
+
+
+class _HolderBoundIssuer(SDJWTIssuer):
+    """
+    SDJWTIssuer keeping the members of the `cnf` claim, such as the holder DID
+    in `kid`, next to the holder key it sets as `cnf.jwk`.
+    """
+
+    def _assemble_sd_jwt_payload(self):
+        super()._assemble_sd_jwt_payload()
+        cnf = self._user_claims.get("cnf")
+        if self._holder_key and isinstance(cnf, dict):
+            self.sd_jwt_payload["cnf"] = {**cnf, **self.sd_jwt_payload["cnf"]}
+
+
+class _TypedVerifier(SDJWTVerifier):
+    """
+    SDJWTVerifier raising `VerificationError` subclasses, so that failures are
+    classified by type instead of by message.
+    """
+
+    def _parse_sd_jwt(self, sd_jwt):
+        try:
+            return super()._parse_sd_jwt(sd_jwt)
+        except (ValueError, IndexError, TypeError) as e:
+            raise MalformedPresentationError(f"Malformed SD-JWT: {e}") from None
+
+    def _create_hash_mappings(self, disclosures_list):
+        try:
+            return super()._create_hash_mappings(disclosures_list)
+        except (ValueError, IndexError, TypeError) as e:
+            raise InvalidDisclosureError(f"Invalid disclosure: {e}") from None
+
+    def _verify_sd_jwt(self, cb_get_issuer_key, sign_alg=None):
+        # The library deserializes, resolves the key, then verifies; errors are
+        # classified by the stage they were raised in
+        stage = "deserialize"
+
+        def get_issuer_key(issuer, header_parameters):
+            nonlocal stage
+            stage = "key_resolution"
+            issuer_public_key = cb_get_issuer_key(issuer, header_parameters)
+            stage = "signature"
+            return issuer_public_key
+
+        try:
+            super()._verify_sd_jwt(get_issuer_key, sign_alg)
+        except (JWException, ValueError, TypeError) as e:
+            if stage == "deserialize":
+                raise MalformedPresentationError(f"Malformed issuer JWT: {e}") from None
+            if stage == "signature" and isinstance(e, JWException):
+                raise InvalidSignatureError(
+                    "Issuer signature verification failed"
+                ) from None
+            if stage == "signature":
+                raise MalformedPresentationError(
+                    f"Malformed issuer JWT payload: {e}"
+                ) from None
+            raise
+
+    def _verify_key_binding_jwt(
+        self, expected_aud=None, expected_nonce=None, sign_alg=None
+    ):
+        if not self._unverified_input_key_binding_jwt:
+            raise MalformedPresentationError("Presentation has no key binding JWT")
+        holder_jwk = (self._holder_public_key_payload or {}).get("jwk")
+        if not isinstance(holder_jwk, dict):
+            raise InvalidHolderError("No holder public key ('cnf.jwk') in SD-JWT")
+        try:
+            super()._verify_key_binding_jwt(expected_aud, expected_nonce, sign_alg)
+        except InvalidJWSObject as e:
+            raise MalformedPresentationError(
+                f"Malformed key binding JWT: {e}"
+            ) from None
+        except JWException:
+            raise InvalidSignatureError(
+                "Key binding JWT signature verification failed"
+            ) from None
+        except KeyError as e:
+            error_type = _KEY_BINDING_CLAIM_ERRORS.get(e.args[0])
+            if error_type is None:
+                raise
+            raise error_type(f"Missing '{e.args[0]}' in KB-JWT") from None
+        except json.JSONDecodeError as e:
+            raise MalformedPresentationError(
+                f"Malformed key binding JWT payload: {e}"
+            ) from None
+        except (ValueError, TypeError) as e:
+            error_type = _KEY_BINDING_CHECK_ERRORS.get(str(e))
+            if error_type is None:
+                raise InvalidSignatureError(
+                    "Key binding JWT signature verification failed"
+                ) from None
+            raise error_type(str(e)) from None
+
+    def _extract_sd_claims(self):
+        try:
+            return super()._extract_sd_claims()
+        except InvalidDisclosureError:
+            raise
+        except ValueError as e:
+            raise InvalidDisclosureError(str(e)) from None
+
+
+class _InstrumentedVerifier(_TypedVerifier):
+    """SDJWTVerifier that records the duration of each verification stage."""
+
+    def __init__(self, metrics, sd_jwt_presentation, cb_get_issuer_key, **kwargs):
+        self._metrics = metrics
+        self._key_resolution_seconds = 0.0
+
+        def get_issuer_key(issuer, header_parameters):
+            start = time.perf_counter()
+            try:
+                return cb_get_issuer_key(issuer, header_parameters)
+            finally:
+                self._key_resolution_seconds = time.perf_counter() - start
+                metrics.observe(
+                    "verification_stage_seconds",
+                    self._key_resolution_seconds,
+                    stage="key_resolution",
+                )
+
+        super().__init__(sd_jwt_presentation, get_issuer_key, **kwargs)
+
+    def _parse_sd_jwt(self, sd_jwt):
+        with self._metrics.time("verification_stage_seconds", stage="parse"):
+            return super()._parse_sd_jwt(sd_jwt)
+
+    def _create_hash_mappings(self, disclosures_list):
+        with self._metrics.time(
+            "verification_stage_seconds", stage="disclosure_hashing"
+        ):
+            return super()._create_hash_mappings(disclosures_list)
+
+    def _verify_sd_jwt(self, cb_get_issuer_key, sign_alg=None):
+        # Key resolution happens inside; it is recorded separately by the callback
+        start = time.perf_counter()
+        try:
+            return super()._verify_sd_jwt(cb_get_issuer_key, sign_alg)
+        finally:
+            self._metrics.observe(
+                "verification_stage_seconds",
+                time.perf_counter() - start - self._key_resolution_seconds,
+                stage="issuer_signature",
+            )
+
+    def _verify_key_binding_jwt(
+        self, expected_aud=None, expected_nonce=None, sign_alg=None
+    ):
+        with self._metrics.time("verification_stage_seconds", stage="kb_jwt"):
+            return super()._verify_key_binding_jwt(
+                expected_aud, expected_nonce, sign_alg
+            )
+
+    def get_verified_payload(self):
+        with self._metrics.time("verification_stage_seconds", stage="claims"):
+            return super().get_verified_payload()
+
+
+_BASE64URL = re.compile(r"[A-Za-z0-9_-]*")
+
+DEFAULT_ALLOWED_ALGS = (
+    "ES256",
+    "ES384",
+    "ES512",
+    "EdDSA",
+    "PS256",
+    "PS384",
+    "PS512",
+    "RS256",
+    "RS384",
+    "RS512",
+)
+
+# Presentation verifiers an SdJwtHandler can use
+VERIFIERS = ("reference", "fast")
+
+SIGNING_ALGS = {
+    ("EC", "P-256"): "ES256",
+    ("EC", "P-384"): "ES384",
+    ("EC", "P-521"): "ES512",
+    ("OKP", "Ed25519"): "EdDSA",
+    ("RSA", None): "PS256",
+}
+
+
+def signing_alg_for_key(key):
+    """Returns the JWS algorithm used to sign with a JWK of the given type and curve."""
+    key_type = key.get("kty")
+    curve = key.get("crv") if key_type in ("EC", "OKP") else None
+    try:
+        return SIGNING_ALGS[(key_type, curve)]
+    except KeyError:
+        raise ValueError(
+            f"Unsupported key type for signing: {key_type} {curve or ''}".strip()
+        ) from None
+
+
+def _decode_jose_part(segment, what):
+    """Decodes a base64url JSON object from a compact JWS, raising ValueError if malformed."""
+    try:
+        decoded = json_decode(base64url_decode(segment))
+    except Exception:
+        raise MalformedPresentationError(
+            f"Malformed {what}: not base64url-encoded JSON"
+        ) from None
+    if not isinstance(decoded, dict):
+        raise MalformedPresentationError(f"Malformed {what}: not a JSON object")
+    return decoded
+
+
+class SdJwtPresentationBuilder:
+    """
+    Builds presentations of one issued SD-JWT for many verifiers.
+
+    The credential is parsed once and its disclosures are indexed by claim path.
+    The disclosures and `sd_hash` selected for each `disclosed_claims` set are
+    cached, so a presentation only costs signing a fresh key binding JWT.
+    Safe to share between threads.
+    """
+
+    def __init__(
+        self, credential, holder_key=None, common_disclosures=(), max_selections=64
+    ):
+        self.holder_key = holder_key
+        self.max_selections = max_selections
+        self._holder = SDJWTHolder(credential)
+        self._selections = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Claim path (tuple of keys) -> (payload position, encoded disclosure)
+        self.disclosures_by_path = {}
+        self._index(self._holder.sd_jwt_payload, ())
+
+        for disclosed_claims in common_disclosures:
+            self.select(disclosed_claims)
+
+    def _index(self, claims, path):
+        if not isinstance(claims, dict):
+            return
+        for digest in claims.get(SD_DIGESTS_KEY, ()):
+            decoded = self._holder._hash_to_decoded_disclosure.get(digest)
+            if decoded is None:
+                # Decoy digest
+                continue
+            _, key, value = decoded
+            self.disclosures_by_path[path + (key,)] = (
+                len(self.disclosures_by_path),
+                self._holder._hash_to_disclosure[digest],
+            )
+            self._index(value, path + (key,))
+        for key, value in claims.items():
+            if key != SD_DIGESTS_KEY:
+                self._index(value, path + (key,))
+
+    def select(self, disclosed_claims):
+        """
+        Returns the `(disclosures, sd_hash)` for a `disclosed_claims` set, computing
+        and caching it on first use.
+        """
+        cache_key = json.dumps(disclosed_claims, sort_keys=True)
+        with self._lock:
+            selection = self._selections.get(cache_key)
+            if selection is not None:
+                self._selections.move_to_end(cache_key)
+                return selection
+
+            if _has_lists(disclosed_claims):
+                # Array element disclosures are selected by the sd-jwt library
+                self._holder.hs_disclosures = []
+                self._holder._select_disclosures(
+                    self._holder.sd_jwt_payload, disclosed_claims
+                )
+                disclosures = tuple(self._holder.hs_disclosures)
+            else:
+                selected = []
+                self._select_paths(disclosed_claims, (), selected)
+                disclosures = tuple(disclosure for _, disclosure in sorted(selected))
+
+            combined = self._holder._combine(
+                self._holder.serialized_sd_jwt, *disclosures, ""
+            )
+            selection = (combined, self._holder._b64hash(combined.encode("ascii")))
+            self._selections[cache_key] = selection
+            while len(self._selections) > self.max_selections:
+                self._selections.popitem(last=False)
+            return selection
+
+    def _select_paths(self, disclosed_claims, path, selected):
+        if disclosed_claims is True:
+            disclosed_claims = {}
+        if not isinstance(disclosed_claims, dict):
+            raise ValueError(
+                f"To disclose object elements, an object must be provided as "
+                f"disclosure information. Found {disclosed_claims} at {list(path)}."
+            )
+        for key, value in disclosed_claims.items():
+            if not value:
+                continue
+            entry = self.disclosures_by_path.get(path + (key,))
+            if entry is not None:
+                selected.append(entry)
+            self._select_paths(value, path + (key,), selected)
+
+    def present(self, disclosed_claims, nonce=None, aud=None, holder_key=None):
+        """
+        Creates a presentation disclosing `disclosed_claims`. A key binding JWT is
+        added when `nonce`, `aud` and a holder key are given.
+        """
+        combined, sd_hash = self.select(disclosed_claims)
+        holder_key = holder_key or self.holder_key
+        if not (nonce and aud and holder_key):
+            return combined
+        return combined + self._sign_key_binding_jwt(nonce, aud, sd_hash, holder_key)
+
+    def present_many(self, disclosed_claims, requests, holder_key=None):
+        """Creates one presentation per `(nonce, aud)` pair in `requests`, in order."""
+        combined, sd_hash = self.select(disclosed_claims)
+        holder_key = holder_key or self.holder_key
+        if holder_key is None:
+            raise ValueError("A holder key is required to sign key binding JWTs")
+        return [
+            combined + self._sign_key_binding_jwt(nonce, aud, sd_hash, holder_key)
+            for nonce, aud in requests
+        ]
+
+    def _sign_key_binding_jwt(self, nonce, aud, sd_hash, holder_key):
+        kb_jwt = JWS(
+            payload=json.dumps(
+                {
+                    "nonce": nonce,
+                    "aud": aud,
+                    "iat": int(time.time()),
+                    KB_DIGEST_KEY: sd_hash,
+                }
+            )
+        )
+        kb_jwt.add_signature(
+            holder_key,
+            alg=DEFAULT_SIGNING_ALG,
+            protected=json.dumps(
+                {"alg": DEFAULT_SIGNING_ALG, "typ": SDJWTHolder.KB_JWT_TYP_HEADER}
+            ),
+        )
+        return kb_jwt.serialize(compact=True)
+
+
+def _has_lists(disclosed_claims):
+    if isinstance(disclosed_claims, list):
+        return True
+    if isinstance(disclosed_claims, dict):
+        return any(_has_lists(value) for value in disclosed_claims.values())
+    return False
 
 
 class SdJwtHandler(BaseCredentialHandler):
     """
     Credential handler for the SD-JWT format.
     Supports selective disclosure and holder binding.
+
+    Presentations are structurally pre-validated before any key resolution or
+    signature work: size, disclosure count, base64url encoding, JOSE headers,
+    the `alg` allowlist and, when `trusted_issuers` is given (any container of
+    DIDs), the unverified `iss` claim.
+
+    When a `metrics` instance is given, each verification stage is timed.
+
+    Presentations reuse a `SdJwtPresentationBuilder` per recently presented
+    credential, so only the key binding JWT is signed on repeat presentations.
+
+    `generate_keys` creates issuer keys of `issuer_key_type` ("P-256", "P-384",
+    "P-521" or "Ed25519"), taken from background-filled pools of
+    `key_pool_depth` keys when that is set.
+
+    `verifier` selects how presentations are verified: "reference" uses the
+    sd-jwt library's SDJWTVerifier, "fast" a `FastSdJwtVerifier` that parses the
+    compact serialization in place and checks signatures with `cryptography`.
     """
 
+    def __init__(
+        self,
+        max_presentation_size=64 * 1024,
+        max_disclosures=256,
+        allowed_algs=DEFAULT_ALLOWED_ALGS,
+        trusted_issuers=None,
+        metrics=None,
+        max_presentation_builders=128,
+        issuer_key_type="P-256",
+        key_pool_depth=0,
+        verifier="reference",
+    ):
+        if verifier not in VERIFIERS:
+            raise ValueError(
+                f"Unsupported verifier: '{verifier}'. Supported verifiers: {list(VERIFIERS)}"
+            )
+        if verifier == "fast" and not FAST_VERIFIER_ALGS.issuperset(allowed_algs):
+            raise ValueError(
+                f"The fast verifier supports only the algorithms {sorted(FAST_VERIFIER_ALGS)}"
+            )
+        self.verifier = verifier
+        self._fast_verifier = FastSdJwtVerifier() if verifier == "fast" else None
+        # Checks key binding JWTs of presentations whose issuer part was verified before
+        self._key_binding_verifier = self._fast_verifier or FastSdJwtVerifier()
+        if issuer_key_type not in KEY_TYPES:
+            raise ValueError(
+                f"Unsupported key type: '{issuer_key_type}'. Supported key types: {list(KEY_TYPES)}"
+            )
+        self.issuer_key_type = issuer_key_type
+        self.key_pool_depth = key_pool_depth
+        self._key_pools = {}
+        self._key_pools_lock = threading.Lock()
+        self.metrics = metrics
+        self.max_presentation_builders = max_presentation_builders
+        self._builders = OrderedDict()
+        self._builders_lock = threading.Lock()
+        self.max_presentation_size = max_presentation_size
+        self.max_disclosures = max_disclosures
+        self.allowed_algs = frozenset(allowed_algs)
+        self.trusted_issuers = trusted_issuers
+
     @property
     def format_name(self):
         return "sd-jwt"
 
+    def __getstate__(self):
+        # Metrics are collected per process; workers of a process pool verify without them
+        state = self.__dict__.copy()
+        state["metrics"] = None
+        for name in ("_builders", "_builders_lock", "_key_pools", "_key_pools_lock"):
+            del state[name]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._builders = OrderedDict()
+        self._builders_lock = threading.Lock()
+        self._key_pools = {}
+        self._key_pools_lock = threading.Lock()
+
     def issue_credential(self, user_claims, issuer_key, holder_key=None):
-        issuer = SDJWTIssuer(user_claims, issuer_key, holder_key)
+        issuer = _HolderBoundIssuer(
+            user_claims,
+            issuer_key,
+            holder_key,
+            sign_alg=signing_alg_for_key(issuer_key),
+        )
         return issuer.sd_jwt_issuance
 
+    def issue_many(
+        self,
+        claim_sets,
+        issuer_key,
+        holder_keys=None,
+        max_workers=None,
+        chunk_size=64,
+    ):
+        """
+        Issues credentials in bulk, signing and generating disclosures on a process
+        pool of `max_workers` processes (one per core by default; 1 issues inline).
+
+        Claim sets and holder keys are consumed lazily and credentials are yielded
+        in input order, with at most two chunks per worker in flight, so memory
+        stays flat however many credentials are issued.
+        """
+        max_workers = max_workers or os.cpu_count() or 1
+        if max_workers == 1:
+            yield from super().issue_many(claim_sets, issuer_key, holder_keys)
+            return
+
+        if holder_keys is None:
+            items = ((user_claims, None) for user_claims in claim_sets)
+        else:
+            items = zip(claim_sets, holder_keys, strict=True)
+        # Only public holder keys are needed for `cnf`; keys cross processes as JSON
+        items = (
+            (user_claims, holder_key.export_public() if holder_key else None)
+            for user_claims, holder_key in items
+        )
+
+        pool = ProcessPoolExecutor(
+            max_workers=max_workers,
+            initializer=_init_issue_worker,
+            initargs=(self, issuer_key.export()),
+        )
+        in_flight = deque()
+        try:
+            for chunk in iter(lambda: list(itertools.islice(items, chunk_size)), []):
+                in_flight.append(pool.submit(_issue_chunk, chunk))
+                if len(in_flight) >= 2 * max_workers:
+                    yield from in_flight.popleft().result()
+            while in_flight:
+                yield from in_flight.popleft().result()
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+
     def create_presentation(
         self, credential, disclosed_claims, holder_key=None, options=None
     ):
         options = options or {}
-        nonce = options.get("nonce")
-        aud = options.get("aud")
+        return self.presentation_builder(credential).present(
+            disclosed_claims, options.get("nonce"), options.get("aud"), holder_key
+        )
 
-        holder = SDJWTHolder(credential)
-        holder.create_presentation(disclosed_claims, nonce, aud, holder_key)
-        return holder.sd_jwt_presentation
+    def presentation_builder(self, credential):
+        """
+        Returns a `SdJwtPresentationBuilder` for the credential. Builders for recently
+        presented credentials are reused, so repeated presentations skip parsing.
+        """
+        with self._builders_lock:
+            builder = self._builders.get(credential)
+            if builder is not None:
+                self._builders.move_to_end(credential)
+        if builder is None:
+            builder = SdJwtPresentationBuilder(credential)
+            with self._builders_lock:
+                self._builders[credential] = builder
+                while len(self._builders) > self.max_presentation_builders:
+                    self._builders.popitem(last=False)
+        return builder
 
     def verify_presentation(self, presentation, get_issuer_key_callback, options=None):
         options = options or {}
 
+        if self._fast_verifier is not None:
+            return self._fast_verifier.verify(
+                self,
+                presentation,
+                get_issuer_key_callback,
+                aud=options.get("aud"),
+                nonce=options.get("nonce"),
+                metrics=self.metrics,
+            )
+
         # Ensure presentation is a string
         if isinstance(presentation, bytes):
             presentation = presentation.decode("utf-8")
 
-        # Create verifier with expected audience and nonce
-        verifier = SDJWTVerifier(
+        if self.metrics is None:
+            # Reject malformed or untrusted input before any crypto
+            self.prevalidate(presentation)
+
+            # Create verifier with expected audience and nonce
+            verifier = _TypedVerifier(
+                presentation,
+                get_issuer_key_callback,
+                expected_aud=options.get("aud"),
+                expected_nonce=options.get("nonce"),
+            )
+            return verifier.get_verified_payload()
+
+        with self.metrics.time("verification_stage_seconds", stage="prevalidate"):
+            self.prevalidate(presentation)
+
+        verifier = _InstrumentedVerifier(
+            self.metrics,
             presentation,
             get_issuer_key_callback,
             expected_aud=options.get("aud"),
@@ -48,11 +629,143 @@ class SdJwtHandler(BaseCredentialHandler):
         # Return verified claims
         return verifier.get_verified_payload()
 
-    def generate_keys(self):
-        issuer_key = JWK.generate(kty="EC", crv="P-256")
-        holder_key = JWK.generate(kty="EC", crv="P-256")
-        issuer_public_key = JWK()
-        issuer_public_key.import_key(**issuer_key.export_public(as_dict=True))
+    def prevalidate(self, presentation):
+        """
+        Cheap structural checks on a compact SD-JWT presentation.
+        Returns the unverified issuer JWT header and payload, or raises ValueError.
+        """
+        if len(presentation) > self.max_presentation_size:
+            raise MalformedPresentationError(
+                f"Presentation exceeds the maximum size of {self.max_presentation_size} bytes"
+            )
+
+        segments = presentation.split("~")
+        if len(segments) < 2:
+            raise MalformedPresentationError("Malformed SD-JWT: missing '~' separator")
+        issuer_jwt, *disclosures, kb_jwt = segments
+        if len(disclosures) > self.max_disclosures:
+            raise MalformedPresentationError(
+                f"Presentation has {len(disclosures)} disclosures, "
+                f"the maximum is {self.max_disclosures}"
+            )
+        for disclosure in disclosures:
+            if not disclosure or not _BASE64URL.fullmatch(disclosure):
+                raise MalformedPresentationError(
+                    "Malformed disclosure: not base64url-encoded"
+                )
+
+        header, payload = self._prevalidate_jws(issuer_jwt, "issuer JWT")
+        if kb_jwt:
+            self._prevalidate_jws(kb_jwt, "key binding JWT")
+        self._check_issuer(payload)
+
+        return header, payload
+
+    def _prevalidate_jws(self, jws, what):
+        parts = jws.split(".")
+        if len(parts) != 3 or not all(_BASE64URL.fullmatch(part) for part in parts):
+            raise MalformedPresentationError(f"Malformed {what}: not a compact JWS")
+
+        header = _decode_jose_part(parts[0], f"{what} header")
+        self._check_alg(header, what)
+        return header, _decode_jose_part(parts[1], f"{what} payload")
+
+    def _check_alg(self, header, what):
+        if header.get("alg") not in self.allowed_algs:
+            raise MalformedPresentationError(
+                f"Algorithm '{header.get('alg')}' of the {what} is not allowed"
+            )
+
+    def _check_issuer(self, payload):
+        if self.trusted_issuers is not None:
+            issuer = payload.get("iss")
+            if issuer not in self.trusted_issuers:
+                raise InvalidIssuerError(f"Issuer '{issuer}' is not trusted")
+
+    def issuer_signed_part(self, presentation):
+        """
+        Returns the issuer JWT and disclosures of a compact presentation, ending
+        with '~'. The claims they verify to do not depend on the key binding JWT,
+        so a verifier can cache them by this part; see `verify_key_binding`.
+        """
+        if isinstance(presentation, bytes):
+            presentation = presentation.decode("utf-8")
+        end = presentation.rfind("~")
+        if end == -1:
+            raise MalformedPresentationError("Malformed SD-JWT: missing '~' separator")
+        return presentation[: end + 1]
+
+    def verify_key_binding(self, presentation, verified_claims, options=None):
+        """
+        Verifies only the key binding JWT of a presentation against the `nonce`
+        and `aud` in `options`, for a presentation whose issuer-signed part was
+        verified before, yielding `verified_claims`.
+        """
+        options = options or {}
+        self._key_binding_verifier.verify_key_binding(
+            self,
+            presentation,
+            verified_claims,
+            options.get("aud"),
+            options.get("nonce"),
+        )
+
+    def key_binding_context(self, presentation):
+        """
+        Returns the `nonce` and `aud` claims of the presentation's key binding JWT
+        without verifying it, e.g. to re-verify an archived presentation whose
+        original request context was not recorded.
+        """
+        if isinstance(presentation, bytes):
+            presentation = presentation.decode("utf-8")
+        parts = presentation.rsplit("~", 1)[-1].split(".")
+        if len(parts) != 3:
+            raise MalformedPresentationError("Presentation has no key binding JWT")
+        payload = _decode_jose_part(parts[1], "key binding JWT payload")
+        return {"nonce": payload.get("nonce"), "aud": payload.get("aud")}
+
+    def issuer_key_request(self, presentation):
+        if isinstance(presentation, bytes):
+            presentation = presentation.decode("utf-8")
+
+        # Read the issuer and JOSE header without verifying the signature;
+        # verification checks the signature against the resolved key.
+        header, payload = self.prevalidate(presentation)
+        return payload.get("iss"), header
+
+    def prefetch_issuer_key(self, presentation, get_issuer_key_callback):
+        issuer, header = self.issuer_key_request(presentation)
+        return StaticIssuerKey(get_issuer_key_callback(issuer, header))
+
+    def _new_key(self, key_type):
+        if not self.key_pool_depth:
+            return generate_key(key_type)
+        with self._key_pools_lock:
+            pool = self._key_pools.get(key_type)
+            if pool is None:
+                pool = self._key_pools[key_type] = KeyPool(
+                    key_type, self.key_pool_depth
+                ).start()
+        return pool.get()
+
+    def close(self):
+        """Stops the refill threads of the key pools."""
+        with self._key_pools_lock:
+            pools = list(self._key_pools.values())
+            self._key_pools.clear()
+        for pool in pools:
+            pool.close()
+
+    def generate_keys(self, issuer_key_type=None):
+        """
+        Generates an issuer key of `issuer_key_type` (default: the handler's
+        `issuer_key_type`) and a P-256 holder key. With `key_pool_depth` set, keys
+        come from pools refilled in the background.
+        """
+        issuer_key = self._new_key(issuer_key_type or self.issuer_key_type)
+        # Key binding JWTs are signed with ES256, so holder keys are always P-256
+        holder_key = self._new_key("P-256")
+        issuer_public_key = JWK(**issuer_key.export_public(as_dict=True))
 
         return {
             "issuer_key": issuer_key,
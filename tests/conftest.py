@@ -0,0 +1,70 @@
+import json
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+# The server and its handlers are imported as `src.*`, as in the benchmarks
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sd_jwt.common import SDObj
+
+from src.credential_handler import SdJwtHandler
+
+ISSUER_DID = "did:webvh:issuer.example.com"
+HOLDER_DID = "did:webvh:holder.example.com"
+DISCLOSED_CLAIMS = {"given_name": True, "family_name": True}
+
+
+def identity_claims(holder_did=HOLDER_DID):
+    """Claims of an identity credential meeting the server's default policy."""
+    now = int(time.time())
+    return {
+        "iss": ISSUER_DID,
+        "sub": holder_did,
+        "iat": now,
+        "exp": now + 3600,
+        "cnf": {"kid": holder_did},
+        "vct": "IdentityCredential",
+        SDObj("given_name"): "Jon",
+        SDObj("family_name"): "Doe",
+        SDObj("email"): "jondoe@mail.com",
+    }
+
+
+class Issued:
+    """An issued identity credential, its keys and the trust registry trusting it."""
+
+    def __init__(self, registry_path):
+        self.handler = SdJwtHandler()
+        self.keys = self.handler.generate_keys()
+        self.registry_path = str(registry_path)
+        self.write_registry()
+        self.credential = self.handler.issue_credential(
+            identity_claims(), self.keys["issuer_key"], self.keys["holder_key"]
+        )
+
+    def write_registry(self, **entry):
+        with open(self.registry_path, "w") as f:
+            json.dump(
+                {
+                    "issuer_did": ISSUER_DID,
+                    "public_key": json.loads(self.keys["issuer_public_key"].export()),
+                    **entry,
+                },
+                f,
+            )
+
+    def present(self, nonce, aud, disclosed_claims=DISCLOSED_CLAIMS):
+        return self.handler.create_presentation(
+            self.credential,
+            disclosed_claims,
+            self.keys["holder_key"],
+            {"nonce": nonce, "aud": aud},
+        )
+
+
+@pytest.fixture
+def issued(tmp_path):
+    return Issued(tmp_path / "issuer_public_key.json")
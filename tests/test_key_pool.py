@@ -0,0 +1,30 @@
+import threading
+
+from src.credential_handler import CredentialHandler, SdJwtHandler
+from src.credential_handler.key_pool import KeyPool
+
+
+def test_misses_are_counted_once_per_key_generated_inline():
+    pool = KeyPool(depth=0)
+    threads = [threading.Thread(target=pool.get) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    pool.close()
+    assert pool.misses == 8
+
+
+def test_close_stops_key_pool_threads():
+    handler = SdJwtHandler(issuer_key_type="Ed25519", key_pool_depth=2)
+    credential_handler = CredentialHandler()
+    credential_handler.register_handler(handler)
+    credential_handler.generate_keys("sd-jwt")
+    pools = list(handler._key_pools.values())
+    assert len(pools) == 2
+
+    credential_handler.close()
+    for pool in pools:
+        pool._filler.join(timeout=5)
+        assert not pool._filler.is_alive()
+    assert not handler._key_pools
@@ -0,0 +1,102 @@
+import asyncio
+import os
+
+import pytest
+
+from src.credential_checking_server.server import ServerConfig, create_app
+from src.credential_checking_server.supervisor import shared_state_config
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def app(request, issued, tmp_path):
+    config = ServerConfig(trust_registry_path=issued.registry_path, result_cache_ttl=60)
+    if request.param == "sqlite":
+        config.result_cache_path = str(tmp_path / "results.sqlite3")
+    app = create_app(config)
+    yield app
+    app.close()
+
+
+def submit(app, issued, aud=None, nonce=None):
+    if nonce is None:
+        nonce, _ = app.nonce_store.issue()
+    presentation = issued.present(nonce, aud or app.did)
+    return asyncio.run(app.submit_credential("sd-jwt", presentation, nonce))
+
+
+def error_code(response):
+    return response.get("error", {}).get("code")
+
+
+def test_presenting_a_credential_again_hits_the_cache(app, issued):
+    assert submit(app, issued)["status"] == "success"
+    assert (app.result_cache.hits, app.result_cache.misses) == (0, 1)
+
+    response = submit(app, issued)
+    assert response["status"] == "success"
+    assert response["verification_result"]["disclosed_claims"]["given_name"] == "Jon"
+    assert (app.result_cache.hits, app.result_cache.misses) == (1, 1)
+
+
+def test_cache_hits_still_check_the_key_binding_jwt(app, issued):
+    assert submit(app, issued)["status"] == "success"
+
+    assert error_code(submit(app, issued, aud="did:webvh:other")) == "INVALID_AUDIENCE"
+    nonce, _ = app.nonce_store.issue()
+    other_nonce, _ = app.nonce_store.issue()
+    presentation = issued.present(other_nonce, app.did)
+    response = asyncio.run(app.submit_credential("sd-jwt", presentation, nonce))
+    assert error_code(response) == "INVALID_NONCE"
+    assert app.result_cache.hits == 2
+
+
+def test_resubmitting_a_nonce_is_rejected_before_the_cache(app, issued):
+    nonce, _ = app.nonce_store.issue()
+    presentation = issued.present(nonce, app.did)
+    assert (
+        asyncio.run(app.submit_credential("sd-jwt", presentation, nonce))["status"]
+        == "success"
+    )
+
+    response = asyncio.run(app.submit_credential("sd-jwt", presentation, nonce))
+    assert error_code(response) == "INVALID_NONCE"
+    assert app.result_cache.hits == 0
+
+
+def test_batches_use_the_cache(app, issued):
+    assert submit(app, issued)["status"] == "success"
+
+    nonces = [app.nonce_store.issue()[0] for _ in range(3)]
+    presentations = [issued.present(nonce, app.did) for nonce in nonces]
+    response = asyncio.run(
+        app.submit_credentials_batch("sd-jwt", presentations, nonces)
+    )
+    assert [result["status"] for result in response["results"]] == ["success"] * 3
+    assert app.result_cache.hits == 3
+
+
+def test_registry_reload_invalidates_cached_results(app, issued):
+    assert submit(app, issued)["status"] == "success"
+
+    issued.write_registry(name="Renamed Issuer")
+    stat = os.stat(issued.registry_path)
+    os.utime(issued.registry_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert app.trust_registry.reload_if_changed()
+
+    assert submit(app, issued)["status"] == "success"
+    assert (app.result_cache.hits, app.result_cache.misses) == (0, 2)
+
+
+def test_workers_share_cached_results(issued, tmp_path):
+    config = shared_state_config(
+        ServerConfig(trust_registry_path=issued.registry_path, result_cache_ttl=60),
+        str(tmp_path),
+    )
+    first, second = create_app(config), create_app(config)
+    try:
+        assert submit(first, issued)["status"] == "success"
+        assert submit(second, issued)["status"] == "success"
+        assert (second.result_cache.hits, second.result_cache.misses) == (1, 0)
+    finally:
+        first.close()
+        second.close()
@@ -0,0 +1,150 @@
+import base64
+import hashlib
+import json
+import time
+
+import pytest
+from conftest import identity_claims
+from jwcrypto.jws import JWS
+from sd_jwt.common import SDObj
+
+from src.credential_handler import SdJwtHandler
+
+NONCE = "nonce-1"
+AUD = "did:webvh:verifier.example.com"
+
+
+def b64(data):
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def unb64(segment):
+    return json.loads(base64.urlsafe_b64decode(segment + "=" * (-len(segment) % 4)))
+
+
+class Credential:
+    """An issued credential with an array of disclosures, and its parts."""
+
+    def __init__(self):
+        self.reference = SdJwtHandler()
+        self.fast = SdJwtHandler(verifier="fast")
+        self.keys = self.reference.generate_keys()
+        claims = identity_claims()
+        claims["nationalities"] = [SDObj("DE"), SDObj("FR")]
+        self.credential = self.reference.issue_credential(
+            claims, self.keys["issuer_key"], self.keys["holder_key"]
+        )
+        self.issuer_jwt, *self.disclosures, _ = self.credential.split("~")
+        header, payload, _ = self.issuer_jwt.split(".")
+        self.header, self.payload = unb64(header), unb64(payload)
+
+    def sign(self, header, payload):
+        """Re-signs an issuer JWT with the issuer key."""
+        jws = JWS(payload=json.dumps(payload))
+        jws.add_signature(self.keys["issuer_key"], protected=json.dumps(header))
+        return jws.serialize(compact=True)
+
+    def present(self, issuer_jwt, disclosures, nonce=NONCE, aud=AUD):
+        """Combines parts into a presentation with a key binding JWT."""
+        combined = "~".join([issuer_jwt, *disclosures, ""])
+        kb_jwt = JWS(
+            payload=json.dumps(
+                {
+                    "nonce": nonce,
+                    "aud": aud,
+                    "iat": int(time.time()),
+                    "sd_hash": b64(hashlib.sha256(combined.encode("ascii")).digest()),
+                }
+            )
+        )
+        kb_jwt.add_signature(
+            self.keys["holder_key"],
+            protected=json.dumps({"alg": "ES256", "typ": "kb+jwt"}),
+        )
+        return combined + kb_jwt.serialize(compact=True)
+
+    def verify(self, handler, presentation):
+        """Returns the verified claims, or the exception raised."""
+        try:
+            return handler.verify_presentation(
+                presentation,
+                lambda issuer, header: self.keys["issuer_public_key"],
+                {"nonce": NONCE, "aud": AUD},
+            )
+        except Exception as e:
+            return e
+
+
+@pytest.fixture(scope="module")
+def credential():
+    return Credential()
+
+
+def test_matches_reference_on_accepted_presentations(credential):
+    for disclosed_claims in (
+        {},
+        {"given_name": True},
+        {"given_name": True, "family_name": True, "email": True},
+        {"nationalities": [True, False]},
+        {"given_name": True, "nationalities": [True, True]},
+    ):
+        presentation = credential.reference.create_presentation(
+            credential.credential,
+            disclosed_claims,
+            credential.keys["holder_key"],
+            {"nonce": NONCE, "aud": AUD},
+        )
+        expected = credential.verify(credential.reference, presentation)
+        assert isinstance(expected, dict)
+        assert credential.verify(credential.fast, presentation) == expected
+
+
+@pytest.mark.parametrize(
+    "tamper",
+    [
+        lambda c: c.present(c.issuer_jwt, c.disclosures, nonce="other"),
+        lambda c: c.present(c.issuer_jwt, c.disclosures, aud="other"),
+        lambda c: c.present(c.issuer_jwt[:-4] + "AAAA", c.disclosures),
+        lambda c: c.present(c.issuer_jwt, [c.disclosures[0][:-2] + "xx"]),
+        lambda c: c.present(c.issuer_jwt, c.disclosures)[:-4] + "AAAA",
+        lambda c: c.present(c.issuer_jwt, c.disclosures + c.disclosures[:1]),
+    ],
+    ids=["nonce", "aud", "issuer-signature", "disclosure", "kb-signature", "repeat"],
+)
+def test_matches_reference_on_rejected_presentations(credential, tamper):
+    presentation = tamper(credential)
+    assert isinstance(credential.verify(credential.reference, presentation), Exception)
+    assert isinstance(credential.verify(credential.fast, presentation), Exception)
+
+
+def test_rejects_unreferenced_disclosures(credential):
+    extra = b64(json.dumps(["salt", "extra", "claim"]).encode("ascii"))
+    presentation = credential.present(
+        credential.issuer_jwt, credential.disclosures + [extra]
+    )
+    assert "extra" not in credential.verify(credential.reference, presentation)
+    error = credential.verify(credential.fast, presentation)
+    assert "not referenced" in str(error)
+
+
+def test_rejects_repeated_array_digests(credential):
+    payload = json.loads(json.dumps(credential.payload))
+    payload["nationalities"].append(payload["nationalities"][0])
+    presentation = credential.present(
+        credential.sign(credential.header, payload), credential.disclosures
+    )
+    claims = credential.verify(credential.reference, presentation)
+    assert claims["nationalities"] == ["DE", "FR", "DE"]
+    error = credential.verify(credential.fast, presentation)
+    assert "Duplicate hash" in str(error)
+
+
+def test_rejects_critical_headers(credential):
+    # `b64` is the one critical header parameter jwcrypto understands
+    header = dict(credential.header, crit=["b64"], b64=True)
+    presentation = credential.present(
+        credential.sign(header, credential.payload), credential.disclosures
+    )
+    assert isinstance(credential.verify(credential.reference, presentation), dict)
+    error = credential.verify(credential.fast, presentation)
+    assert "critical header" in str(error)
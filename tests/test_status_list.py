@@ -0,0 +1,59 @@
+import base64
+import json
+import zlib
+
+import pytest
+
+from src.credential_checking_server.status_list import StatusList, StatusListCache
+from src.credential_handler.errors import StatusUnavailableError
+
+URI = "https://issuer.example.com/statuslists/1"
+
+
+def bomb(size):
+    """A status list that decompresses to `size` bytes."""
+    lst = base64.urlsafe_b64encode(zlib.compress(bytes(size), 9))
+    return {"bits": 1, "lst": lst.rstrip(b"=").decode("ascii")}
+
+
+def claims(uri=URI, idx=0):
+    return {"status": {"status_list": {"uri": uri, "idx": idx}}}
+
+
+def test_decode_round_trip():
+    status_list = StatusList.create(1024)
+    status_list[7] = 1
+    decoded = StatusList.decode(status_list.encode())
+    assert decoded[7] == 1
+    assert decoded[8] == 0
+
+
+def test_decode_rejects_lists_over_the_limit():
+    assert len(StatusList.decode(bomb(1024), max_bytes=1024)) == 8192
+    with pytest.raises(ValueError, match="larger than 1024 bytes"):
+        StatusList.decode(bomb(1025), max_bytes=1024)
+
+
+def test_oversized_remote_document_is_unavailable():
+    cache = StatusListCache(fetcher=lambda uri: b"x" * 101, max_document_bytes=100)
+    with pytest.raises(StatusUnavailableError, match="larger than 100 bytes") as e:
+        cache.check(claims())
+    assert e.value.code == "STATUS_UNAVAILABLE"
+
+
+def test_oversized_local_document_is_unavailable(tmp_path):
+    (tmp_path / "list.json").write_text(json.dumps({"status_list": bomb(16)}))
+    cache = StatusListCache(directory=tmp_path, max_document_bytes=32)
+    with pytest.raises(StatusUnavailableError, match="larger than 32 bytes"):
+        cache.check(claims("list.json"))
+
+
+def test_decompression_bomb_is_unavailable(tmp_path):
+    (tmp_path / "list.json").write_text(json.dumps({"status_list": bomb(1 << 20)}))
+    cache = StatusListCache(directory=tmp_path, max_list_bytes=1 << 16)
+    with pytest.raises(StatusUnavailableError, match="larger than 65536 bytes"):
+        cache.check(claims("list.json"))
+
+    cache = StatusListCache(directory=tmp_path)
+    cache.check(claims("list.json"))
+    assert cache.size == 1 << 20